@@ -0,0 +1,8 @@
+"""
+Pacote de apoio ao dashboard de sinistros de trânsito da CTTU (Recife).
+
+Reúne o carregamento e o tratamento dos arquivos acidentes*.csv para que o
+script Streamlit (dash_cttu_novo.py) apenas consuma os dados já preparados.
+"""
+
+from .cache import assinatura_csvs, atualizar_cache, carregar_acidentes, carregar_tabela
@@ -0,0 +1,172 @@
+"""
+Cache colunar particionado por ano para os arquivos acidentes*.csv da CTTU.
+
+Cada CSV anual é convertido uma única vez para Parquet (um arquivo por ano) em
+uma pasta de cache ao lado dos dados. O manifesto da pasta guarda a impressão
+digital de cada CSV (tamanho, data de modificação e hash SHA-1): ao incluir um
+novo ano, apenas ele é lido como texto, e os anos inalterados são carregados
+diretamente do Parquet.
+
+Os arquivos pendentes são processados em paralelo (um processo por arquivo,
+limitado ao número de núcleos). Cada processo devolve uma tabela Arrow e as
+partições são unidas com pyarrow.concat_tables, sem cópia dos dados.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow.parquet as pq
+
+from .esquema import concatenar_tabelas, ler_csv_tipado, para_arrow
+
+# Incrementar sempre que o formato gravado no Parquet mudar (invalida o cache)
+VERSAO_CACHE = 6
+
+NOME_PASTA_CACHE = ".cache_cttu"
+NOME_MANIFESTO = "manifesto.json"
+PADRAO_ARQUIVO = re.compile(r"acidentes(\d{4})\.csv$")
+
+
+def listar_csvs(pasta):
+    """Retorna {ano: caminho} para os arquivos acidentesAAAA.csv da pasta."""
+    arquivos = {}
+    for caminho in glob.glob(os.path.join(pasta, "acidentes*.csv")):
+        encontrado = PADRAO_ARQUIVO.search(os.path.basename(caminho))
+        if encontrado:
+            arquivos[int(encontrado.group(1))] = caminho
+    return dict(sorted(arquivos.items()))
+
+
+def assinatura_csvs(pasta):
+    """Assinatura barata (nome, tamanho, mtime) usada como chave de cache em memória."""
+    assinatura = []
+    for ano, caminho in listar_csvs(pasta).items():
+        info = os.stat(caminho)
+        assinatura.append((ano, info.st_size, info.st_mtime_ns))
+    return tuple(assinatura)
+
+
+def detectar_separador(caminho):
+    # Detectar separador automaticamente a partir da primeira linha
+    with open(caminho, "r", encoding="utf-8-sig") as f:
+        primeira_linha = f.readline()
+    return ";" if primeira_linha.count(";") > primeira_linha.count(",") else ","
+
+
+def hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    h = hashlib.sha1()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def impressao_digital(caminho, anterior=None):
+    """Tamanho, mtime e SHA-1 do arquivo; o hash só é recalculado se tamanho ou mtime mudarem."""
+    info = os.stat(caminho)
+    if anterior and anterior.get("tamanho") == info.st_size and anterior.get("mtime_ns") == info.st_mtime_ns:
+        return {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns, "sha1": anterior["sha1"]}
+    return {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns, "sha1": hash_arquivo(caminho)}
+
+
+def carregar_manifesto(pasta_cache):
+    caminho = os.path.join(pasta_cache, NOME_MANIFESTO)
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError):
+        return {"versao": VERSAO_CACHE, "arquivos": {}}
+    if manifesto.get("versao") != VERSAO_CACHE:
+        # Formato antigo: descarta as entradas para que tudo seja regravado
+        return {"versao": VERSAO_CACHE, "arquivos": {}}
+    return manifesto
+
+
+def salvar_manifesto(pasta_cache, manifesto):
+    # Gravação atômica para não corromper o manifesto se o processo for interrompido
+    caminho = os.path.join(pasta_cache, NOME_MANIFESTO)
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=2, sort_keys=True)
+    os.replace(temporario, caminho)
+
+
+def ler_csv(caminho, ano):
+    """Lê um CSV anual já no esquema canônico (ver cttu.esquema)."""
+    return ler_csv_tipado(caminho, ano, detectar_separador(caminho))
+
+
+def gravar_particao(tabela, caminho_parquet):
+    temporario = caminho_parquet + ".tmp"
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, caminho_parquet)
+
+
+def processar_csv(tarefa):
+    """Executado em um processo auxiliar: lê um CSV anual, grava sua partição e devolve a tabela Arrow."""
+    caminho, ano, caminho_parquet = tarefa
+    tabela = para_arrow(ler_csv(caminho, ano))
+    gravar_particao(tabela, caminho_parquet)
+    return ano, tabela
+
+
+def processar_pendentes(tarefas, processos=None):
+    """Lê os CSVs pendentes em paralelo; com um único arquivo evita o custo de criar o pool."""
+    processos = min(len(tarefas), processos or os.cpu_count() or 1)
+    if processos <= 1:
+        return dict(processar_csv(tarefa) for tarefa in tarefas)
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        return dict(executor.map(processar_csv, tarefas))
+
+
+def atualizar_cache(pasta, pasta_cache=None, processos=None):
+    """
+    Sincroniza a pasta de cache com os CSVs e retorna {ano: tabela Arrow}.
+
+    Só os CSVs cuja impressão digital mudou (ou que ainda não têm Parquet) são
+    lidos novamente, em paralelo; os demais anos vêm direto do Parquet.
+    Partições de arquivos removidos são apagadas.
+    """
+    pasta_cache = pasta_cache or os.path.join(pasta, NOME_PASTA_CACHE)
+    os.makedirs(pasta_cache, exist_ok=True)
+    manifesto = carregar_manifesto(pasta_cache)
+    entradas = manifesto["arquivos"]
+
+    particoes = {}
+    pendentes = []
+    for ano, caminho in listar_csvs(pasta).items():
+        nome = os.path.basename(caminho)
+        anterior = entradas.get(nome)
+        digital = impressao_digital(caminho, anterior)
+        caminho_parquet = os.path.join(pasta_cache, f"acidentes{ano}.parquet")
+        if anterior and anterior["sha1"] == digital["sha1"] and os.path.exists(caminho_parquet):
+            particoes[ano] = pq.read_table(caminho_parquet)
+        else:
+            pendentes.append((caminho, ano, caminho_parquet))
+        entradas[nome] = dict(digital, ano=ano, parquet=os.path.basename(caminho_parquet))
+    if pendentes:
+        particoes.update(processar_pendentes(pendentes, processos))
+
+    # Remover partições cujos CSVs não existem mais
+    for nome in list(entradas):
+        if entradas[nome]["ano"] not in particoes:
+            caminho_parquet = os.path.join(pasta_cache, entradas.pop(nome)["parquet"])
+            if os.path.exists(caminho_parquet):
+                os.remove(caminho_parquet)
+
+    salvar_manifesto(pasta_cache, manifesto)
+    return dict(sorted(particoes.items()))
+
+
+def carregar_tabela(pasta, pasta_cache=None, processos=None):
+    """Tabela Arrow com todos os anos (um chunk por ano, sem cópia)."""
+    return concatenar_tabelas(list(atualizar_cache(pasta, pasta_cache, processos).values()))
+
+
+def carregar_acidentes(pasta, pasta_cache=None, processos=None):
+    """Carrega todos os anos a partir do cache Parquet, atualizando-o antes se necessário."""
+    return carregar_tabela(pasta, pasta_cache, processos).to_pandas()
@@ -0,0 +1,118 @@
+"""
+Cubo pré-agregado de acidentes.
+
+O cubo guarda ocorrências, vítimas e vítimas fatais por (ano, mes, dia_semana,
+hora, bairro, tipo) e é montado uma única vez após o carregamento. Os filtros
+do dashboard (intervalo de datas e tipo de acidente) passam a recortar o cubo
+em vez das linhas brutas; só os meses parcialmente cobertos pelo intervalo,
+nas bordas, são reagregados a partir das linhas filtradas, o que mantém os
+totais idênticos aos calculados sobre os dados brutos.
+"""
+
+import numpy as np
+import pandas as pd
+
+DIMENSOES = ["ano", "mes", "dia_semana", "hora", "bairro", "tipo"]
+MEDIDAS = ["ocorrencias", "vitimas", "vitimasfatais"]
+
+
+def colunas_do_cubo(dados):
+    """
+    Dimensões de tempo (hora = -1 quando não informada) e medidas, no formato
+    do cubo. Linhas sem data (NaT) ficam de fora: não têm ano nem mês, e os
+    filtros de datas também nunca as selecionam.
+    """
+    com_data = dados["data"].notna()
+    if not com_data.all():
+        dados = dados[com_data]
+    hora = dados["data_hora"].dt.hour
+    return pd.DataFrame({
+        "ano": dados["data"].dt.year.astype(np.int16),
+        "mes": dados["data"].dt.month.astype(np.int8),
+        "dia_semana": dados["data"].dt.dayofweek.astype(np.int8),
+        "hora": hora.fillna(-1).astype(np.int8),
+        "bairro": dados["bairro"],
+        "tipo": dados["tipo"],
+        "ocorrencias": np.ones(len(dados), dtype=np.int32),
+        "vitimas": dados["vitimas"].astype(np.int32),
+        "vitimasfatais": dados["vitimasfatais"].astype(np.int32),
+    }, index=dados.index)
+
+
+def construir_cubo(dados):
+    """
+    Agrega linhas de acidentes nas dimensões do cubo.
+
+    O resultado fica ordenado por (ano, mes) e traz a coluna auxiliar
+    chave_mes, o que permite recortar intervalos de meses por busca binária.
+    """
+    cubo = (
+        colunas_do_cubo(dados)
+        .groupby(DIMENSOES, observed=True, dropna=False)[MEDIDAS]
+        .sum()
+        .reset_index()
+    )
+    cubo["chave_mes"] = chave_mes(cubo["ano"], cubo["mes"])
+    return cubo
+
+
+def chave_mes(ano, mes):
+    return np.asarray(ano, dtype=np.int32) * 12 + np.asarray(mes, dtype=np.int32) - 1
+
+
+def meses_completos(inicio, fim):
+    """Primeira e última chave de mês totalmente contidas no intervalo [inicio, fim] (datas diárias)."""
+    inicio = pd.Timestamp(inicio).normalize()
+    fim = pd.Timestamp(fim).normalize()
+    primeiro = chave_mes(inicio.year, inicio.month) + (0 if inicio.day == 1 else 1)
+    ultimo = chave_mes(fim.year, fim.month) - (0 if fim.is_month_end else 1)
+    return int(primeiro), int(ultimo)
+
+
+def fatiar(cubo, inicio, fim, tipos=None, linhas=None):
+    """
+    Recorte do cubo para o intervalo de datas e os tipos escolhidos.
+
+    Meses inteiros saem direto do cubo; os meses de borda são reagregados a
+    partir de `linhas` (as linhas brutas já filtradas pelo mesmo intervalo e
+    tipos). Sem `linhas`, apenas os meses completos são considerados.
+    """
+    primeiro, ultimo = meses_completos(inicio, fim)
+    chaves = cubo["chave_mes"].to_numpy()
+    recorte = cubo.iloc[np.searchsorted(chaves, primeiro):np.searchsorted(chaves, ultimo, side="right")]
+    if tipos:
+        recorte = recorte[recorte["tipo"].isin(tipos)]
+    partes = [recorte]
+    if linhas is not None and len(linhas):
+        chaves_linhas = chave_mes(linhas["data"].dt.year, linhas["data"].dt.month)
+        borda = linhas[(chaves_linhas < primeiro) | (chaves_linhas > ultimo)]
+        if len(borda):
+            partes.append(construir_cubo(borda))
+    if len(partes) == 1:
+        return partes[0]
+    return pd.concat(partes, ignore_index=True)
+
+
+# Agregações usadas pelos gráficos (recebem um recorte do cubo)
+
+def totais(fatia):
+    return {medida: int(fatia[medida].sum()) for medida in MEDIDAS}
+
+
+def por_ano(fatia):
+    return fatia.groupby("ano")["ocorrencias"].sum().reset_index()
+
+
+def por_mes(fatia):
+    return fatia.groupby("mes")["ocorrencias"].sum().reset_index()
+
+
+def top_bairros(fatia, n=10):
+    soma = fatia.groupby("bairro", observed=True)["ocorrencias"].sum()
+    return soma.nlargest(n).reset_index()
+
+
+def vitimas_por_mes(fatia, anos=None):
+    if anos is not None:
+        fatia = fatia[fatia["ano"].isin(anos)]
+    return fatia.groupby("mes")[["vitimas", "vitimasfatais"]].sum().sort_index().reset_index()
@@ -0,0 +1,229 @@
+"""
+Benchmark do pipeline do dashboard em volumes sintéticos.
+
+Os CSVs de 2016 a 2024 são replicados (corpo do arquivo repetido k vezes,
+mesmo cabeçalho e formato) em uma pasta temporária para cada escala (1x, 10x,
+100x por padrão). Cada escala roda em um processo separado, para que a
+memória de pico (RSS) de uma não contamine a outra, e cada etapa registra o
+tempo, o RSS atual e o pico acumulado do processo e, à parte, o maior pico
+entre os processos filhos já encerrados (os workers do cache Parquet).
+
+Etapas: leitura dos CSVs, normalização do esquema, cache Parquet (gravação e
+leitura), geocodificação, índice e filtros (datas e tipos), cubo e cada
+agregação da seção 7, pontos críticos, matrizes dia x hora, mapa de calor,
+tabela por bairro, treino do classificador de risco e motor de rotas.
+
+    python -m cttu.desempenho --escalas 1,10,100 --saida desempenho.json
+
+O resultado é um JSON para comparar execuções (regressões de desempenho).
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .cache import atualizar_cache, carregar_acidentes, detectar_separador, listar_csvs
+from .cubo import construir_cubo, fatiar, por_ano, por_mes, top_bairros, totais, vitimas_por_mes
+from .esquema import esquema_do_ano, ler_cabecalho, mapear_colunas, normalizar, tipos_de_leitura
+from .filtros import construir_indice, filtrar
+from .geocodificacao import geocodificar_bairros
+from .horarios import construir_matrizes
+from .mapa import pontos_calor
+from .modelos import dados_de_treino, treinar_classificador
+from .pontos_criticos import construir_pontos_criticos, ranking
+from .rotas import construir_motor_rotas, tabela_bairros
+
+PASTA_PADRAO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ESCALAS_PADRAO = [1, 10, 100]
+
+
+def rss_atual_mb():
+    """RSS atual do processo (Linux; None em outros sistemas)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def rss_pico_mb(quem=resource.RUSAGE_SELF):
+    """Pico de RSS do próprio processo ou, com RUSAGE_CHILDREN, do maior filho já encerrado."""
+    pico = resource.getrusage(quem).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return pico / 2**20 if sys.platform == "darwin" else pico / 2**10
+
+
+def replicar_csvs(pasta, destino, escala):
+    """Grava em `destino` cada acidentes*.csv com o corpo repetido `escala` vezes."""
+    os.makedirs(destino, exist_ok=True)
+    for ano, caminho in listar_csvs(pasta).items():
+        with open(caminho, "rb") as f:
+            cabecalho = f.readline()
+            corpo = f.read()
+        if corpo and not corpo.endswith(b"\n"):
+            corpo += b"\n"
+        with open(os.path.join(destino, os.path.basename(caminho)), "wb") as f:
+            f.write(cabecalho)
+            for _ in range(escala):
+                f.write(corpo)
+
+
+class Cronometro:
+    """Registra tempo e memória de cada etapa em `etapas`."""
+
+    def __init__(self):
+        self.etapas = []
+
+    def medir(self, nome, funcao, *args, **kwargs):
+        inicio = time.perf_counter()
+        resultado = funcao(*args, **kwargs)
+        rss = rss_atual_mb()
+        self.etapas.append({
+            "etapa": nome,
+            "segundos": round(time.perf_counter() - inicio, 6),
+            "rss_atual_mb": None if rss is None else round(rss, 1),
+            "rss_pico_mb": round(rss_pico_mb(), 1),
+            "rss_pico_filhos_mb": round(rss_pico_mb(resource.RUSAGE_CHILDREN), 1),
+        })
+        return resultado
+
+
+def ler_csvs_brutos(pasta):
+    """Leitura dos CSVs apenas com o parser (colunas e tipos do esquema, sem normalizar)."""
+    brutos = {}
+    for ano, caminho in sorted(listar_csvs(pasta).items()):
+        sep = detectar_separador(caminho)
+        esquema = esquema_do_ano(ano)
+        mapa = mapear_colunas(ler_cabecalho(caminho, sep), esquema)
+        df = pd.read_csv(caminho, sep=sep, encoding="utf-8-sig", usecols=list(mapa),
+                         dtype=tipos_de_leitura(mapa))
+        brutos[ano] = df.rename(columns=mapa)
+    return brutos
+
+
+def normalizar_brutos(brutos):
+    return [normalizar(df, ano) for ano, df in brutos.items()]
+
+
+def executar_escala(pasta, escala, pasta_trabalho=None):
+    """Roda todas as etapas para uma escala e devolve o dicionário de resultados."""
+    base = pasta_trabalho or tempfile.mkdtemp(prefix=f"cttu_{escala}x_")
+    destino = os.path.join(base, f"escala_{escala}")
+    rss_inicial = rss_atual_mb()
+    cronometro = Cronometro()
+    medir = cronometro.medir
+    try:
+        medir("replicar_csvs", replicar_csvs, pasta, destino, escala)
+
+        brutos = medir("leitura_csv", ler_csvs_brutos, destino)
+        normalizados = medir("normalizacao_esquema", normalizar_brutos, brutos)
+        del brutos, normalizados
+
+        pasta_cache = os.path.join(destino, ".cache_cttu")
+        medir("cache_parquet_gravacao", atualizar_cache, destino, pasta_cache)
+        dados = medir("cache_parquet_leitura", carregar_acidentes, destino, pasta_cache)
+        dados = medir("geocodificacao", geocodificar_bairros, dados)
+
+        indice = medir("indice_filtros", construir_indice, dados)
+        inicio, fim = indice["datas"][0], indice["datas"][-1]
+        meio = inicio + (fim - inicio) // 2
+        tipos = list(dados["tipo"].value_counts().index[:3])
+        filtrados = medir("filtro_datas", filtrar, indice, inicio, meio)
+        filtrados_tipos = medir("filtro_datas_tipos", filtrar, indice, inicio, meio, tipos)
+
+        cubo = medir("cubo", construir_cubo, indice["dados"])
+        fatia = medir("cubo_fatiar", fatiar, cubo, inicio, meio, tipos, filtrados_tipos)
+        medir("agregado_totais", totais, fatia)
+        medir("agregado_por_ano", por_ano, fatia)
+        medir("agregado_por_mes", por_mes, fatia)
+        medir("agregado_top_bairros", top_bairros, fatia, 10)
+        medir("agregado_vitimas_por_mes", vitimas_por_mes, fatia)
+        armazem = medir("pontos_criticos", construir_pontos_criticos, indice["dados"])
+        medir("pontos_criticos_ranking", ranking, armazem, "ruas", inicio, meio, tipos, filtrados_tipos)
+        medir("matrizes_semana_hora", construir_matrizes, fatia)
+        medir("mapa_calor", pontos_calor, filtrados, "ocorrencias", None, True)
+
+        # Classificador e motor de rotas saem da tabela dos dados completos, como no dashboard e em cttu.modelos
+        tabela = medir("tabela_bairros", tabela_bairros, dados)
+        medir("treino_classificador", lambda: treinar_classificador(*dados_de_treino(tabela)))
+        medir("motor_rotas", construir_motor_rotas, tabela)
+
+        return {
+            "escala": escala,
+            "linhas": int(len(dados)),
+            "bytes_csv": sum(os.path.getsize(c) for c in listar_csvs(destino).values()),
+            "segundos_total": round(sum(e["segundos"] for e in cronometro.etapas if e["etapa"] != "replicar_csvs"), 6),
+            "rss_inicial_mb": None if rss_inicial is None else round(rss_inicial, 1),
+            "rss_pico_mb": round(rss_pico_mb(), 1),
+            "rss_pico_filhos_mb": round(rss_pico_mb(resource.RUSAGE_CHILDREN), 1),
+            "etapas": cronometro.etapas,
+        }
+    finally:
+        if pasta_trabalho is None:
+            shutil.rmtree(base, ignore_errors=True)
+        else:
+            shutil.rmtree(destino, ignore_errors=True)
+
+
+def executar(pasta=PASTA_PADRAO, escalas=ESCALAS_PADRAO, pasta_trabalho=None):
+    """Roda cada escala num subprocesso (RSS de pico isolado) e junta os resultados."""
+    resultados = []
+    for escala in escalas:
+        comando = [sys.executable, "-m", "cttu.desempenho", "--pasta", pasta, "--escala-unica", str(escala)]
+        if pasta_trabalho:
+            comando += ["--pasta-trabalho", pasta_trabalho]
+        processo = subprocess.run(
+            comando, capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        if processo.returncode != 0:
+            resultados.append({"escala": escala, "erro": processo.stderr.strip().splitlines()[-1:] or ["falhou"]})
+            continue
+        resultados.append(json.loads(processo.stdout))
+    return {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "resultados": resultados,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline do dashboard da CTTU.")
+    parser.add_argument("--pasta", default=PASTA_PADRAO, help="pasta com os arquivos acidentes*.csv")
+    parser.add_argument("--escalas", default=",".join(map(str, ESCALAS_PADRAO)), help='ex.: "1,10,100"')
+    parser.add_argument("--saida", default=None, help="arquivo JSON de saída (padrão: saída padrão)")
+    parser.add_argument("--pasta-trabalho", default=None, help="onde gravar os CSVs sintéticos (padrão: temporária)")
+    parser.add_argument("--escala-unica", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.escala_unica is not None:
+        print(json.dumps(executar_escala(args.pasta, args.escala_unica, args.pasta_trabalho)))
+        return
+    escalas = [int(escala) for escala in args.escalas.split(",")]
+    resultado = json.dumps(executar(args.pasta, escalas, args.pasta_trabalho), ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(resultado)
+    else:
+        print(resultado)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Esquema canônico dos arquivos de acidentes da CTTU.
+
+Os CSVs anuais não compartilham o mesmo layout: 2018 e 2019 usam a coluna
+DATA, até 2021 a natureza do acidente vem em natureza_acidente, e a partir de
+2022 os arquivos trazem Protocolo e gravam as contagens com vírgula decimal
+("1,0"). A via do cruzamento, a partir de 2018, vem em
+detalhe_endereco_acidente (em 2018 e 2019 a coluna endereco_cruzamento apenas
+repete o endereço). O mapa ESQUEMAS_ANUAIS descreve essas diferenças de forma
+declarativa para que cada arquivo seja lido uma única vez, já nas colunas
+canônicas e com tipos explícitos.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .geocodificacao import normalizar_nome
+
+# Colunas canônicas agrupadas pelo tipo final
+COLUNAS_CATEGORICAS = ["natureza", "situacao", "bairro", "bairro_cruzamento", "tipo"]
+COLUNAS_TEXTO = ["endereco", "endereco_cruzamento"]
+COLUNAS_CONTAGEM = [
+    "auto", "moto", "ciclom", "ciclista", "pedestre", "onibus",
+    "caminhao", "viatura", "outros", "vitimas", "vitimasfatais",
+]
+COLUNAS_CANONICAS = (
+    ["ano", "data", "data_hora"] + COLUNAS_CATEGORICAS + COLUNAS_TEXTO + COLUNAS_CONTAGEM
+)
+
+# Tipo de logradouro por extenso -> abreviação mais frequente nos arquivos
+PREFIXOS_LOGRADOURO = {
+    "AVENIDA": "AV", "ESTRADA": "EST", "PRACA": "PRC", "PONTE": "PTE", "VIADUTO": "VDO",
+    "TRAVESSA": "TRV", "LARGO": "LGO", "LADEIRA": "LAD",
+}
+PONTUACAO_ENDERECO = re.compile(r"[.,;:-]+")
+PADRAO_HORA = r"^\s*(\d{1,2}):(\d{2})(?::(\d{2}))?\s*$"
+
+# Esquema Arrow comum a todas as partições (permite concatenar sem cópia)
+ESQUEMA_ARROW = pa.schema(
+    [("ano", pa.int16()), ("data", pa.timestamp("us")), ("data_hora", pa.timestamp("us"))]
+    + [(coluna, pa.dictionary(pa.int32(), pa.string())) for coluna in COLUNAS_CATEGORICAS]
+    + [(coluna, pa.string()) for coluna in COLUNAS_TEXTO]
+    + [(coluna, pa.int32()) for coluna in COLUNAS_CONTAGEM]
+)
+
+# Diferenças de cada ano em relação ao nome canônico (origem -> canônico) e colunas de origem descartadas
+ESQUEMAS_ANUAIS = {
+    2016: {"renomear": {"natureza_acidente": "natureza"}, "decimal": "."},
+    2017: {"renomear": {"natureza_acidente": "natureza"}, "decimal": "."},
+    2018: {
+        "renomear": {"DATA": "data", "natureza_acidente": "natureza", "detalhe_endereco_acidente": "endereco_cruzamento"},
+        "ignorar": ["endereco_cruzamento"],
+        "decimal": ".",
+    },
+    2019: {
+        "renomear": {"DATA": "data", "natureza_acidente": "natureza", "detalhe_endereco_acidente": "endereco_cruzamento"},
+        "ignorar": ["endereco_cruzamento"],
+        "decimal": ".",
+    },
+    2020: {"renomear": {"natureza_acidente": "natureza", "detalhe_endereco_acidente": "endereco_cruzamento"}, "decimal": "."},
+    2021: {"renomear": {"natureza_acidente": "natureza", "detalhe_endereco_acidente": "endereco_cruzamento"}, "decimal": "."},
+    2022: {"renomear": {"detalhe_endereco_acidente": "endereco_cruzamento"}, "decimal": ","},
+    2023: {"renomear": {"detalhe_endereco_acidente": "endereco_cruzamento"}, "decimal": ","},
+    2024: {"renomear": {"detalhe_endereco_acidente": "endereco_cruzamento"}, "decimal": ","},
+}
+
+
+def esquema_do_ano(ano):
+    """Esquema declarado para o ano; anos novos herdam o layout do ano conhecido mais próximo."""
+    if ano in ESQUEMAS_ANUAIS:
+        return ESQUEMAS_ANUAIS[ano]
+    anteriores = [a for a in ESQUEMAS_ANUAIS if a <= ano]
+    return ESQUEMAS_ANUAIS[max(anteriores) if anteriores else min(ESQUEMAS_ANUAIS)]
+
+
+def ler_cabecalho(caminho, sep):
+    with open(caminho, "r", encoding="utf-8-sig") as f:
+        return [coluna.strip() for coluna in f.readline().rstrip("\r\n").split(sep)]
+
+
+def mapear_colunas(cabecalho, esquema):
+    """Retorna {coluna_origem: coluna_canônica} apenas para as colunas que interessam."""
+    canonicas = set(COLUNAS_CANONICAS) | {"hora"}
+    mapa = {}
+    for coluna in cabecalho:
+        if coluna in esquema.get("ignorar", ()):
+            continue
+        destino = esquema["renomear"].get(coluna, coluna)
+        if destino in canonicas:
+            mapa[coluna] = destino
+    return mapa
+
+
+def tipos_de_leitura(mapa):
+    # Tipos aplicados já pelo parser, evitando conversões posteriores
+    tipos = {}
+    for origem, destino in mapa.items():
+        if destino in COLUNAS_CATEGORICAS:
+            tipos[origem] = "category"
+        else:
+            # Contagens também chegam como texto: a conversão (converter_contagens) tolera valores inválidos
+            tipos[origem] = "str"
+    return tipos
+
+
+def normalizar_categorias(serie):
+    """Remove espaços e padroniza em caixa alta uma vez por categoria (não por linha)."""
+    categorias = serie.cat.categories.astype(str).str.strip().str.upper()
+    unicas, novos_codigos = np.unique(np.asarray(categorias, dtype=object), return_inverse=True)
+    codigos = serie.cat.codes.to_numpy()
+    codigos = np.where(codigos >= 0, novos_codigos[np.maximum(codigos, 0)], -1)
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=unicas), index=serie.index)
+
+
+def normalizar_endereco(texto):
+    """Forma canônica de um endereço: sem acentos nem pontuação, caixa alta e tipo de logradouro abreviado."""
+    palavras = normalizar_nome(PONTUACAO_ENDERECO.sub(" ", str(texto))).split()
+    # Textos sem nenhuma letra ("0", "-") são marcadores de endereço ausente
+    if not any(c.isalpha() for c in "".join(palavras)):
+        return None
+    palavras[0] = PREFIXOS_LOGRADOURO.get(palavras[0], palavras[0])
+    return " ".join(palavras)
+
+
+def normalizar_enderecos(serie):
+    """Aplica normalizar_endereco uma vez por texto distinto e devolve a coluna em texto."""
+    codigos, unicos = pd.factorize(serie)
+    normalizados = np.array([normalizar_endereco(texto) for texto in unicos] + [None], dtype=object)
+    return pd.Series(normalizados[codigos], index=serie.index, dtype="str")
+
+
+def segundos_do_dia(serie):
+    """
+    Converte textos "hh:mm[:ss]" em segundos desde a meia-noite (NaN quando
+    inválidos), com uma única expressão regular aplicada aos valores distintos.
+    """
+    codigos, unicos = pd.factorize(serie)
+    partes = pd.Series(unicos, dtype="str").str.extract(PADRAO_HORA).astype(float).to_numpy()
+    horas, minutos, segundos = partes[:, 0], partes[:, 1], np.nan_to_num(partes[:, 2])
+    total = horas * 3600 + minutos * 60 + segundos
+    total[(horas > 23) | (minutos > 59) | (segundos > 59)] = np.nan
+    return np.append(total, np.nan)[codigos]
+
+
+def converter_contagens(serie, decimal="."):
+    """
+    Contagens inteiras (int32), convertidas uma vez por valor distinto.
+
+    Valores ausentes, não numéricos ou fora da faixa do int32 viram 0.
+    """
+    codigos, unicos = pd.factorize(serie)
+    texto = pd.Series(unicos, dtype="str").str.strip()
+    if decimal != ".":
+        texto = texto.str.replace(decimal, ".", regex=False)
+    valores = pd.to_numeric(texto, errors="coerce").to_numpy(dtype=float)
+    limite = np.iinfo(np.int32)
+    valores[~np.isfinite(valores) | (valores < limite.min) | (valores > limite.max)] = 0
+    return np.append(valores, 0)[codigos].astype(np.int32)
+
+
+def normalizar(df, ano):
+    """Converte um DataFrame já renomeado para as colunas canônicas com tipos explícitos."""
+    saida = pd.DataFrame(index=df.index)
+    saida["ano"] = np.full(len(df), ano, dtype=np.int16)
+    saida["data"] = pd.to_datetime(df["data"], format="%Y-%m-%d", errors="coerce")
+    if "hora" in df.columns:
+        saida["data_hora"] = saida["data"] + pd.to_timedelta(segundos_do_dia(df["hora"]), unit="s")
+    else:
+        saida["data_hora"] = pd.Series(pd.NaT, index=df.index, dtype=saida["data"].dtype)
+
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns:
+            saida[coluna] = normalizar_categorias(df[coluna])
+        else:
+            saida[coluna] = pd.Categorical([None] * len(df))
+    for coluna in COLUNAS_TEXTO:
+        if coluna in df.columns:
+            saida[coluna] = normalizar_enderecos(df[coluna])
+        else:
+            saida[coluna] = pd.Series(None, index=df.index, dtype="str")
+    decimal = esquema_do_ano(ano)["decimal"]
+    for coluna in COLUNAS_CONTAGEM:
+        if coluna in df.columns:
+            saida[coluna] = converter_contagens(df[coluna], decimal)
+        else:
+            saida[coluna] = np.zeros(len(df), dtype=np.int32)
+    return saida
+
+
+def ler_csv_tipado(caminho, ano, sep):
+    """Lê um CSV anual direto nas colunas canônicas, com os tipos finais."""
+    esquema = esquema_do_ano(ano)
+    mapa = mapear_colunas(ler_cabecalho(caminho, sep), esquema)
+    df = pd.read_csv(
+        caminho,
+        sep=sep,
+        encoding="utf-8-sig",
+        usecols=list(mapa),
+        dtype=tipos_de_leitura(mapa),
+    )
+    return normalizar(df.rename(columns=mapa), ano)
+
+
+def ler_csv_em_blocos(caminho, ano, sep, tamanho_bloco):
+    """Como ler_csv_tipado, mas gera o arquivo em blocos de até `tamanho_bloco` linhas já normalizados."""
+    esquema = esquema_do_ano(ano)
+    mapa = mapear_colunas(ler_cabecalho(caminho, sep), esquema)
+    leitor = pd.read_csv(
+        caminho,
+        sep=sep,
+        encoding="utf-8-sig",
+        usecols=list(mapa),
+        dtype=tipos_de_leitura(mapa),
+        chunksize=tamanho_bloco,
+    )
+    with leitor:
+        for df in leitor:
+            yield normalizar(df.rename(columns=mapa), ano)
+
+
+def para_arrow(df):
+    """Converte uma partição normalizada para uma tabela Arrow no ESQUEMA_ARROW."""
+    return pa.Table.from_pandas(df[COLUNAS_CANONICAS], preserve_index=False).cast(ESQUEMA_ARROW)
+
+
+def concatenar_tabelas(tabelas):
+    """
+    Junta as partições anuais sem copiar os dados (cada ano vira um chunk) e
+    unifica os dicionários das colunas categóricas antes de gerar o DataFrame.
+    """
+    if not tabelas:
+        return ESQUEMA_ARROW.empty_table()
+    return pa.concat_tables([t.cast(ESQUEMA_ARROW) for t in tabelas]).unify_dictionaries()
@@ -0,0 +1,73 @@
+"""
+Motor de filtros do dashboard (intervalo de datas e tipo de acidente).
+
+As linhas ficam ordenadas por data uma única vez, de modo que um intervalo de
+datas vira uma fatia [a, b) obtida por busca binária, sem máscara booleana e
+sem cópia do DataFrame. Para o tipo de acidente é mantido um índice com os
+números de linha (ordenados) de cada categoria: filtrar por tipos é recortar
+e unir esses vetores, sem comparar textos.
+"""
+
+import numpy as np
+
+
+def ordenar_por_data(dados):
+    """Ordena (de forma estável) pelas datas; não copia se os dados já estiverem em ordem."""
+    datas = dados["data"].to_numpy()
+    if len(datas) < 2 or not (datas[1:] < datas[:-1]).any():
+        return dados
+    ordem = np.argsort(datas, kind="stable")
+    return dados.iloc[ordem].reset_index(drop=True)
+
+
+def construir_indice(dados):
+    """Índice de filtros: dados ordenados, vetor de datas e números de linha por tipo."""
+    dados = ordenar_por_data(dados)
+    codigos = dados["tipo"].cat.codes.to_numpy()
+    categorias = dados["tipo"].cat.categories
+
+    # Ordenação estável por código: as linhas de cada tipo ficam contíguas e em ordem crescente
+    ordem = np.argsort(codigos, kind="stable")
+    limites = np.searchsorted(codigos[ordem], np.arange(len(categorias) + 1))
+    linhas_por_tipo = {
+        categoria: ordem[limites[i]:limites[i + 1]] for i, categoria in enumerate(categorias)
+    }
+    return {
+        "dados": dados,
+        "datas": dados["data"].to_numpy(),
+        "linhas_por_tipo": linhas_por_tipo,
+    }
+
+
+def intervalo(indice, inicio=None, fim=None):
+    """Posições [a, b) das linhas com inicio <= data <= fim."""
+    datas = indice["datas"]
+    a = 0 if inicio is None else np.searchsorted(datas, np.datetime64(inicio).astype(datas.dtype), side="left")
+    b = len(datas) if fim is None else np.searchsorted(datas, np.datetime64(fim).astype(datas.dtype), side="right")
+    return int(a), int(max(a, b))
+
+
+def linhas_dos_tipos(indice, tipos, a, b):
+    """Números de linha, em ordem, dos tipos escolhidos dentro da fatia [a, b)."""
+    partes = []
+    for tipo in tipos:
+        linhas = indice["linhas_por_tipo"].get(tipo)
+        if linhas is not None and len(linhas):
+            partes.append(linhas[np.searchsorted(linhas, a):np.searchsorted(linhas, b)])
+    if not partes:
+        return np.empty(0, dtype=np.intp)
+    return np.sort(np.concatenate(partes))
+
+
+def filtrar(indice, inicio=None, fim=None, tipos=None):
+    """
+    Linhas com data em [inicio, fim] e tipo em `tipos` (todos, se vazio).
+
+    Sem filtro de tipo o resultado é uma fatia do DataFrame ordenado (sem
+    cópia); com tipos, apenas as linhas selecionadas são materializadas.
+    """
+    a, b = intervalo(indice, inicio, fim)
+    dados = indice["dados"]
+    if not tipos:
+        return dados.iloc[a:b]
+    return dados.take(linhas_dos_tipos(indice, tipos, a, b))
@@ -0,0 +1,142 @@
+"""
+Modo em fluxo (streaming) para exportações grandes demais para a memória.
+
+Os CSVs são lidos em blocos de tamanho fixo (geradores em cadeia: leitura ->
+normalização -> geocodificação) e cada bloco só atualiza acumuladores:
+
+- cubo parcial (ano, mes, dia_semana, hora, bairro, tipo), de onde saem
+  totais, vítimas, contagens por bairro e o histograma por hora;
+- tabela por bairro (contagens e coordenadas);
+- contagens exatas de cada rua e cruzamento (um Counter por tipo de local,
+  atualizado com o value_counts de cada bloco);
+- opcionalmente (`pontos_criticos=True`), os resumos de ruas e cruzamentos
+  (pontos_criticos) mesclados por partição, para quem precisar do armazém.
+
+O DataFrame completo nunca é montado: a memória de pico depende do tamanho
+do bloco, do número de células distintas do cubo e do número de ruas e
+cruzamentos distintos, não do número de linhas.
+Como todas as medidas são somas, o cubo final e as contagens por local são
+idênticos aos do caminho em memória (cubo.construir_cubo e
+pontos_criticos.contar_locais sobre todas as linhas). Já a mescla dos
+resumos por bloco é aproximada; por isso o relatório ranqueia os locais pelas
+contagens exatas.
+"""
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from .cache import detectar_separador, listar_csvs
+from .cubo import DIMENSOES, MEDIDAS, chave_mes, construir_cubo, totais
+from .esquema import ler_csv_em_blocos
+from .geocodificacao import geocodificar_bairros
+from .pontos_criticos import TIPOS_LOCAL, construir_pontos_criticos, contar_locais, mesclar_armazens
+from .rotas import tabela_bairros
+
+TAMANHO_BLOCO = 50_000
+# Compacta os cubos parciais quando as linhas pendentes passam deste limite
+LIMITE_PENDENTES = 200_000
+
+
+def blocos(pasta, anos=None, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera blocos normalizados e geocodificados de todos os CSVs (ou só dos `anos`)."""
+    for ano, caminho in sorted(listar_csvs(pasta).items()):
+        if anos and ano not in anos:
+            continue
+        sep = detectar_separador(caminho)
+        for bloco in ler_csv_em_blocos(caminho, ano, sep, tamanho_bloco):
+            yield geocodificar_bairros(bloco)
+
+
+def cubo_parcial(bloco):
+    """Cubo de um bloco com bairro e tipo em texto (as categorias mudam de um bloco para outro)."""
+    cubo = construir_cubo(bloco).drop(columns="chave_mes")
+    return cubo.astype({"bairro": object, "tipo": object})
+
+
+def compactar(partes):
+    """Soma cubos parciais célula a célula."""
+    return (
+        pd.concat(partes, ignore_index=True)
+        .groupby(DIMENSOES, dropna=False, sort=False)[MEDIDAS]
+        .sum()
+        .reset_index()
+    )
+
+
+def compactar_bairros(partes):
+    tabela = pd.concat(partes, ignore_index=True).groupby("bairro", sort=True).agg(
+        total_ocorrencias=("total_ocorrencias", "sum"),
+        vitimas=("vitimas", "sum"),
+        vitimasfatais=("vitimasfatais", "sum"),
+        Latitude=("Latitude", "first"),
+        Longitude=("Longitude", "first"),
+    )
+    return tabela.reset_index()
+
+
+def finalizar_cubo(cubo):
+    """Tipos, ordem e chave_mes no mesmo formato de cubo.construir_cubo."""
+    cubo = cubo.astype({
+        "ano": np.int16, "mes": np.int8, "dia_semana": np.int8, "hora": np.int8,
+        "bairro": "category", "tipo": "category",
+        "ocorrencias": np.int32, "vitimas": np.int32, "vitimasfatais": np.int32,
+    })
+    cubo = cubo.sort_values(DIMENSOES, kind="stable", na_position="last").reset_index(drop=True)
+    cubo["chave_mes"] = chave_mes(cubo["ano"], cubo["mes"])
+    return cubo
+
+
+def agregar_em_fluxo(pasta, anos=None, tamanho_bloco=TAMANHO_BLOCO, pontos_criticos=False):
+    """
+    Agregações dos CSVs lidas bloco a bloco.
+
+    Retorna {"cubo", "totais", "por_bairro", "por_hora", "linhas", "periodo",
+    "contagens_locais"} ({"ruas": Series, "cruzamentos": Series} no formato
+    de contar_locais) e, com `pontos_criticos`, "pontos_criticos" (armazém de
+    resumos de ruas e cruzamentos no formato de construir_pontos_criticos).
+    """
+    acumulado, pendentes, linhas_pendentes = None, [], 0
+    bairros = []
+    armazem = None
+    contagens = {tipo_local: Counter() for tipo_local in TIPOS_LOCAL}
+    linhas = 0
+    inicio = fim = None
+    for bloco in blocos(pasta, anos, tamanho_bloco):
+        linhas += len(bloco)
+        inicio = bloco["data"].min() if inicio is None else min(inicio, bloco["data"].min())
+        fim = bloco["data"].max() if fim is None else max(fim, bloco["data"].max())
+
+        pendentes.append(cubo_parcial(bloco))
+        linhas_pendentes += len(pendentes[-1])
+        if linhas_pendentes > LIMITE_PENDENTES:
+            acumulado = compactar(([acumulado] if acumulado is not None else []) + pendentes)
+            pendentes, linhas_pendentes = [], 0
+
+        bairros = [compactar_bairros(bairros + [tabela_bairros(bloco)])]
+        for tipo_local, contador in contagens.items():
+            contagens_bloco = contar_locais(bloco, tipo_local)
+            contador.update(dict(zip(contagens_bloco.index, contagens_bloco.to_numpy().tolist())))
+        if pontos_criticos:
+            parcial = construir_pontos_criticos(bloco)
+            armazem = parcial if armazem is None else mesclar_armazens([armazem, parcial])
+
+    partes = ([acumulado] if acumulado is not None else []) + pendentes
+    if not partes:
+        raise ValueError(f"Nenhum arquivo acidentes*.csv encontrado em {pasta}")
+    cubo = finalizar_cubo(compactar(partes))
+    resultado = {
+        "cubo": cubo,
+        "totais": totais(cubo),
+        "por_bairro": bairros[0],
+        "por_hora": cubo.groupby("hora")[MEDIDAS].sum().reset_index(),
+        "linhas": linhas,
+        "periodo": (inicio, fim),
+        "contagens_locais": {
+            tipo_local: pd.Series(dict(contador), dtype=np.int64) for tipo_local, contador in contagens.items()
+        },
+    }
+    if pontos_criticos:
+        resultado["pontos_criticos"] = armazem
+    return resultado
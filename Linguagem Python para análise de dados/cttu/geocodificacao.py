@@ -0,0 +1,88 @@
+"""
+Geocodificação de bairros do Recife.
+
+As coordenadas vêm de um gazetteer externo (gazetteer_recife.csv, ao lado dos
+dados), com o centróide aproximado de cada um dos 94 bairros oficiais e as
+grafias alternativas encontradas nos arquivos da CTTU. A normalização de
+nomes (acentos, caixa e espaços) é feita uma vez por categoria distinta, e as
+coordenadas são ligadas às linhas pelos códigos da coluna categórica: o custo
+depende do número de bairros distintos, não do número de acidentes.
+"""
+
+import os
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+CAMINHO_GAZETTEER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gazetteer_recife.csv"
+)
+
+
+def normalizar_nome(texto):
+    """Chave de comparação: sem acentos, em caixa alta e com espaços simples."""
+    if texto is None or (isinstance(texto, float) and np.isnan(texto)):
+        return ""
+    sem_acentos = unicodedata.normalize("NFKD", str(texto))
+    sem_acentos = "".join(c for c in sem_acentos if not unicodedata.combining(c))
+    return " ".join(sem_acentos.upper().split())
+
+
+@lru_cache(maxsize=None)
+def carregar_gazetteer(caminho=CAMINHO_GAZETTEER):
+    """
+    Gazetteer indexado pela chave normalizada.
+
+    Colunas: nome (grafia oficial, já resolvendo os apelidos), tipo
+    (hoje apenas "bairro"), latitude e longitude.
+    """
+    gazetteer = pd.read_csv(caminho, sep=";", dtype={"nome": str, "nome_oficial": str, "tipo": str})
+    gazetteer["chave"] = [normalizar_nome(nome) for nome in gazetteer["nome"]]
+    gazetteer["nome"] = gazetteer["nome_oficial"].fillna(gazetteer["nome"])
+    return gazetteer.drop(columns="nome_oficial").drop_duplicates(["tipo", "chave"]).set_index(["tipo", "chave"])
+
+
+def consultar_categorias(categorias, tipo="bairro", gazetteer=None):
+    """Nome oficial, latitude e longitude para cada categoria (NaN quando não encontrada)."""
+    gazetteer = carregar_gazetteer() if gazetteer is None else gazetteer
+    tabela = gazetteer.xs(tipo, level="tipo")
+    chaves = [normalizar_nome(categoria) for categoria in categorias]
+    encontrados = tabela.reindex(chaves)
+    nomes = encontrados["nome"].to_numpy(dtype=object)
+    # Categorias fora do gazetteer mantêm o nome normalizado
+    nomes = np.where(pd.isna(nomes), np.asarray(chaves, dtype=object), nomes)
+    return nomes, encontrados["latitude"].to_numpy(dtype=float), encontrados["longitude"].to_numpy(dtype=float)
+
+
+def geocodificar(serie, tipo="bairro", gazetteer=None):
+    """
+    Retorna (nomes_padronizados, latitude, longitude) para uma coluna de nomes.
+
+    `nomes_padronizados` é categórico: grafias diferentes do mesmo local (com e
+    sem acento, apelidos do gazetteer) viram uma única categoria.
+    """
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype("category")
+    nomes, lat, lon = consultar_categorias(serie.cat.categories, tipo, gazetteer)
+
+    # Junção pelos códigos: posição -1 (valor ausente) aponta para o sentinela NaN no fim dos vetores
+    codigos = serie.cat.codes.to_numpy()
+    latitude = np.append(lat, np.nan)[codigos]
+    longitude = np.append(lon, np.nan)[codigos]
+
+    unicos, novos_codigos = np.unique(nomes.astype(str), return_inverse=True)
+    codigos_padrao = np.where(codigos >= 0, np.append(novos_codigos, -1)[codigos], -1)
+    padronizados = pd.Categorical.from_codes(codigos_padrao, categories=unicos)
+    return (
+        pd.Series(padronizados, index=serie.index, name=serie.name),
+        pd.Series(latitude, index=serie.index, name="Latitude"),
+        pd.Series(longitude, index=serie.index, name="Longitude"),
+    )
+
+
+def geocodificar_bairros(dados, gazetteer=None):
+    """Padroniza a coluna bairro e acrescenta Latitude e Longitude ao DataFrame."""
+    bairro, latitude, longitude = geocodificar(dados["bairro"], "bairro", gazetteer)
+    return dados.assign(bairro=bairro, Latitude=latitude, Longitude=longitude)
@@ -0,0 +1,79 @@
+"""
+Visualização do grafo de rotas (plotly, desenhada no navegador).
+
+O layout não é mais recalculado a cada execução: as posições dos bairros são
+as próprias coordenadas do gazetteer (projeção equirretangular), e a figura
+base, com todas as arestas, nós e pesos, é montada uma única vez por
+impressão digital do motor de rotas e guardada como dicionário. Cada consulta
+apenas junta o traço da rota destacada aos traços da figura base, sem
+revalidar nem recalcular o restante.
+"""
+
+import numpy as np
+import plotly.graph_objects as go
+
+from .rotas import arestas
+
+# Figuras base já montadas neste processo, pela impressão digital do motor (uma por motor de
+# rotas, isto é, por versão dos dados completos)
+FIGURAS = {}
+
+
+def posicoes(motor):
+    """Posições (x, y) dos bairros: longitude corrigida pela latitude média e latitude."""
+    if "layout" not in motor:
+        latitude = np.asarray(motor["latitude"], dtype=float)
+        longitude = np.asarray(motor["longitude"], dtype=float)
+        x = longitude * np.cos(np.radians(np.nanmean(latitude)))
+        motor["layout"] = np.column_stack([x, latitude])
+    return motor["layout"]
+
+
+def figura_base(motor):
+    """Figura (dicionário plotly) com todas as arestas, o peso no meio de cada uma e os bairros coloridos pelo risco."""
+    impressao = motor.get("impressao")
+    if impressao in FIGURAS:
+        return FIGURAS[impressao]
+    xy = posicoes(motor)
+    indice = motor["posicao"]
+    lista = arestas(motor)
+
+    linhas_x, linhas_y, meio_x, meio_y, pesos = [], [], [], [], []
+    for a, b, peso in lista:
+        (xa, ya), (xb, yb) = xy[indice[a]], xy[indice[b]]
+        linhas_x += [xa, xb, None]
+        linhas_y += [ya, yb, None]
+        meio_x.append((xa + xb) / 2)
+        meio_y.append((ya + yb) / 2)
+        pesos.append(f"{a} - {b}: {peso:.1f}")
+
+    figura = go.Figure()
+    figura.add_trace(go.Scatter(x=linhas_x, y=linhas_y, mode="lines", hoverinfo="skip",
+                                line=dict(color="#BFBFBF", width=1), name="Vizinhança"))
+    figura.add_trace(go.Scatter(x=meio_x, y=meio_y, mode="markers", hovertext=pesos, hoverinfo="text",
+                                marker=dict(size=4, color="#BFBFBF", opacity=0), showlegend=False))
+    figura.add_trace(go.Scatter(
+        x=xy[:, 0], y=xy[:, 1], mode="markers+text", text=[str(b) for b in motor["bairros"]],
+        textposition="top center", textfont=dict(size=8), hoverinfo="text",
+        hovertext=[f"{b}<br>risco {r:.2f}" for b, r in zip(motor["bairros"], motor["risco"])],
+        marker=dict(size=10, color=motor["risco"], colorscale="Reds", showscale=True,
+                    colorbar=dict(title="Risco")),
+        name="Bairros",
+    ))
+    figura.update_layout(height=800, showlegend=False, hovermode="closest",
+                         margin=dict(l=0, r=0, t=20, b=0),
+                         xaxis=dict(visible=False), yaxis=dict(visible=False, scaleanchor="x"))
+    FIGURAS[impressao] = figura.to_plotly_json()
+    return FIGURAS[impressao]
+
+
+def figura_rota(motor, caminho):
+    """Figura base (dicionário plotly) com o caminho (lista de bairros) destacado."""
+    base = figura_base(motor)
+    if not caminho:
+        return base
+    xy = posicoes(motor)[[motor["posicao"][b] for b in caminho]]
+    destaque = go.Scatter(x=xy[:, 0], y=xy[:, 1], mode="lines+markers", hoverinfo="skip",
+                          line=dict(color="#0958D9", width=4),
+                          marker=dict(size=12, color="#0958D9"), name="Rota")
+    return {"data": base["data"] + [destaque.to_plotly_json()], "layout": base["layout"]}
@@ -0,0 +1,118 @@
+"""
+Matrizes dia da semana x hora (7 x 24) por bairro e por tipo de acidente.
+
+As matrizes saem do cubo (que já traz dia_semana e hora), sem voltar às
+linhas: para cada dimensão há um vetor numpy int32 de forma
+(categorias, 7, 24) por medida, montado com um único np.bincount. Linhas sem
+hora informada (hora = -1 no cubo) ficam fora das matrizes.
+
+Consultas como "qual o risco em Boa Viagem às 18h de sexta" são leituras
+diretas nesses vetores (risco_horario), e o gráfico de calor do dashboard
+soma as matrizes das categorias escolhidas.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .cubo import MEDIDAS
+
+DIAS_SEMANA = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+HORAS = 24
+DIMENSOES_MATRIZ = ["bairro", "tipo"]
+
+
+def matrizes_por(cubo, dimensao, medidas=MEDIDAS):
+    """{"categorias": Index, medida: int32 (categorias, 7, 24)} para uma dimensão do cubo."""
+    com_hora = cubo[cubo["hora"] >= 0]
+    coluna = com_hora[dimensao]
+    if not isinstance(coluna.dtype, pd.CategoricalDtype):
+        coluna = coluna.astype("category")
+    categorias = coluna.cat.categories
+    codigos = coluna.cat.codes.to_numpy()
+    validos = codigos >= 0
+    celula = (
+        codigos[validos].astype(np.int64) * 7 * HORAS
+        + com_hora["dia_semana"].to_numpy()[validos].astype(np.int64) * HORAS
+        + com_hora["hora"].to_numpy()[validos]
+    )
+    tamanho = len(categorias) * 7 * HORAS
+    matrizes = {"categorias": categorias}
+    for medida in medidas:
+        pesos = com_hora[medida].to_numpy()[validos]
+        soma = np.bincount(celula, weights=pesos, minlength=tamanho)
+        matrizes[medida] = soma.astype(np.int32).reshape(len(categorias), 7, HORAS)
+    return matrizes
+
+
+def matriz_total(cubo, medidas=MEDIDAS):
+    """Matrizes 7 x 24 de todas as linhas com hora, inclusive as sem bairro ou tipo."""
+    com_hora = cubo[cubo["hora"] >= 0]
+    celula = com_hora["dia_semana"].to_numpy().astype(np.int64) * HORAS + com_hora["hora"].to_numpy()
+    return {
+        medida: np.bincount(celula, weights=com_hora[medida].to_numpy(), minlength=7 * HORAS)
+        .astype(np.int32).reshape(7, HORAS)
+        for medida in medidas
+    }
+
+
+def construir_matrizes(cubo, medidas=MEDIDAS):
+    """Matrizes 7 x 24 de cada bairro e de cada tipo, mais o total: {"bairro", "tipo", "total"}."""
+    matrizes = {dimensao: matrizes_por(cubo, dimensao, medidas) for dimensao in DIMENSOES_MATRIZ}
+    matrizes["total"] = matriz_total(cubo, medidas)
+    return matrizes
+
+
+def matriz(matrizes, dimensao, valores=None, medida="ocorrencias"):
+    """Soma 7 x 24 das categorias `valores` de uma dimensão (sem `valores`, o total geral)."""
+    if not valores:
+        return matrizes["total"][medida]
+    por_dimensao = matrizes[dimensao]
+    posicoes = por_dimensao["categorias"].get_indexer(list(valores))
+    return por_dimensao[medida][posicoes[posicoes >= 0]].sum(axis=0)
+
+
+def risco_horario(matrizes, dimensao, valores, dia_semana, hora, medida="ocorrencias"):
+    """
+    Risco relativo de cada (categoria, dia_semana, hora): valor da célula
+    dividido pela média das 168 células da mesma categoria (1 = típico).
+    Aceita vetores; categorias desconhecidas ou sem ocorrências dão NaN.
+    """
+    por_dimensao = matrizes[dimensao]
+    dados = por_dimensao[medida]
+    posicoes = por_dimensao["categorias"].get_indexer(np.atleast_1d(np.asarray(valores, dtype=object)))
+    dia_semana = np.asarray(dia_semana)
+    hora = np.asarray(hora)
+    medias = dados.reshape(len(dados), -1).mean(axis=1)
+    seguras = np.maximum(posicoes, 0)
+    celula = dados[seguras, dia_semana, hora].astype(float)
+    media = medias[seguras]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        risco = np.where((posicoes >= 0) & (media > 0), celula / media, np.nan)
+    return risco
+
+
+def tabela_matriz(m):
+    """Matriz 7 x 24 como DataFrame (linhas = dias da semana, colunas = horas), pronta para px.imshow."""
+    return pd.DataFrame(m, index=DIAS_SEMANA, columns=range(HORAS))
+
+
+def salvar_matrizes(matrizes, caminho):
+    """Grava as matrizes em um .npz (categorias em texto, valores int32)."""
+    vetores = {f"total_{medida}": valores for medida, valores in matrizes["total"].items()}
+    for dimensao in DIMENSOES_MATRIZ:
+        for chave, valores in matrizes[dimensao].items():
+            if chave == "categorias":
+                valores = np.asarray(valores, dtype=str)
+            vetores[f"{dimensao}_{chave}"] = valores
+    np.savez_compressed(caminho, **vetores)
+
+
+def carregar_matrizes(caminho):
+    """Lê um .npz gravado por salvar_matrizes no mesmo formato de construir_matrizes."""
+    matrizes = {dimensao: {} for dimensao in DIMENSOES_MATRIZ + ["total"]}
+    with np.load(caminho, allow_pickle=False) as arquivo:
+        for nome in arquivo.files:
+            dimensao, chave = nome.split("_", 1)
+            valores = arquivo[nome]
+            matrizes[dimensao][chave] = pd.Index(valores) if chave == "categorias" else valores
+    return matrizes
@@ -0,0 +1,57 @@
+"""
+Pontos do mapa de calor agregados por localização.
+
+Em vez de enviar ao navegador um ponto por acidente (quase todos repetidos,
+pois a geocodificação é feita por bairro), as linhas são somadas por
+coordenada e o mapa recebe uma tripla [lat, lon, peso] por local. Quando os
+dados tiverem coordenadas reais, `tamanho_celula` agrupa os pontos em uma
+grade regular (células quadradas, em graus) no lugar das coordenadas exatas.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Opções de peso exibidas no dashboard -> coluna somada
+PESOS = {
+    "Ocorrências": "ocorrencias",
+    "Vítimas": "vitimas",
+    "Vítimas fatais": "vitimasfatais",
+}
+
+
+def celula_grade(lat, lon, tamanho_celula):
+    """Centro da célula da grade que contém cada coordenada."""
+    lat_celula = (np.floor(lat / tamanho_celula) + 0.5) * tamanho_celula
+    lon_celula = (np.floor(lon / tamanho_celula) + 0.5) * tamanho_celula
+    return lat_celula, lon_celula
+
+
+def pontos_calor(dados, peso="ocorrencias", tamanho_celula=None, normalizar=False):
+    """
+    Lista de triplas [lat, lon, peso] agregadas por local (ou por célula da grade).
+
+    `peso` é "ocorrencias" (contagem de linhas) ou uma coluna numérica, como
+    "vitimas" e "vitimasfatais". Locais com peso zero são descartados. Com
+    `normalizar`, os pesos são divididos pelo maior valor (escala 0-1 do HeatMap).
+    """
+    lat = dados["Latitude"].to_numpy(dtype=float)
+    lon = dados["Longitude"].to_numpy(dtype=float)
+    if peso == "ocorrencias":
+        valores = np.ones(len(dados))
+    else:
+        valores = dados[peso].to_numpy(dtype=float)
+    validos = ~(np.isnan(lat) | np.isnan(lon))
+    lat, lon, valores = lat[validos], lon[validos], valores[validos]
+    if tamanho_celula:
+        lat, lon = celula_grade(lat, lon, tamanho_celula)
+
+    agregados = (
+        pd.DataFrame({"lat": lat, "lon": lon, "peso": valores})
+        .groupby(["lat", "lon"], sort=False)["peso"]
+        .sum()
+        .reset_index()
+    )
+    agregados = agregados[agregados["peso"] > 0]
+    if normalizar and len(agregados):
+        agregados["peso"] = agregados["peso"] / agregados["peso"].max()
+    return agregados.to_numpy().tolist()
@@ -0,0 +1,137 @@
+"""
+Registro de modelos de risco por bairro.
+
+O classificador (RandomForest) que rotula cada bairro como "Segura",
+"Perigoso" ou "Muito Perigoso" é treinado uma única vez para cada conjunto de
+dados de treino: o arquivo fica em disco (joblib sem compressão, lido com
+mmap_mode="r") com o nome derivado da impressão digital de X e y, e é
+carregado uma vez por processo. O treino usa sempre a tabela de bairros dos
+dados completos (nunca a filtrada pelo dashboard), de modo que há um único
+modelo por versão dos CSVs e reexecuções do dashboard apenas o carregam.
+
+Reconstrução explícita (só treina se os CSVs tiverem mudado):
+
+    python -m cttu.modelos [--pasta PASTA] [--forcar] [--limpar]
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+
+from .cache import NOME_PASTA_CACHE, carregar_acidentes
+from .geocodificacao import geocodificar_bairros
+from .rotas import tabela_bairros
+
+PASTA_PADRAO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIMITES_RISCO = [0, 200, 500, float("inf")]
+CLASSES_RISCO = ["Segura", "Perigoso", "Muito Perigoso"]
+FEATURES = ["total_ocorrencias"]
+
+# Modelos já carregados neste processo, pela impressão digital
+MODELOS = {}
+
+
+def classificar_risco(tabela):
+    """Rótulo de risco de cada bairro a partir do total de ocorrências."""
+    return pd.cut(tabela["total_ocorrencias"], bins=LIMITES_RISCO, labels=CLASSES_RISCO)
+
+
+def dados_de_treino(tabela):
+    """Features (X) e rótulo (y) do classificador."""
+    return tabela[FEATURES], classificar_risco(tabela)
+
+
+def impressao_treino(X, y, n_estimators=100, random_state=42):
+    h = hashlib.sha1(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    h.update(np.asarray(y.astype(str)).astype("U").tobytes())
+    h.update(f"{n_estimators}|{random_state}".encode())
+    return h.hexdigest()[:16]
+
+
+def treinar_classificador(X, y, n_estimators=100, random_state=42):
+    """Treina o RandomForest com a mesma divisão treino/teste usada no dashboard."""
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=random_state)
+    modelo = RandomForestClassifier(n_estimators=n_estimators, random_state=random_state)
+    modelo.fit(X_train, y_train)
+    return modelo
+
+
+def caminho_modelo(pasta_cache, impressao):
+    return os.path.join(pasta_cache, f"risco_{impressao}.joblib")
+
+
+def carregar_classificador(tabela, pasta_cache=None, n_estimators=100, random_state=42):
+    """
+    Classificador de risco para a tabela de bairros: da memória, do disco ou
+    treinado e gravado, nesta ordem.
+    """
+    X, y = dados_de_treino(tabela)
+    impressao = impressao_treino(X, y, n_estimators, random_state)
+    if impressao in MODELOS:
+        return MODELOS[impressao]
+    caminho = None
+    if pasta_cache:
+        os.makedirs(pasta_cache, exist_ok=True)
+        caminho = caminho_modelo(pasta_cache, impressao)
+    if caminho and os.path.exists(caminho):
+        modelo = joblib.load(caminho, mmap_mode="r")
+    else:
+        modelo = treinar_classificador(X, y, n_estimators, random_state)
+        if caminho:
+            temporario = caminho + ".tmp"
+            joblib.dump(modelo, temporario)
+            os.replace(temporario, caminho)
+    MODELOS[impressao] = modelo
+    return modelo
+
+
+def reconstruir(pasta=PASTA_PADRAO, pasta_cache=None, forcar=False):
+    """
+    Atualiza o cache Parquet e o classificador dos dados completos.
+
+    O modelo só é treinado se não houver arquivo para a impressão digital
+    atual (isto é, se os CSVs mudaram) ou com `forcar`. Retorna o caminho do
+    arquivo e se houve treino.
+    """
+    pasta_cache = pasta_cache or os.path.join(pasta, NOME_PASTA_CACHE)
+    tabela = tabela_bairros(geocodificar_bairros(carregar_acidentes(pasta, pasta_cache)))
+    X, y = dados_de_treino(tabela)
+    caminho = caminho_modelo(pasta_cache, impressao_treino(X, y))
+    treinado = forcar or not os.path.exists(caminho)
+    if treinado:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        MODELOS.clear()
+        carregar_classificador(tabela, pasta_cache)
+    return caminho, treinado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstrói o classificador de risco por bairro.")
+    parser.add_argument("--pasta", default=PASTA_PADRAO, help="pasta com os arquivos acidentes*.csv")
+    parser.add_argument("--pasta-cache", default=None, help=f"pasta do cache (padrão: <pasta>/{NOME_PASTA_CACHE})")
+    parser.add_argument("--forcar", action="store_true", help="treina novamente mesmo sem mudança nos dados")
+    parser.add_argument("--limpar", action="store_true", help="remove modelos de versões anteriores dos dados")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    caminho, treinado = reconstruir(args.pasta, args.pasta_cache, args.forcar)
+    situacao = "treinado" if treinado else "já atualizado"
+    print(f"{os.path.basename(caminho)}: {situacao} ({time.perf_counter() - inicio:.1f}s)")
+    if args.limpar:
+        for antigo in glob.glob(os.path.join(os.path.dirname(caminho), "risco_*.joblib")):
+            if antigo != caminho:
+                os.remove(antigo)
+                print(f"removido {os.path.basename(antigo)}")
+
+
+if __name__ == "__main__":
+    main()
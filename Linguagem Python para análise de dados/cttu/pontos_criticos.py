@@ -0,0 +1,259 @@
+"""
+Ruas e cruzamentos com mais ocorrências (pontos críticos).
+
+Em vez de agrupar os ~65 mil endereços em texto livre a cada filtro, cada
+partição (mês, tipo de acidente) guarda um resumo de tamanho fixo:
+
+- SpaceSaving com até CAPACIDADE locais: contagem (limite superior) e erro
+  de cada local monitorado, mais o `minimo`, limite para qualquer local fora
+  do resumo. Partições com poucos locais distintos ficam exatas (minimo 0);
+- Count-Min (PROFUNDIDADE x LARGURA), gravado apenas nas partições que
+  excederam a capacidade, usado para apertar a estimativa dos candidatos.
+
+Os dois resumos são mescláveis: a consulta de um intervalo soma as partições
+dos meses completos (como o cubo, os meses de borda são resumidos na hora a
+partir das linhas filtradas, de forma exata). Os endereços já chegam
+normalizados do carregamento (esquema.normalizar_enderecos).
+
+As contagens do ranking são aproximadas: quando alguma partição excede a
+capacidade, a mescla devolve limites superiores, e um local pode aparecer
+com algumas ocorrências a mais que o valor exato (no máximo `erro_maximo`).
+Quem precisa de contagens exatas do período inteiro (o relatório em lote)
+usa contar_locais / top_locais.
+"""
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from .cubo import chave_mes, meses_completos
+
+CAPACIDADE = 200
+PROFUNDIDADE = 4
+LARGURA = 512
+PRIMO = (1 << 31) - 1
+
+# Coeficientes fixos do hash universal de cada linha do Count-Min
+_gerador = np.random.default_rng(2024)
+COEF_A = _gerador.integers(1, PRIMO, size=PROFUNDIDADE, dtype=np.int64)
+COEF_B = _gerador.integers(0, PRIMO, size=PROFUNDIDADE, dtype=np.int64)
+
+# Tipos de ponto crítico -> rótulo exibido
+TIPOS_LOCAL = {"ruas": "Rua", "cruzamentos": "Cruzamento"}
+
+
+def cruzamentos(endereco, endereco_cruzamento):
+    """Chave "RUA A X RUA B" (em ordem alfabética) quando as duas vias existem e são diferentes."""
+    a = endereco.astype(object).to_numpy()
+    b = endereco_cruzamento.astype(object).to_numpy()
+    validos = pd.notna(a) & pd.notna(b)
+    validos[validos] = a[validos] != b[validos]
+    chave = np.full(len(a), None, dtype=object)
+    chave[validos] = [" X ".join(sorted(par)) for par in zip(a[validos], b[validos])]
+    return pd.Series(chave, index=endereco.index, dtype="str")
+
+
+def locais(dados, tipo_local):
+    """Coluna de locais de cada linha para o tipo de ponto crítico ("ruas" ou "cruzamentos")."""
+    if tipo_local == "ruas":
+        return dados["endereco"]
+    return cruzamentos(dados["endereco"], dados["endereco_cruzamento"])
+
+
+def posicoes_cm(itens):
+    """Colunas do Count-Min (PROFUNDIDADE x n) de cada item."""
+    h = np.array([zlib.crc32(str(item).encode()) for item in itens], dtype=np.int64)
+    return (COEF_A[:, None] * h[None, :] + COEF_B[:, None]) % PRIMO % LARGURA
+
+
+def adicionar_cm(cm, itens, contagens):
+    np.add.at(cm, (np.arange(PROFUNDIDADE)[:, None], posicoes_cm(itens)), np.asarray(contagens)[None, :])
+    return cm
+
+
+def estimar_cm(cm, itens):
+    return cm[np.arange(PROFUNDIDADE)[:, None], posicoes_cm(itens)].min(axis=0)
+
+
+def construir_sketch(itens, contagens, capacidade=CAPACIDADE):
+    """
+    Resumo de uma partição a partir das contagens exatas dos seus locais.
+
+    Se houver mais locais que a capacidade, ficam os mais frequentes; o
+    maior valor descartado vira o `minimo` e a partição ganha um Count-Min.
+    """
+    itens = np.asarray(itens, dtype=object)
+    contagens = np.asarray(contagens, dtype=np.int64)
+    ordem = np.argsort(-contagens, kind="stable")
+    itens, contagens = itens[ordem], contagens[ordem]
+    cm = None
+    minimo = 0
+    if len(itens) > capacidade:
+        cm = adicionar_cm(np.zeros((PROFUNDIDADE, LARGURA), dtype=np.int32), itens, contagens)
+        minimo = int(contagens[capacidade])
+        itens, contagens = itens[:capacidade], contagens[:capacidade]
+    return {
+        "itens": itens,
+        "contagens": contagens,
+        "erros": np.zeros(len(itens), dtype=np.int64),
+        "minimo": minimo,
+        "cm": cm,
+    }
+
+
+def mesclar(sketches, capacidade=CAPACIDADE):
+    """
+    Mescla vários resumos em um (SpaceSaving mesclável + soma dos Count-Min).
+
+    Um local ausente de uma partição conta o `minimo` dela como limite
+    superior; somando, contagem = sum(contagem_i - minimo_i) + sum(minimo_i)
+    sobre as partições onde o local aparece e todas as partições.
+    """
+    sketches = list(sketches)
+    if not sketches:
+        return construir_sketch([], [], capacidade)
+    minimo_total = sum(s["minimo"] for s in sketches)
+    partes = pd.DataFrame({
+        "item": np.concatenate([s["itens"] for s in sketches]),
+        "contagem": np.concatenate([s["contagens"] - s["minimo"] for s in sketches]),
+        "erro": np.concatenate([s["erros"] - s["minimo"] for s in sketches]),
+    })
+    soma = partes.groupby("item", sort=False)[["contagem", "erro"]].sum() + minimo_total
+    soma = soma.sort_values("contagem", ascending=False, kind="stable")
+
+    # Partições exatas entram no Count-Min pelos seus próprios itens
+    cm = None
+    if minimo_total > 0:
+        cm = sum(s["cm"].astype(np.int64) for s in sketches if s["cm"] is not None)
+        exatos = [s for s in sketches if s["cm"] is None and len(s["itens"])]
+        if exatos:
+            adicionar_cm(
+                cm,
+                np.concatenate([s["itens"] for s in exatos]),
+                np.concatenate([s["contagens"] for s in exatos]),
+            )
+    minimo = minimo_total
+    if len(soma) > capacidade:
+        if cm is None:
+            # Até aqui a soma é exata: o Count-Min guarda os locais que vão ser descartados
+            cm = adicionar_cm(np.zeros((PROFUNDIDADE, LARGURA), dtype=np.int64), soma.index, soma["contagem"])
+        minimo = max(minimo, int(soma["contagem"].iloc[capacidade]))
+        soma = soma.iloc[:capacidade]
+    return {
+        "itens": soma.index.to_numpy(dtype=object),
+        "contagens": soma["contagem"].to_numpy(),
+        "erros": soma["erro"].to_numpy(),
+        "minimo": minimo,
+        "cm": cm,
+    }
+
+
+def construir_pontos_criticos(dados, capacidade=CAPACIDADE):
+    """
+    Resumos por partição (mês, tipo) para ruas e cruzamentos.
+
+    Retorna {"particoes": DataFrame(chave_mes, tipo) ordenado por mês,
+    "ruas": [resumos], "cruzamentos": [resumos]} na mesma ordem das partições.
+    """
+    base = pd.DataFrame({
+        "chave_mes": chave_mes(dados["data"].dt.year.fillna(0), dados["data"].dt.month.fillna(1)),
+        "tipo": dados["tipo"],
+    }, index=dados.index)
+    particoes = base.drop_duplicates().sort_values("chave_mes", kind="stable").reset_index(drop=True)
+    posicao = {(chave, tipo): i for i, (chave, tipo) in enumerate(zip(particoes["chave_mes"], particoes["tipo"]))}
+
+    armazem = {"particoes": particoes}
+    for tipo_local in TIPOS_LOCAL:
+        resumos = [construir_sketch([], [], capacidade) for _ in range(len(particoes))]
+        contagens = (
+            base.assign(item=locais(dados, tipo_local))
+            .dropna(subset=["item"])
+            .groupby(["chave_mes", "tipo", "item"], observed=True, dropna=False, sort=False)
+            .size()
+        )
+        for (chave, tipo), grupo in contagens.groupby(level=["chave_mes", "tipo"], observed=True, dropna=False, sort=False):
+            resumos[posicao[(chave, tipo)]] = construir_sketch(
+                grupo.index.get_level_values("item"), grupo.to_numpy(), capacidade
+            )
+        armazem[tipo_local] = resumos
+    return armazem
+
+
+def mesclar_armazens(armazens, capacidade=CAPACIDADE):
+    """Une armazéns de pedaços diferentes dos dados (ex.: blocos de linhas), mesclando partições repetidas."""
+    grupos = {}
+    for armazem in armazens:
+        particoes = armazem["particoes"]
+        for i, (chave, tipo) in enumerate(zip(particoes["chave_mes"], particoes["tipo"])):
+            grupos.setdefault((int(chave), None if pd.isna(tipo) else tipo), []).append((armazem, i))
+    ordem = sorted(grupos, key=lambda particao: particao[0])
+    unido = {"particoes": pd.DataFrame({
+        "chave_mes": np.array([chave for chave, _ in ordem], dtype=np.int32),
+        "tipo": pd.Categorical([tipo for _, tipo in ordem]),
+    })}
+    for tipo_local in TIPOS_LOCAL:
+        resumos = []
+        for particao in ordem:
+            partes = [armazem[tipo_local][i] for armazem, i in grupos[particao]]
+            resumos.append(partes[0] if len(partes) == 1 else mesclar(partes, capacidade))
+        unido[tipo_local] = resumos
+    return unido
+
+
+def contar_locais(dados, tipo_local):
+    """Contagem exata por local (índice em texto, sem ausentes); somável entre blocos de linhas (cttu.fluxo)."""
+    contagens = locais(dados, tipo_local).value_counts()
+    contagens = contagens[contagens > 0]
+    contagens.index = contagens.index.astype(object)
+    return contagens.astype(np.int64)
+
+
+def top_locais(contagens, n=10):
+    """Top n de contagens exatas, no mesmo formato de ranking (erro_maximo sempre 0)."""
+    tabela = pd.DataFrame({"local": contagens.index.astype(str), "ocorrencias": contagens.to_numpy()})
+    tabela = tabela.sort_values(["ocorrencias", "local"], ascending=[False, True], kind="stable").head(n)
+    tabela["erro_maximo"] = np.zeros(len(tabela), dtype=np.int64)
+    return tabela.reset_index(drop=True)
+
+
+def resumo_exato(linhas, tipo_local, capacidade=CAPACIDADE):
+    contagens = locais(linhas, tipo_local).value_counts()
+    return construir_sketch(contagens.index, contagens.to_numpy(), capacidade)
+
+
+def ranking(armazem, tipo_local, inicio, fim, tipos=None, linhas=None, n=10):
+    """
+    Top n locais ("ruas" ou "cruzamentos") no intervalo e tipos escolhidos.
+
+    Segue a mesma regra do cubo (fatiar): meses completos vêm dos resumos e
+    os meses de borda são contados a partir de `linhas` (já filtradas).
+    `ocorrencias` é a estimativa (limite superior) e `erro_maximo` a
+    diferença para o limite inferior garantido.
+    """
+    primeiro, ultimo = meses_completos(inicio, fim)
+    particoes = armazem["particoes"]
+    chaves = particoes["chave_mes"].to_numpy()
+    a, b = np.searchsorted(chaves, primeiro), np.searchsorted(chaves, ultimo, side="right")
+    selecionadas = np.arange(a, b)
+    if tipos:
+        selecionadas = selecionadas[particoes["tipo"].iloc[a:b].isin(tipos).to_numpy()]
+    resumos = [armazem[tipo_local][i] for i in selecionadas]
+
+    if linhas is not None and len(linhas):
+        chaves_linhas = chave_mes(linhas["data"].dt.year, linhas["data"].dt.month)
+        borda = linhas[(chaves_linhas < primeiro) | (chaves_linhas > ultimo)]
+        if len(borda):
+            resumos.append(resumo_exato(borda, tipo_local))
+
+    resumo = mesclar(resumos, capacidade=max(CAPACIDADE, n))
+    ocorrencias = resumo["contagens"]
+    if resumo["cm"] is not None and len(ocorrencias):
+        ocorrencias = np.minimum(ocorrencias, estimar_cm(resumo["cm"], resumo["itens"]))
+    tabela = pd.DataFrame({
+        "local": resumo["itens"],
+        "ocorrencias": ocorrencias,
+        "erro_maximo": ocorrencias - (resumo["contagens"] - resumo["erros"]),
+    })
+    tabela = tabela.sort_values("ocorrencias", ascending=False, kind="stable").head(n)
+    return tabela.reset_index(drop=True)
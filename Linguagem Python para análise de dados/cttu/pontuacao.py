@@ -0,0 +1,270 @@
+"""
+Pontuação de risco de viagens em lote (origem, destino, hora, dia da semana).
+
+Cada viagem recebe a rota de menor custo do motor de rotas (cttu.rotas) e um
+fator horário: a média, nos bairros do caminho, do risco relativo daquele dia
+da semana e hora (cttu.horarios; 1 = horário típico do bairro). O risco da
+viagem é custo_rota x fator_horario.
+
+Tudo é vetorizado: os caminhos são reconstruídos uma vez por par distinto de
+origem e destino e guardados numa matriz de índices (pares x comprimento,
+-1 como preenchimento); o fator horário de milhares de viagens é uma única
+indexação na tabela (bairros, 7, 24).
+
+Servidor HTTP local (biblioteca padrão) e medição de vazão:
+
+    python -m cttu.pontuacao --porta 8765
+    python -m cttu.pontuacao --medir 100000
+
+    POST /pontuar  {"viagens": [{"origem": "BOA VIAGEM", "destino": "PINA",
+                                 "hora": 18, "dia_semana": 4}, ...]}
+"""
+
+import argparse
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from .cache import NOME_PASTA_CACHE
+from .cubo import construir_cubo
+from .geocodificacao import normalizar_nome
+from .horarios import HORAS, construir_matrizes
+from .rotas import caminho_indices, carregar_motor_rotas, tabela_bairros
+
+PASTA_PADRAO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Suavização do risco horário: ocorrências somadas a cada célula e à média do bairro
+SUAVIZACAO = 1.0
+# Tamanho máximo do corpo de POST /pontuar (acima disso, 413)
+LIMITE_CORPO = 16 * 2**20
+
+
+def tabela_risco_horario(motor, matrizes, medida="ocorrencias", suavizacao=SUAVIZACAO):
+    """
+    Risco relativo (bairros do motor, 7, 24): (célula + s) / (média do bairro + s).
+
+    Bairros sem matriz ficam com risco 1 (neutro) em todos os horários.
+    """
+    por_bairro = matrizes["bairro"]
+    posicoes = por_bairro["categorias"].get_indexer(motor["bairros"])
+    tabela = np.ones((len(motor["bairros"]), 7, HORAS))
+    encontrados = posicoes >= 0
+    valores = por_bairro[medida][posicoes[encontrados]].astype(float)
+    medias = valores.reshape(len(valores), -1).mean(axis=1)[:, None, None]
+    tabela[encontrados] = (valores + suavizacao) / (medias + suavizacao)
+    return tabela
+
+
+def preparar_pontuador(motor, matrizes):
+    """Estruturas pré-calculadas para pontuar viagens com um motor de rotas."""
+    return {
+        "motor": motor,
+        "risco_horario": tabela_risco_horario(motor, matrizes),
+        "chaves": {normalizar_nome(nome): i for i, nome in enumerate(motor["bairros"])},
+        "caminhos": {},
+    }
+
+
+def indices_bairros(pontuador, nomes):
+    """Índice de cada nome no motor (-1 se desconhecido), comparando sem acento e caixa."""
+    codigos, unicos = pd.factorize(pd.Series(nomes, dtype=object))
+    indices = np.array([pontuador["chaves"].get(normalizar_nome(nome), -1) for nome in unicos] + [-1])
+    return indices[codigos]
+
+
+def matriz_caminhos(pontuador, origens, destinos):
+    """
+    Caminhos dos pares (origem, destino) distintos: (pares, comprimento) com
+    -1 no preenchimento, e o par de cada viagem.
+    """
+    n = len(pontuador["motor"]["bairros"])
+    pares, par_da_viagem = np.unique(origens.astype(np.int64) * n + destinos, return_inverse=True)
+    caminhos = []
+    for par in pares:
+        chave = int(par)
+        if chave not in pontuador["caminhos"]:
+            pontuador["caminhos"][chave] = caminho_indices(pontuador["motor"], chave // n, chave % n) or []
+        caminhos.append(pontuador["caminhos"][chave])
+    comprimento = max((len(c) for c in caminhos), default=0)
+    matriz = np.full((len(pares), max(comprimento, 1)), -1, dtype=np.int32)
+    for i, caminho in enumerate(caminhos):
+        matriz[i, :len(caminho)] = caminho
+    return matriz, par_da_viagem
+
+
+def inteiros_na_faixa(valores, limite):
+    """Valores inteiros em [0, limite) como int64; não numéricos, fracionários, infinitos ou fora da faixa viram -1."""
+    valores = np.asarray(valores)
+    if valores.dtype.kind in "biuf":
+        numeros = valores.astype(float)
+    else:
+        numeros = pd.to_numeric(pd.Series(valores, dtype=object), errors="coerce").to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        validos = np.isfinite(numeros) & (numeros == np.floor(numeros)) & (numeros >= 0) & (numeros < limite)
+    return np.where(validos, numeros, -1).astype(np.int64)
+
+
+def pontuar_viagens(pontuador, origens, destinos, horas, dias_semana, caminhos=True):
+    """
+    Risco de cada viagem. Retorna um DataFrame com custo_rota, fator_horario,
+    risco e (com `caminhos`) o caminho em texto. Bairros desconhecidos ou
+    hora/dia inválidos (fora da faixa, fracionários, não numéricos) dão risco
+    NaN; hora e dia_semana voltam como foram recebidos.
+    """
+    motor = pontuador["motor"]
+    horas_recebidas, dias_recebidos = np.asarray(horas), np.asarray(dias_semana)
+    horas = inteiros_na_faixa(horas_recebidas, HORAS)
+    dias_semana = inteiros_na_faixa(dias_recebidos, 7)
+    i = indices_bairros(pontuador, origens)
+    j = indices_bairros(pontuador, destinos)
+    validas = (i >= 0) & (j >= 0) & (horas >= 0) & (horas < HORAS) & (dias_semana >= 0) & (dias_semana < 7)
+
+    custo = np.full(len(i), np.nan)
+    fator = np.full(len(i), np.nan)
+    textos = np.full(len(i), None, dtype=object)
+    if validas.any():
+        iv, jv = i[validas], j[validas]
+        custo[validas] = motor["custo"][iv, jv]
+        matriz, par = matriz_caminhos(pontuador, iv, jv)
+        nos = matriz[par]
+        preenchidos = nos >= 0
+        riscos = pontuador["risco_horario"][
+            np.maximum(nos, 0), dias_semana[validas][:, None], horas[validas][:, None]
+        ]
+        with np.errstate(invalid="ignore"):
+            fator[validas] = np.where(preenchidos, riscos, 0).sum(axis=1) / preenchidos.sum(axis=1)
+        if caminhos:
+            bairros = motor["bairros"]
+            por_par = np.array(
+                [" -> ".join(bairros[linha[linha >= 0]]) or None for linha in matriz], dtype=object
+            )
+            textos[validas] = por_par[par]
+
+    resultado = pd.DataFrame({
+        "origem": origens,
+        "destino": destinos,
+        "hora": horas_recebidas,
+        "dia_semana": dias_recebidos,
+        "custo_rota": custo,
+        "fator_horario": fator,
+        "risco": custo * fator,
+    })
+    if caminhos:
+        resultado["caminho"] = textos
+    return resultado
+
+
+def carregar_pontuador(pasta=PASTA_PADRAO, pasta_cache=None):
+    """Pontuador com os dados completos (mesmo fluxo do dashboard e do relatório)."""
+    from .relatorio import carregar_dados
+
+    pasta_cache = pasta_cache or os.path.join(pasta, NOME_PASTA_CACHE)
+    dados = carregar_dados(pasta, pasta_cache=pasta_cache)
+    motor = carregar_motor_rotas(tabela_bairros(dados), pasta_cache)
+    return preparar_pontuador(motor, construir_matrizes(construir_cubo(dados)))
+
+
+def viagens_de_json(corpo):
+    """Aceita {"viagens": [{...}, ...]} ou colunas {"origem": [...], "destino": [...], ...}."""
+    if "viagens" in corpo:
+        tabela = pd.DataFrame(corpo["viagens"], columns=["origem", "destino", "hora", "dia_semana"])
+    else:
+        tabela = pd.DataFrame({coluna: corpo[coluna] for coluna in ["origem", "destino", "hora", "dia_semana"]})
+    return tabela
+
+
+def criar_servidor(pontuador, host="127.0.0.1", porta=8765):
+    """Servidor HTTP com POST /pontuar e GET /saude."""
+
+    class Manipulador(BaseHTTPRequestHandler):
+        def responder(self, status, conteudo):
+            corpo = json.dumps(conteudo, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            if self.path == "/saude":
+                self.responder(200, {"status": "ok", "bairros": len(pontuador["motor"]["bairros"])})
+            else:
+                self.responder(404, {"erro": "rota inexistente"})
+
+        def do_POST(self):
+            if self.path != "/pontuar":
+                self.responder(404, {"erro": "rota inexistente"})
+                return
+            try:
+                tamanho = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                tamanho = -1
+            if tamanho < 0:
+                self.responder(400, {"erro": "Content-Length inválido"})
+                return
+            if tamanho > LIMITE_CORPO:
+                self.responder(413, {"erro": f"corpo maior que {LIMITE_CORPO} bytes"})
+                return
+            try:
+                viagens = viagens_de_json(json.loads(self.rfile.read(tamanho)))
+                # A pontuação também fica no try: origem/destino não escalares (objetos, listas) são erro do cliente.
+                # Horas e dias inválidos não são convertidos aqui: voltam como enviados, com risco nulo
+                inicio = time.perf_counter()
+                resultado = pontuar_viagens(pontuador, viagens["origem"].to_numpy(), viagens["destino"].to_numpy(),
+                                            viagens["hora"].to_numpy(), viagens["dia_semana"].to_numpy())
+                duracao = time.perf_counter() - inicio
+            except (ValueError, KeyError, TypeError) as erro:
+                self.responder(400, {"erro": f"requisição inválida: {erro}"})
+                return
+            resultado = resultado.astype(object).where(resultado.notna(), None)
+            self.responder(200, {
+                "viagens": resultado.to_dict(orient="records"),
+                "segundos": round(duracao, 6),
+                "viagens_por_segundo": round(len(resultado) / duracao) if duracao > 0 else None,
+            })
+
+        def log_message(self, formato, *args):
+            pass
+
+    return ThreadingHTTPServer((host, porta), Manipulador)
+
+
+def medir_vazao(pontuador, n=100_000, semente=42):
+    """Pontua n viagens aleatórias e devolve (viagens por segundo, resultado)."""
+    gerador = np.random.default_rng(semente)
+    bairros = pontuador["motor"]["bairros"]
+    origens = bairros[gerador.integers(0, len(bairros), n)]
+    destinos = bairros[gerador.integers(0, len(bairros), n)]
+    inicio = time.perf_counter()
+    resultado = pontuar_viagens(pontuador, origens, destinos, gerador.integers(0, HORAS, n), gerador.integers(0, 7, n))
+    return n / (time.perf_counter() - inicio), resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pontuação de risco de viagens em lote.")
+    parser.add_argument("--pasta", default=PASTA_PADRAO, help="pasta com os arquivos acidentes*.csv")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--medir", type=int, default=0, metavar="N", help="só mede a vazão com N viagens aleatórias")
+    args = parser.parse_args(argv)
+
+    pontuador = carregar_pontuador(args.pasta)
+    if args.medir:
+        vazao, _ = medir_vazao(pontuador, args.medir)
+        print(f"{args.medir} viagens: {vazao:,.0f} viagens/s")
+        return
+    servidor = criar_servidor(pontuador, args.host, args.porta)
+    print(f"Servindo em http://{args.host}:{args.porta} (POST /pontuar, GET /saude)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
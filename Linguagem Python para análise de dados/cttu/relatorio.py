@@ -0,0 +1,194 @@
+"""
+Relatório em lote (sem Streamlit) dos dados de acidentes da CTTU.
+
+Executa o mesmo fluxo do dashboard (carregamento -> geocodificação -> cubo)
+e grava todas as agregações de uma vez: as tabelas em Parquet (e, se
+pedido, em JSON) e um resumo.json com os totais e a assinatura dos CSVs de
+origem, além das matrizes dia da semana x hora (cttu.horarios) em .npz.
+Todas as tabelas saem do cubo, agregado numa única passada sobre as linhas;
+só as contagens (exatas) de ruas e cruzamentos e as coordenadas por bairro
+usam as linhas.
+
+Uso (por exemplo, em um cron noturno):
+
+    python -m cttu.relatorio --anos 2016-2024 --saida relatorio/ [--json] [--fluxo]
+
+O dashboard lê o cubo pré-calculado (carregar_cubo_relatorio) quando o
+relatório cobre todos os anos e a assinatura dos CSVs ainda é a mesma.
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .cache import NOME_PASTA_CACHE, assinatura_csvs, carregar_tabela, listar_csvs
+from .cubo import DIMENSOES, MEDIDAS, chave_mes, construir_cubo, top_bairros, totais
+from .filtros import ordenar_por_data
+from .fluxo import TAMANHO_BLOCO, agregar_em_fluxo
+from .geocodificacao import geocodificar_bairros
+from .horarios import construir_matrizes, salvar_matrizes
+from .pontos_criticos import TIPOS_LOCAL, contar_locais, top_locais
+from .rotas import tabela_bairros
+
+PASTA_PADRAO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NOME_PASTA_RELATORIO = "relatorio_cttu"
+NOME_RESUMO = "resumo.json"
+NOME_MATRIZES = "matrizes_semana_hora.npz"
+TOP_LOCAIS = 50
+
+
+def interpretar_anos(texto):
+    """ "2016-2024" ou "2016,2018,2020-2022" -> lista ordenada de anos."""
+    anos = set()
+    for parte in texto.split(","):
+        inicio, _, fim = parte.strip().partition("-")
+        anos.update(range(int(inicio), int(fim or inicio) + 1))
+    return sorted(anos)
+
+
+def carregar_dados(pasta, anos=None, pasta_cache=None):
+    """Linhas dos anos pedidos, geocodificadas e ordenadas por data (como no dashboard)."""
+    tabela = carregar_tabela(pasta, pasta_cache)
+    if anos:
+        tabela = tabela.filter(pc.is_in(tabela["ano"], value_set=pa.array(anos, pa.int16())))
+    return ordenar_por_data(geocodificar_bairros(tabela.to_pandas()))
+
+
+def tabelas(cubo, por_bairro, contagens_locais):
+    """
+    Todas as tabelas do relatório a partir do cubo, da tabela por bairro e das
+    contagens exatas por rua e cruzamento ({tipo_local: contar_locais}).
+    """
+    medidas = {medida: "sum" for medida in MEDIDAS}
+    agregados = {
+        "cubo": cubo.drop(columns="chave_mes"),
+        "por_ano": cubo.groupby("ano").agg(medidas).reset_index(),
+        "por_ano_mes": cubo.groupby(["ano", "mes"]).agg(medidas).reset_index(),
+        "por_mes": cubo.groupby("mes").agg(medidas).reset_index(),
+        "por_dia_semana_hora": cubo.groupby(["dia_semana", "hora"]).agg(medidas).reset_index(),
+        # Ordem alfabética dos tipos: as categorias do cubo em memória e do modo em fluxo vêm em ordens diferentes
+        "por_tipo": (
+            cubo.groupby("tipo", observed=True).agg(medidas).reset_index()
+            .sort_values("tipo", key=lambda tipo: tipo.astype(str), kind="stable").reset_index(drop=True)
+        ),
+        "por_bairro": por_bairro,
+        "top_bairros": top_bairros(cubo, 10),
+    }
+    # Contagens exatas (não os resumos aproximados do dashboard): o modo em fluxo dá o mesmo ranking
+    for tipo_local in TIPOS_LOCAL:
+        agregados[f"top_{tipo_local}"] = top_locais(contagens_locais[tipo_local], TOP_LOCAIS)
+    return agregados
+
+
+def agregar(dados):
+    """Todas as tabelas do relatório: {nome: DataFrame}."""
+    contagens_locais = {tipo_local: contar_locais(dados, tipo_local) for tipo_local in TIPOS_LOCAL}
+    return tabelas(construir_cubo(dados), tabela_bairros(dados), contagens_locais)
+
+
+def gravar_tabela(df, caminho):
+    temporario = caminho + ".tmp"
+    if caminho.endswith(".json"):
+        df.to_json(temporario, orient="records", force_ascii=False, date_format="iso")
+    else:
+        df.to_parquet(temporario, index=False)
+    os.replace(temporario, caminho)
+
+
+def gerar_relatorio(pasta=PASTA_PADRAO, saida=None, anos=None, pasta_cache=None, json_tabelas=False,
+                    tamanho_bloco=None):
+    """
+    Gera o relatório completo em `saida` e devolve o conteúdo do resumo.json.
+
+    `anos` vazio significa todos os anos disponíveis. Com `tamanho_bloco`, os
+    CSVs são lidos em fluxo (cttu.fluxo), sem montar o DataFrame completo nem
+    usar o cache Parquet; as tabelas são as mesmas.
+    """
+    saida = saida or os.path.join(pasta, NOME_PASTA_RELATORIO)
+    pasta_cache = pasta_cache or os.path.join(pasta, NOME_PASTA_CACHE)
+    os.makedirs(saida, exist_ok=True)
+    disponiveis = sorted(listar_csvs(pasta))
+    anos = [ano for ano in (anos or disponiveis) if ano in disponiveis]
+
+    if tamanho_bloco:
+        fluxo = agregar_em_fluxo(pasta, anos, tamanho_bloco)
+        agregados = tabelas(fluxo["cubo"], fluxo["por_bairro"], fluxo["contagens_locais"])
+        periodo = fluxo["periodo"]
+    else:
+        dados = carregar_dados(pasta, anos, pasta_cache)
+        agregados = agregar(dados)
+        periodo = (dados["data"].min(), dados["data"].max())
+    for nome, df in agregados.items():
+        gravar_tabela(df, os.path.join(saida, f"{nome}.parquet"))
+        if json_tabelas:
+            gravar_tabela(df, os.path.join(saida, f"{nome}.json"))
+    # Matrizes dia da semana x hora por bairro e por tipo (numpy)
+    caminho_matrizes = os.path.join(saida, NOME_MATRIZES)
+    salvar_matrizes(construir_matrizes(agregados["cubo"]), caminho_matrizes + ".tmp.npz")
+    os.replace(caminho_matrizes + ".tmp.npz", caminho_matrizes)
+
+    resumo = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "anos": anos,
+        "completo": anos == disponiveis,
+        "assinatura": [list(item) for item in assinatura_csvs(pasta)],
+        "periodo": [str(periodo[0].date()), str(periodo[1].date())],
+        "totais": totais(agregados["cubo"]),
+        "tabelas": sorted(agregados),
+    }
+    caminho_resumo = os.path.join(saida, NOME_RESUMO)
+    with open(caminho_resumo + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+    os.replace(caminho_resumo + ".tmp", caminho_resumo)
+    return resumo
+
+
+def carregar_cubo_relatorio(pasta, assinatura, saida=None):
+    """
+    Cubo gravado pelo relatório, se ele cobrir todos os anos e a assinatura
+    dos CSVs for a mesma; caso contrário, None.
+    """
+    saida = saida or os.path.join(pasta, NOME_PASTA_RELATORIO)
+    try:
+        with open(os.path.join(saida, NOME_RESUMO), encoding="utf-8") as f:
+            resumo = json.load(f)
+        if not resumo.get("completo") or [tuple(item) for item in resumo["assinatura"]] != list(assinatura):
+            return None
+        cubo = pd.read_parquet(os.path.join(saida, "cubo.parquet"))
+    except (OSError, ValueError, KeyError):
+        return None
+    cubo = cubo.sort_values(["ano", "mes"], kind="stable").reset_index(drop=True)
+    cubo["chave_mes"] = chave_mes(cubo["ano"], cubo["mes"])
+    return cubo[DIMENSOES + MEDIDAS + ["chave_mes"]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera as agregações do dashboard da CTTU em Parquet/JSON.")
+    parser.add_argument("--pasta", default=PASTA_PADRAO, help="pasta com os arquivos acidentes*.csv")
+    parser.add_argument("--anos", default=None, help='anos do relatório, ex.: "2016-2024" ou "2019,2021-2023"')
+    parser.add_argument("--saida", default=None, help=f"pasta de saída (padrão: <pasta>/{NOME_PASTA_RELATORIO})")
+    parser.add_argument("--pasta-cache", default=None, help=f"pasta do cache (padrão: <pasta>/{NOME_PASTA_CACHE})")
+    parser.add_argument("--json", action="store_true", help="grava também cada tabela em JSON")
+    parser.add_argument("--fluxo", action="store_true", help="lê os CSVs em blocos, com memória limitada")
+    parser.add_argument("--tamanho-bloco", type=int, default=TAMANHO_BLOCO, help="linhas por bloco no modo --fluxo")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    anos = interpretar_anos(args.anos) if args.anos else None
+    tamanho_bloco = args.tamanho_bloco if args.fluxo else None
+    resumo = gerar_relatorio(args.pasta, args.saida, anos, args.pasta_cache, args.json, tamanho_bloco)
+    print(
+        f"Relatório {resumo['periodo'][0]} a {resumo['periodo'][1]}: "
+        f"{len(resumo['tabelas'])} tabelas, {resumo['totais']['ocorrencias']} ocorrências "
+        f"({time.perf_counter() - inicio:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
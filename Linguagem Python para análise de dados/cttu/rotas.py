@@ -0,0 +1,187 @@
+"""
+Motor de rotas seguras entre bairros.
+
+O grafo liga cada bairro aos seus k vizinhos mais próximos (pelas coordenadas
+do gazetteer), garantindo que fique conexo, e cada aresta pesa
+distância (km) x (1 + FATOR_RISCO x risco médio das duas pontas), onde o risco
+é o total de ocorrências do bairro normalizado entre 0 e 1. Os menores
+caminhos entre todos os pares são pré-calculados (Floyd-Warshall vetorizado)
+e guardados em disco, indexados pela impressão digital da tabela de bairros:
+consultar o custo de origem -> destino é uma leitura na matriz, e o caminho é
+reconstruído pela matriz de predecessores.
+
+O motor deve ser montado sobre a tabela de bairros dos dados completos (como
+fazem o dashboard e o serviço de pontuação): cada tabela diferente gera um
+arquivo rotas_<impressão>.npz e uma entrada em MOTORES, então construí-lo a
+partir de dados filtrados faria o cache crescer a cada filtro.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+RAIO_TERRA_KM = 6371.0
+VIZINHOS = 4
+FATOR_RISCO = 3.0
+
+# Motores já calculados neste processo, pela impressão digital
+MOTORES = {}
+
+
+def tabela_bairros(dados):
+    """Ocorrências, vítimas e coordenadas por bairro (apenas bairros geocodificados)."""
+    com_coordenadas = dados.dropna(subset=["Latitude", "Longitude"])
+    tabela = com_coordenadas.groupby("bairro", observed=True).agg(
+        total_ocorrencias=("data", "size"),
+        vitimas=("vitimas", "sum"),
+        vitimasfatais=("vitimasfatais", "sum"),
+        Latitude=("Latitude", "first"),
+        Longitude=("Longitude", "first"),
+    )
+    return tabela.reset_index()
+
+
+def distancias_km(lat, lon):
+    """Matriz de distâncias (haversine) entre todos os pares de pontos."""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlon / 2) ** 2
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def componentes(adjacencia):
+    """Rótulo do componente conexo de cada nó (busca em largura)."""
+    rotulos = np.full(len(adjacencia), -1)
+    atual = 0
+    for inicio in range(len(adjacencia)):
+        if rotulos[inicio] >= 0:
+            continue
+        fronteira = [inicio]
+        rotulos[inicio] = atual
+        while fronteira:
+            vizinhos = np.flatnonzero(adjacencia[fronteira].any(axis=0) & (rotulos < 0))
+            rotulos[vizinhos] = atual
+            fronteira = list(vizinhos)
+        atual += 1
+    return rotulos
+
+
+def adjacencia_knn(distancias, k=VIZINHOS):
+    """Liga cada nó aos k mais próximos (relação simétrica) e une componentes isolados pela menor distância."""
+    n = len(distancias)
+    adjacencia = np.zeros((n, n), dtype=bool)
+    if n < 2:
+        return adjacencia
+    k = min(k, n - 1)
+    vizinhos = np.argsort(distancias + np.diag(np.full(n, np.inf)), axis=1)[:, :k]
+    adjacencia[np.repeat(np.arange(n), k), vizinhos.ravel()] = True
+    adjacencia |= adjacencia.T
+
+    rotulos = componentes(adjacencia)
+    while rotulos.max() > 0:
+        dentro = rotulos == 0
+        recorte = np.where(dentro[:, None] & ~dentro[None, :], distancias, np.inf)
+        i, j = np.unravel_index(np.argmin(recorte), recorte.shape)
+        adjacencia[i, j] = adjacencia[j, i] = True
+        rotulos = componentes(adjacencia)
+    return adjacencia
+
+
+def floyd_warshall(pesos):
+    """Custos mínimos entre todos os pares e matriz de predecessores (-1 = sem caminho)."""
+    n = len(pesos)
+    custo = pesos.copy()
+    np.fill_diagonal(custo, 0.0)
+    predecessor = np.where(np.isfinite(custo), np.arange(n)[:, None], -1)
+    np.fill_diagonal(predecessor, np.arange(n))
+    for k in range(n):
+        via_k = custo[:, k:k + 1] + custo[k:k + 1, :]
+        melhor = via_k < custo
+        custo = np.where(melhor, via_k, custo)
+        predecessor = np.where(melhor, predecessor[k:k + 1, :], predecessor)
+    return custo, predecessor
+
+
+def impressao_tabela(tabela, k=VIZINHOS, fator_risco=FATOR_RISCO):
+    colunas = tabela[["bairro", "total_ocorrencias", "Latitude", "Longitude"]].astype({"bairro": str})
+    h = hashlib.sha1(pd.util.hash_pandas_object(colunas, index=False).to_numpy().tobytes())
+    h.update(f"{k}|{fator_risco}".encode())
+    return h.hexdigest()[:16]
+
+
+def construir_motor_rotas(tabela, k=VIZINHOS, fator_risco=FATOR_RISCO):
+    """Grafo de adjacência, pesos por distância x risco e menores caminhos entre todos os bairros."""
+    bairros = tabela["bairro"].astype(str).to_numpy(dtype=str)
+    ocorrencias = tabela["total_ocorrencias"].to_numpy(dtype=float)
+    risco = ocorrencias / ocorrencias.max() if len(ocorrencias) and ocorrencias.max() > 0 else np.zeros(len(bairros))
+
+    distancias = distancias_km(tabela["Latitude"], tabela["Longitude"])
+    adjacencia = adjacencia_knn(distancias, k)
+    risco_medio = (risco[:, None] + risco[None, :]) / 2
+    pesos = np.where(adjacencia, distancias * (1 + fator_risco * risco_medio), np.inf)
+    custo, predecessor = floyd_warshall(pesos)
+    return {
+        "bairros": bairros,
+        "latitude": tabela["Latitude"].to_numpy(dtype=float),
+        "longitude": tabela["Longitude"].to_numpy(dtype=float),
+        "risco": risco,
+        "pesos": pesos,
+        "custo": custo,
+        "predecessor": predecessor.astype(np.int32),
+    }
+
+
+def carregar_motor_rotas(tabela, pasta_cache=None, k=VIZINHOS, fator_risco=FATOR_RISCO):
+    """Motor de rotas a partir do cache (memória, depois disco) ou recalculado e gravado."""
+    impressao = impressao_tabela(tabela, k, fator_risco)
+    if impressao in MOTORES:
+        return MOTORES[impressao]
+    caminho = None
+    if pasta_cache:
+        os.makedirs(pasta_cache, exist_ok=True)
+        caminho = os.path.join(pasta_cache, f"rotas_{impressao}.npz")
+    if caminho and os.path.exists(caminho):
+        with np.load(caminho, allow_pickle=False) as arquivo:
+            motor = {chave: arquivo[chave] for chave in arquivo.files}
+    else:
+        motor = construir_motor_rotas(tabela, k, fator_risco)
+        if caminho:
+            temporario = caminho + ".tmp.npz"
+            np.savez(temporario, **motor)
+            os.replace(temporario, caminho)
+    motor["impressao"] = impressao
+    motor["posicao"] = {nome: i for i, nome in enumerate(motor["bairros"])}
+    MOTORES[impressao] = motor
+    return motor
+
+
+def caminho_indices(motor, i, j):
+    """Sequência de índices de i até j pela matriz de predecessores (None se não houver caminho)."""
+    predecessor = motor["predecessor"]
+    if predecessor[i, j] < 0:
+        return None
+    caminho = [j]
+    while j != i:
+        j = int(predecessor[i, j])
+        caminho.append(j)
+    return caminho[::-1]
+
+
+def rota(motor, origem, destino):
+    """Rota de menor custo (lista de bairros) e seu custo; (None, inf) se não houver caminho."""
+    i, j = motor["posicao"][origem], motor["posicao"][destino]
+    caminho = caminho_indices(motor, i, j)
+    if caminho is None:
+        return None, float("inf")
+    return [str(motor["bairros"][p]) for p in caminho], float(motor["custo"][i, j])
+
+
+def arestas(motor):
+    """Lista de arestas (bairro_a, bairro_b, peso) do grafo, sem repetição."""
+    i, j = np.nonzero(np.triu(np.isfinite(motor["pesos"]), k=1))
+    bairros = motor["bairros"]
+    return [(str(bairros[a]), str(bairros[b]), float(motor["pesos"][a, b])) for a, b in zip(i, j)]
@@ -28,14 +28,19 @@ import folium
 from folium.plugins import HeatMap
 import plotly.express as px
 import plotly.graph_objects as go
-import pandas as pd
 import numpy as np 
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-import networkx as nx
-import matplotlib.pyplot as plt
-import glob
 import os
+from cttu import assinatura_csvs, carregar_acidentes
+from cttu.cubo import construir_cubo, fatiar, totais, por_ano, por_mes, top_bairros, vitimas_por_mes
+from cttu.filtros import construir_indice, filtrar, ordenar_por_data
+from cttu.mapa import PESOS, pontos_calor
+from cttu.pontos_criticos import TIPOS_LOCAL, construir_pontos_criticos, ranking
+from cttu.horarios import construir_matrizes, matriz, tabela_matriz
+from cttu.geocodificacao import geocodificar_bairros
+from cttu.rotas import tabela_bairros, carregar_motor_rotas, rota
+from cttu.grafico_rotas import figura_rota
+from cttu.modelos import FEATURES, carregar_classificador
+from cttu.relatorio import carregar_cubo_relatorio
 
 # 2. CONFIGURAÇÃO DA PÁGINA
 
@@ -53,59 +58,74 @@ with st.container():
       
 # 4. CARREGAMENTO E TRATAMENTO
 
+PASTA_DADOS = os.path.dirname(os.path.abspath(__file__))
+
+# Os CSVs são convertidos uma única vez para um cache Parquet particionado por ano (pacote cttu).
+# O resultado fica em memória entre as execuções do Streamlit; a assinatura dos arquivos
+# (nome, tamanho, mtime) invalida o cache quando um ano é incluído ou alterado.
+@st.cache_resource(show_spinner="Carregando dados de acidentes...")
+def carregar_dados(pasta, assinatura):
+    # Colunas já chegam no esquema canônico e tipadas (data em datetime64, contagens em int32, bairro/tipo categóricos)
+    dados = carregar_acidentes(pasta)
+
+    # Padronizar os nomes de bairro e adicionar Latitude e Longitude a partir do gazetteer (gazetteer_recife.csv)
+    dados = geocodificar_bairros(dados)
+    # Remove colunas 100% sem dados (uma vez, no carregamento: os filtros devolvem fatias sem cópia)
+    dados = dados.dropna(axis=1, how='all')
+    # Linhas ordenadas por data: o filtro de datas vira uma fatia por busca binária (cttu.filtros)
+    return ordenar_por_data(dados)
+
+# Índice de filtros (datas ordenadas e linhas por tipo de acidente)
+@st.cache_resource(show_spinner=False)
+def carregar_indice(pasta, assinatura):
+    return construir_indice(carregar_dados(pasta, assinatura))
+
+# Cubo pré-agregado (ano, mês, dia da semana, hora, bairro, tipo) que alimenta os totais e os gráficos da seção 7.
+# Se o relatório noturno (python -m cttu.relatorio) estiver atualizado, o cubo é lido dele em vez de recalculado
+@st.cache_resource(show_spinner="Montando agregações...")
+def carregar_cubo(pasta, assinatura):
+    cubo = carregar_cubo_relatorio(pasta, assinatura)
+    if cubo is None:
+        cubo = construir_cubo(carregar_dados(pasta, assinatura))
+    return cubo
+
+# Resumos (SpaceSaving + Count-Min) de ruas e cruzamentos por mês e tipo, mesclados a cada filtro
+@st.cache_resource(show_spinner=False)
+def carregar_pontos_criticos(pasta, assinatura):
+    return construir_pontos_criticos(carregar_dados(pasta, assinatura))
+
+# Ocorrências e coordenadas por bairro nos dados completos: o motor de rotas é construído (e gravado em disco)
+# uma vez por versão dos dados, nunca por combinação de filtros
+@st.cache_resource(show_spinner=False)
+def carregar_bairros(pasta, assinatura):
+    return tabela_bairros(carregar_dados(pasta, assinatura))
+
+@st.cache_resource(show_spinner="Calculando rotas entre bairros...")
+def carregar_rotas(pasta, assinatura):
+    return carregar_motor_rotas(carregar_bairros(pasta, assinatura), os.path.join(pasta, '.cache_cttu'))
+
+# Classificador de risco por bairro (rótulo pelo total de ocorrências, considerar outras variáveis como número de
+# vítimas), lido do registro de modelos; só é treinado se ainda não houver modelo para esta versão dos dados
+@st.cache_resource(show_spinner="Carregando classificador de risco...")
+def carregar_risco_bairros(pasta, assinatura):
+    # Classe prevista para cada bairro, calculada uma vez: na interação só há a consulta ao dicionário
+    tabela = carregar_bairros(pasta, assinatura)
+    modelo = carregar_classificador(tabela, os.path.join(pasta, '.cache_cttu'))
+    return dict(zip(tabela['bairro'].astype(str), modelo.predict(tabela[FEATURES])))
+
+# Matrizes dia da semana x hora do recorte do cubo, guardadas pela combinação de filtros (a fatia não entra no hash):
+# interações que não mudam datas nem tipos (ex.: escolher bairros na seção 7) não as recalculam
+@st.cache_data(max_entries=32, show_spinner=False)
+def matrizes_do_filtro(assinatura, inicio, fim, tipos, _fatia):
+    return construir_matrizes(_fatia)
+
 with st.container():
     st.write("---")
-    # Unificar todos os arquivos CSV da pasta
-    csv_files = glob.glob(os.path.join(os.path.dirname(__file__), 'acidentes*.csv'))
-    df_list = []
-    for file in csv_files:
-        # Detectar separador automaticamente
-        with open(file, 'r', encoding='utf-8') as f:
-            first_line = f.readline()
-            sep = ';' if first_line.count(';') > first_line.count(',') else ','
-        df = pd.read_csv(file, delimiter=sep)
-        df_list.append(df)
-    dados = pd.concat(df_list, ignore_index=True)
-    dados['data'] = pd.to_datetime(dados['data'])
-
-    # Adicionar colunas de Latitude e Longitude já no tratamento inicial
-    coordenadas_bairros = {
-        'BOA VIAGEM': (-8.1192, -34.9041),
-        'IMBIRIBEIRA': (-8.1127, -34.9187),
-        'DERBY': (-8.0626, -34.8871),
-        'ILHA DO RETIRO': (-8.0586, -34.9022),
-        'ESPINHEIRO': (-8.0377, -34.8986),
-        'TORRE': (-8.0372, -34.9157),
-        'ARRUDA': (-8.0272, -34.8857),
-        'CASA FORTE': (-8.0276, -34.9077),
-        'GRAÇAS': (-8.0456, -34.8982),
-        'SANTO AMARO': (-8.0539, -34.8817),
-        'MADALENA': (-8.0452, -34.9172),
-        'PINA': (-8.1042, -34.8817),
-        'AFOGADOS': (-8.0736, -34.9182),
-        'CORDEIRO': (-8.0457, -34.9362),
-        'VÁRZEA': (-8.0341, -34.9522),
-        'JAQUEIRA': (-8.0347, -34.8942),
-        'ENCRUZILHADA': (-8.0332, -34.8852),
-        'CAMPO GRANDE': (-8.0702, -34.9002),
-        'SANTO ANTÔNIO': (-8.0632, -34.8732),
-        'SÃO JOSÉ': (-8.0672, -34.8722),
-        # ...adicione mais bairros conforme necessário...
-    }
-    # Padronizar nome da coluna de bairro para 'uf_cidade_bairro' se necessário
-    possiveis_nomes_bairro = ['uf_cidade_bairro', 'bairro', 'local_bairro', 'bairro_ocorrencia', 'bairro_nome']
-    nome_bairro = None
-    for nome in possiveis_nomes_bairro:
-        if nome in dados.columns:
-            nome_bairro = nome
-            break
-    if nome_bairro and nome_bairro != 'uf_cidade_bairro':
-        dados['uf_cidade_bairro'] = dados[nome_bairro]
-    elif 'uf_cidade_bairro' not in dados.columns:
-        dados['uf_cidade_bairro'] = None
-    # Criar as colunas Latitude e Longitude
-    dados['Latitude'] = dados['uf_cidade_bairro'].map(lambda x: coordenadas_bairros.get(str(x).strip().upper(), (None, None))[0] if pd.notnull(x) else None)
-    dados['Longitude'] = dados['uf_cidade_bairro'].map(lambda x: coordenadas_bairros.get(str(x).strip().upper(), (None, None))[1] if pd.notnull(x) else None)
+    assinatura = assinatura_csvs(PASTA_DADOS)
+    indice = carregar_indice(PASTA_DADOS, assinatura)
+    dados = indice['dados']
+    cubo = carregar_cubo(PASTA_DADOS, assinatura)
+    pontos_criticos = carregar_pontos_criticos(PASTA_DADOS, assinatura)
 
     # Exibindo as colunas como uma tabela
     #st.write(pd.DataFrame(dados.columns, columns=["Colunas"]))
@@ -119,7 +139,7 @@ with st.container():
     st.sidebar.header("Filtros")  
 
     # Filtro tipo de acidentes
-    tipos_unicos = dados['tipo'].unique()
+    tipos_unicos = sorted(dados['tipo'].cat.categories)
     tipo_acid = st.sidebar.multiselect("Escolha o tipo do acidente", tipos_unicos)
 
     # Obter a data mínima e máxima após a conversão correta para datetime
@@ -132,12 +152,11 @@ with st.container():
         max_value=dt_fim,
         value=(dt_inicio, dt_fim)
     )
-    # Aplicar o filtro de datas nos dados
-    dados = dados[(dados['data'] >= intervalo_datas[0]) & (dados['data'] <= intervalo_datas[1])]
+    # Aplicar os filtros de datas e de tipo (fatia sem cópia quando não há filtro de tipo)
+    dados = filtrar(indice, intervalo_datas[0], intervalo_datas[1], tipo_acid)
 
-    # Aplica filtro aos dados
-    if tipo_acid:
-        dados = dados[dados['tipo'].isin(tipo_acid)]
+    # Recorte do cubo com os mesmos filtros (meses de borda reagregados a partir das linhas filtradas)
+    fatia = fatiar(cubo, intervalo_datas[0], intervalo_datas[1], tipo_acid, dados)
 
     st.sidebar.write("---")
     
@@ -149,21 +168,17 @@ with st.container():
 
 # 6. PRÉ-PROCESSAMENTO
 
-    # Remove colunas 100% sem dados
-    dados = dados.dropna(axis=1, how='all')
     # Função para formatar números com separador de milhar
     def format_number(number):
         try:
             return "{:,.0f}".format(float(number)).replace(',', '.')
         except (ValueError, TypeError):
             return number  # Retorna o valor original se ocorrer um erro
-    # Convertendo texto para números inteiros
-    dados['vitimas'] = pd.to_numeric(dados['vitimas'], errors='coerce')
-    dados['vitimasfatais'] = pd.to_numeric(dados['vitimasfatais'], errors='coerce')
-    # Calcular totais
-    total_vitimas = dados['vitimas'].sum()
-    total_vitimas_fatais = dados['vitimasfatais'].sum()
-    total_ocorrencias = dados['data'].count()
+    # Calcular totais (a partir do cubo)
+    resumo = totais(fatia)
+    total_vitimas = resumo['vitimas']
+    total_vitimas_fatais = resumo['vitimasfatais']
+    total_ocorrencias = resumo['ocorrencias']
     # Criar colunas
     col1, col2, col3 = st.columns(3)
     # Formatação dos números
@@ -177,8 +192,7 @@ with st.container():
 
     # Total de ocorrências por ano (Gráfico de Barras Vertical)
     st.write("Total de Ocorrências por Ano")
-    dados['ano'] = dados['data'].dt.year
-    ocorrencias_por_ano = dados.groupby('ano')['data'].count().reset_index()
+    ocorrencias_por_ano = por_ano(fatia)
     ocorrencias_por_ano.columns = ['Ano', 'Total de Ocorrências']
     fig_barras = px.bar(ocorrencias_por_ano, x='Ano', y='Total de Ocorrências',
                     labels={'Total de Ocorrências': 'Total de Ocorrências'},
@@ -194,9 +208,8 @@ with st.container():
         
     # Total de ocorrência por mês (Gráfico de Barras Vertical)
     st.write("Total de Ocorrências por Mês")
-    dados['mes'] = dados['data'].dt.month  # Extrair o mês a partir da data
-    ocorrencias_por_mes = dados.groupby('mes')['data'].count().reset_index()
-    fig_mes = px.bar(ocorrencias_por_mes, x='mes', y='data', labels={'data': 'Total de Ocorrências', 'mes': 'Mês'}, 
+    ocorrencias_por_mes = por_mes(fatia)
+    fig_mes = px.bar(ocorrencias_por_mes, x='mes', y='ocorrencias', labels={'ocorrencias': 'Total de Ocorrências', 'mes': 'Mês'}, 
                      text_auto=True, color_discrete_sequence=['#0958D9'])
     fig_mes.update_layout(xaxis=dict(
         tickmode='array',
@@ -213,14 +226,13 @@ with st.container():
     
     # Total de ocorrência por bairro (Top 10 - Gráfico de Barras Horizontal)
     st.write("Top 10 Bairros com Mais Ocorrências")
-    ocorrencias_por_bairro = dados.groupby('bairro')['data'].count().reset_index()  # Agrupar dados por bairro e calcular o total de ocorrências
-    top_10_bairros = ocorrencias_por_bairro.sort_values(by='data', ascending=False).head(10)  # Ordenar por número de ocorrências e selecionar o top 10
+    top_10_bairros = top_bairros(fatia, 10)  # Total de ocorrências por bairro, já ordenado (top 10)
     fig_top_10 = px.bar(top_10_bairros,  # Criar gráfico de barras horizontal
-                        x='data', 
+                        x='ocorrencias', 
                         y='bairro', 
                         orientation='h',  # Define o gráfico como horizontal
-                        labels={'data': 'Total de Ocorrências', 'bairro': 'Bairro'},
-                        text='data',    # Adiciona os rótulos dos valores
+                        labels={'ocorrencias': 'Total de Ocorrências', 'bairro': 'Bairro'},
+                        text='ocorrencias',    # Adiciona os rótulos dos valores
                         color_discrete_sequence=['#0958D9'])  # Define a cor do gráfico
     fig_top_10.update_layout(yaxis={'categoryorder': 'total ascending'}, 
                              xaxis_title="Total de Ocorrências",
@@ -231,24 +243,39 @@ with st.container():
     st.write("2. ")
     st.write("3. ")
 
+    st.write("---")
+
+    # Ruas e cruzamentos com mais ocorrências (Top 10 - Gráfico de Barras Horizontal)
+    st.write("Top 10 Ruas e Cruzamentos com Mais Ocorrências")
+    tipo_local = st.radio("Local", list(TIPOS_LOCAL), format_func=TIPOS_LOCAL.get, horizontal=True)
+    top_locais = ranking(pontos_criticos, tipo_local, intervalo_datas[0], intervalo_datas[1], tipo_acid, dados, 10)
+    # Contagens estimadas pelos resumos (limite superior): cada local pode estar superestimado em até erro_maximo
+    fig_locais = px.bar(top_locais, x='ocorrencias', y='local', orientation='h',
+                        labels={'ocorrencias': 'Ocorrências (limite superior)', 'local': TIPOS_LOCAL[tipo_local],
+                                'erro_maximo': 'Erro máximo'},
+                        text='ocorrencias', hover_data=['erro_maximo'], color_discrete_sequence=['#0958D9'])
+    fig_locais.update_layout(yaxis={'categoryorder': 'total ascending'},
+                             xaxis_title="Ocorrências (limite superior)",
+                             yaxis_title=TIPOS_LOCAL[tipo_local])
+    st.plotly_chart(fig_locais)
+    st.caption("Contagens aproximadas: são limites superiores e podem exceder o valor exato em até o erro máximo de cada local.")
+
     st.write("---")
     
     # Comparativo Total de Vitimas vs Total de Vitimas Fatais (Grafico de Linhas multiplas)
     with st.container():
         st.write("Comparação entre Total de Vítimas e Vítimas Fatais por Mês")
-        anos_disponiveis = sorted(dados['data'].dt.year.unique())  # Extrair e ordenar os anos disponíveis para o slicer
+        anos_disponiveis = sorted(int(ano) for ano in fatia['ano'].unique())  # Extrair e ordenar os anos disponíveis para o slicer
         anos_selecionados = st.multiselect('Selecione os Anos', anos_disponiveis, default=anos_disponiveis, key='anos_selecionados_1')  # Adicionar o slicer para selecionar múltiplos anos
-        dados_filtrados = dados[dados['data'].dt.year.isin(anos_selecionados)]  # Filtrar os dados com base nos anos selecionados
-        vitimas_por_mes = dados_filtrados.groupby(dados_filtrados['data'].dt.strftime('%b'))[['vitimas', 'vitimasfatais']].sum().reset_index()  # Calcular o total de vítimas e vítimas fatais por mês
-        vitimas_por_mes = vitimas_por_mes.sort_values(by='data')  # Ordenar os meses
+        vitimas_mes = vitimas_por_mes(fatia, anos_selecionados)  # Total de vítimas e vítimas fatais por mês (1 a 12), nos anos selecionados
         fig_vitimas = go.Figure()
-        fig_vitimas.add_trace(go.Scatter(x=vitimas_por_mes['data'], y=vitimas_por_mes['vitimas'],
+        fig_vitimas.add_trace(go.Scatter(x=vitimas_mes['mes'], y=vitimas_mes['vitimas'],
                                         mode='lines+markers+text', name='Total de Vítimas',
-                                        text=vitimas_por_mes['vitimas'], textposition='top center',
+                                        text=vitimas_mes['vitimas'], textposition='top center',
                                         line=dict(color='#0958D9')))
-        fig_vitimas.add_trace(go.Scatter(x=vitimas_por_mes['data'], y=vitimas_por_mes['vitimasfatais'],
+        fig_vitimas.add_trace(go.Scatter(x=vitimas_mes['mes'], y=vitimas_mes['vitimasfatais'],
                                         mode='lines+markers+text', name='Total de Vítimas Fatais',
-                                        text=vitimas_por_mes['vitimasfatais'], textposition='top center',
+                                        text=vitimas_mes['vitimasfatais'], textposition='top center',
                                         line=dict(color='green')))
         fig_vitimas.update_layout(xaxis_title="Mês", yaxis_title="Total", 
                                 xaxis=dict(
@@ -262,12 +289,24 @@ with st.container():
 
     st.write("---")
 
+    # Ocorrências por dia da semana e hora (matriz 7 x 24, a partir do recorte do cubo)
+    st.write("Ocorrências por Dia da Semana e Hora")
+    matrizes = matrizes_do_filtro(assinatura, intervalo_datas[0], intervalo_datas[1], tuple(tipo_acid), fatia)
+    bairros_matriz = st.multiselect("Bairros", list(matrizes['bairro']['categorias']), key='bairros_matriz')
+    semana_hora = tabela_matriz(matriz(matrizes, 'bairro', bairros_matriz))
+    fig_semana_hora = px.imshow(semana_hora, labels={'x': 'Hora', 'y': 'Dia da Semana', 'color': 'Ocorrências'},
+                                color_continuous_scale='Blues', aspect='auto')
+    st.plotly_chart(fig_semana_hora, use_container_width=True)
+
+    st.write("---")
+
     # Mapa de calor mostrando o total de ocorrências por bairro
     st.write("Mapa de Calor - Total de Ocorrências por Bairro")
     if 'Latitude' in dados.columns and 'Longitude' in dados.columns:
-        dados = dados.dropna(subset=['Latitude', 'Longitude']) # Remover linhas onde a latitude ou longitude estão ausentes
+        peso_mapa = st.radio("Peso do mapa de calor", list(PESOS), horizontal=True)
         mapa = folium.Map(location=[-8.0476, -34.8770], zoom_start=12)
-        heat_data = [[row['Latitude'], row['Longitude']] for index, row in dados.iterrows()]
+        # Uma tripla [lat, lon, peso] por local (linhas sem coordenadas são ignoradas), pesos na escala 0-1
+        heat_data = pontos_calor(dados, PESOS[peso_mapa], normalizar=True)
         HeatMap(heat_data).add_to(mapa) # Criar o mapa de calor
         folium_static(mapa) # Renderizar o mapa no Streamlit   
         st.write("Insights:")
@@ -290,109 +329,29 @@ with st.container():
     if 'Latitude' not in dados.columns or 'Longitude' not in dados.columns:
         st.error("As colunas 'Latitude' e 'Longitude' não estão presentes no arquivo consolidado.")
     else:
-        
-        # Padronizar nome da coluna de bairro para 'uf_cidade_bairro'
-        possiveis_nomes_bairro = ['uf_cidade_bairro', 'bairro', 'local_bairro', 'bairro_ocorrencia', 'bairro_nome']
-        nome_bairro = None
-        for nome in possiveis_nomes_bairro:
-            if nome in dados.columns:
-                nome_bairro = nome
-                break
-        if nome_bairro and nome_bairro != 'uf_cidade_bairro':
-            dados['uf_cidade_bairro'] = dados[nome_bairro]
-        elif 'uf_cidade_bairro' not in dados.columns:
-            st.error("Coluna de bairro não encontrada nos dados. As análises por bairro não funcionarão.")
-
-        # Dicionário de coordenadas dos bairros do Recife (todas as chaves em caixa alta)
-        coordenadas_bairros = {
-            'BOA VIAGEM': (-8.1192, -34.9041),
-            'IMBIRIBEIRA': (-8.1127, -34.9187),
-            'DERBY': (-8.0626, -34.8871),
-            'ILHA DO RETIRO': (-8.0586, -34.9022),
-            'ESPINHEIRO': (-8.0377, -34.8986),
-            'TORRE': (-8.0372, -34.9157),
-            'ARRUDA': (-8.0272, -34.8857),
-            'CASA FORTE': (-8.0276, -34.9077),
-            'GRAÇAS': (-8.0456, -34.8982),
-            'SANTO AMARO': (-8.0539, -34.8817),
-            'MADALENA': (-8.0452, -34.9172),
-            'PINA': (-8.1042, -34.8817),
-            'AFOGADOS': (-8.0736, -34.9182),
-            'CORDEIRO': (-8.0457, -34.9362),
-            'VÁRZEA': (-8.0341, -34.9522),
-            'JAQUEIRA': (-8.0347, -34.8942),
-            'ENCRUZILHADA': (-8.0332, -34.8852),
-            'CAMPO GRANDE': (-8.0702, -34.9002),
-            'SANTO ANTÔNIO': (-8.0632, -34.8732),
-            'SÃO JOSÉ': (-8.0672, -34.8722),
-            # ...adicione mais bairros conforme necessário...
-        }
-        # Adicionar Latitude e Longitude conforme o bairro (convertendo para caixa alta)
-        dados['Latitude'] = dados['uf_cidade_bairro'].map(lambda x: coordenadas_bairros.get(str(x).strip().upper(), (None, None))[0])
-        dados['Longitude'] = dados['uf_cidade_bairro'].map(lambda x: coordenadas_bairros.get(str(x).strip().upper(), (None, None))[1])
-
-        # Só remove linhas se as colunas existirem
-        if 'Latitude' in dados.columns and 'Longitude' in dados.columns:
-            dados = dados.dropna(subset=['Latitude', 'Longitude'])
-
-        # Padronizar nomes de latitude e longitude
-        possiveis_lat = ['Latitude', 'latitude', 'lat', 'LATITUDE']
-        possiveis_long = ['Longitude', 'longitude', 'long', 'lng', 'LONGITUDE']
-        nome_lat = None
-        nome_long = None
-        for nome in possiveis_lat:
-            if nome in dados.columns:
-                nome_lat = nome
-                break
-        for nome in possiveis_long:
-            if nome in dados.columns:
-                nome_long = nome
-                break
-        if nome_lat and nome_lat != 'Latitude':
-            dados['Latitude'] = dados[nome_lat]
-        if nome_long and nome_long != 'Longitude':
-            dados['Longitude'] = dados[nome_long]
-        if 'Latitude' not in dados.columns or 'Longitude' not in dados.columns:
-            st.error("Colunas de Latitude e/ou Longitude não encontradas nos dados. O mapa de calor não funcionará.")
-        
-        # Agrupar os dados por 'bairro' e contar o total de ocorrências em cada localidade
-        df_agrupado = dados.groupby(['bairro', 'Latitude', 'Longitude']).size().reset_index(name='total_ocorrencias')
-        # Classificar as localidades com base no total de ocorrências
-        df_agrupado['classificacao'] = pd.cut(df_agrupado['total_ocorrencias'], # Considerar outras variaveis como: Número de vitimas
-                                            bins=[0, 200, 500, float('inf')],
-                                            labels=['Segura', 'Perigoso', 'Muito Perigoso'])
-        
-
-        # Dividir os dados em features (X) e rótulo (y)
-        X = df_agrupado[['total_ocorrencias']]
-        y = df_agrupado['classificacao']
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42) # Dividir em conjuntos de treinamento e teste
-        modelo = RandomForestClassifier(n_estimators=100, random_state=42)  # Treinar o modelo
-        modelo.fit(X_train, y_train)
+        # Classificador de risco (RandomForest) do registro de modelos, treinado sobre a tabela de bairros dos
+        # dados completos (a mesma de python -m cttu.modelos): filtros não disparam treino, apenas a leitura do modelo
+        risco_bairros = carregar_risco_bairros(PASTA_DADOS, assinatura)
         # Seção de input para os pontos A e B
         st.subheader("Informe os pontos de origem e destino")
-        ponto_A = st.selectbox("Selecione o ponto de origem", df_agrupado['bairro'].unique())
-        ponto_B = st.selectbox("Selecione o ponto de destino", df_agrupado['bairro'].unique())
-        # Simular o grafo (exemplo simples)
-        G = nx.Graph()
-        # Adicionar arestas com base nos dados
-        for _, row in df_agrupado.iterrows():
-            # Adicionar arestas conectando cada localidade ao ponto central
-            G.add_edge("Ponto Central", row['bairro'], weight=row['total_ocorrencias'])
-        # Encontrar a rota mais segura de A para B
-        try:
-            rota_segura = nx.shortest_path(G, source=ponto_A, target=ponto_B, weight='weight')
+        # Grafo de vizinhança entre bairros (k vizinhos mais próximos), com peso = distância x risco, montado
+        # sobre os dados completos (os filtros não mudam o grafo). Os menores caminhos entre todos os pares
+        # ficam em cache (memória e disco): a consulta de origem -> destino é uma leitura nas matrizes (cttu.rotas)
+        motor = carregar_rotas(PASTA_DADOS, assinatura)
+        ponto_A = st.selectbox("Selecione o ponto de origem", motor['bairros'])
+        ponto_B = st.selectbox("Selecione o ponto de destino", motor['bairros'])
+        st.write(f"Risco previsto na origem: {risco_bairros.get(ponto_A, '-')} | no destino: {risco_bairros.get(ponto_B, '-')}")
+        rota_segura, custo = rota(motor, ponto_A, ponto_B)
+        if rota_segura is None:
+            st.error("Não foi possível encontrar uma rota entre os pontos selecionados.")
+        else:
             st.subheader("Rota Segura Recomendada")
             st.write(" -> ".join(rota_segura))
-        except nx.NetworkXNoPath:
-            st.error("Não foi possível encontrar uma rota entre os pontos selecionados.")
-        # Plotar o grafo
+            st.write(f"Custo da rota (km ponderados pelo risco): {custo:.1f}")
+        # Plotar o grafo (plotly, no navegador): a figura base fica em cache por motor de rotas (um por versão dos dados);
+        # a cada consulta só o traço da rota destacada é acrescentado
         st.subheader("Visualização do Grafo de Rotas")
-        plt.figure(figsize=(12, 12))  # Ajuste o tamanho da figura
-        pos = nx.spring_layout(G, seed=42)  # Adicione uma semente para layout reprodutível
-        nx.draw(G, pos, with_labels=True, node_size=500, node_color='lightblue', font_size=10)
-        nx.draw_networkx_edge_labels(G, pos, edge_labels=nx.get_edge_attributes(G, 'weight'))
-        st.pyplot(plt)
+        st.plotly_chart(figura_rota(motor, rota_segura), use_container_width=True)
 
     # O usuário dará todos os atributos
     # Local
@@ -7,183 +7,69 @@ Este script realiza um pipeline completo de Machine Learning para previsão de p
 ####################################### 0. IMPORTAÇÕES DAS BIBLIOTECAS ##########################################
 
 # Importação das bibliotecas essenciais para análise de dados, visualização e machine learning
+import io  # Leitura dos arquivos enviados para precificação em lote
+import os  # Data de modificação da base (invalidação do cache)
+import time  # Medição da vazão da precificação em lote
 import pandas as pd  # Manipulação de dados em DataFrames
-import numpy as np  # Operações numéricas e tratamento de valores nulos
 import matplotlib.pyplot as plt  # Visualização de gráficos
 import streamlit as st  # Criação de dashboards interativos
-import seaborn as sns  # Visualização estatística avançada
-
-# Importação dos modelos de Machine Learning e utilitários do scikit-learn
-from sklearn.ensemble import RandomForestRegressor # Modelo 1: Regressão por Floresta Aleatória
-from sklearn.linear_model import LinearRegression # Modelo 2: Regressão Linear
-from sklearn.tree import DecisionTreeRegressor # Modelo 3: Árvore de Decisão
-from sklearn.impute import SimpleImputer  # Tratamento de valores ausentes
-from sklearn.preprocessing import OneHotEncoder  # Codificação de variáveis categóricas
-from sklearn.model_selection import train_test_split, cross_val_score  # Divisão e validação dos dados
-from sklearn.metrics import ConfusionMatrixDisplay, confusion_matrix, mean_squared_error, r2_score  # Métricas de avaliação
-from sklearn.compose import ColumnTransformer  # Pré-processamento de colunas
+
+# Tratamento dos dados e artefato dos modelos treinados offline (python -m carros.treino)
+from carros.comparaveis import buscar_comparaveis
+from carros.dados import COLUNAS_CATEGORICAS, carregar_dados, impressao_dados
+from carros.filtros import construir_indice, linhas, opcoes
+from carros.inferencia import prever_modelo
+from carros.lote import ler_tabela, prever_lote
+from carros.treino import carregar_artefato, codificar, ler_manifesto
 
 ###################################### 1. EXTRAÇÃO E CARREGAMENTO DOS DADOS ######################################
 
 # Leitura do arquivo CSV contendo os dados dos veículos
 # O caminho do arquivo deve ser ajustado conforme o local onde está salvo
 file_path = "car_price_prediction.csv"
-data = pd.read_csv(file_path)
 
 ###################################### 2. TRATAMENTO DE VALORES NULOS E VAZIOS ###################################
 
-# Exclusão de colunas consideradas irrelevantes para a análise e predição de preço
-columns_to_drop = [
-    "Leather interior", "Wheel", "Color", "ID"
-]
-data.drop(columns=columns_to_drop, inplace=True)
-
-# Renomeando colunas para o português, facilitando a leitura e entendimento
-# Exemplo: 'Engine volume' -> 'Tamanho do Motor'
-data.rename(
-    columns={
-        "Engine volume": "Tamanho do Motor",
-        "Price": "Preço",
-        "Manufacturer": "Fabricante",
-        "Model": "Modelo",
-        "Prod. year": "Ano",
-        "Category": "Categoria",
-        "Fuel type": "Tipo de Combustível",
-        "Mileage": "Quilometragem",
-        "Gear box type": "Tipo de Câmbio",
-        "Drive wheels": "Tração",
-        "Levy": "Imposto",
-        'Cylinders': "Cilindros",
-        "Doors": "Portas"
-    },
-    inplace=True,
-)
+# Exclusão de colunas irrelevantes, nomes em português, conversão dos tipos e tratamento
+# de nulos (carros/dados.py). Feito uma vez por versão do arquivo, não a cada interação.
+@st.cache_data
+def carregar_base(caminho, modificado_em):
+    df = carregar_dados(caminho)
+    return df, impressao_dados(df)
 
-# Limpeza e conversão dos dados para os tipos corretos
-# Remove a palavra 'Turbo' e converte para numérico
-# Limpeza e conversão da coluna "Tamanho do Motor"
-data['Tamanho do Motor']=data['Tamanho do Motor'].str.replace('Turbo','')
-data['Tamanho do Motor']=pd.to_numeric(data['Tamanho do Motor'])
-
-# Limpeza e conversão da coluna "Quilometragem" (remove 'km' e converte para número)
-data['Quilometragem']=data['Quilometragem'].str.replace('km',"")
-data['Quilometragem']=pd.to_numeric(data['Quilometragem'])
-
-# Limpeza e conversão da coluna "Imposto" (substitui '-' por NaN e converte para número)
-data["Imposto"] = data["Imposto"].astype(str).replace("-", np.nan)
-data["Imposto"] = pd.to_numeric(data["Imposto"], errors="coerce")
-
-# Limpeza e conversão da coluna "Portas" (corrige valores inconsistentes)
-data['Portas'].replace({'04-May':4, '02-Mar':2, '>5':5}, inplace=True)
-    
-
-# Função para tratamento de valores nulos
-# Substitui valores nulos em colunas numéricas pela mediana e em categóricas por 'DESCONHECIDO'
-def handle_missing_values(df):
-    # Para dados numéricos: substitui valores nulos pela mediana
-    numeric_columns = ["Preço", "Imposto", "Quilometragem", 'Tamanho do Motor', 'Cilindros']
-    imputer_numeric = SimpleImputer(strategy="median")
-    df[numeric_columns] = imputer_numeric.fit_transform(df[numeric_columns])
-
-    # Para dados categóricos: substitui valores nulos por "DESCONHECIDO"
-    categorical_columns = [
-        "Fabricante", "Modelo", "Categoria", "Tipo de Combustível", 
-        "Tipo de Câmbio", "Tração"
-    ]
-    for col in categorical_columns:
-        df[col] = df[col].fillna("DESCONHECIDO").str.strip().str.upper()
-    
-    return df
+df_tratado, impressao_base = carregar_base(file_path, os.path.getmtime(file_path))
 
-# Aplica o tratamento de valores nulos ao DataFrame principal
-data = handle_missing_values(data)
+# Índice dos filtros em cascata, montado uma vez por versão da base
+@st.cache_resource
+def carregar_indice_filtros(impressao, _df):
+    return construir_indice(_df)
 
-df_tratado = data  # Mantém uma cópia dos dados tratados para uso posterior
+indice_filtros = carregar_indice_filtros(impressao_base, df_tratado)
 
-# Lista de colunas numéricas para referência
+# Lista de colunas categóricas e numéricas para referência
+categorical_columns = COLUNAS_CATEGORICAS
 numeric_columns = ['Preço','Imposto','Quilometragem','Ano', 'Tamanho do Motor', 'Cilindros', 'Airbags']
 
+############################## 3 A 5. PRÉ-PROCESSAMENTO, DIVISÃO E TREINAMENTO DOS MODELOS ##############################
 
-###################################### 3. TRANSFORMAÇÃO E PRÉ-PROCESSAMENTO ######################################
-
-# Codificação One-Hot para colunas categóricas
-encoder = OneHotEncoder(drop="first", sparse_output=False, handle_unknown="ignore")
-categorical_columns = [
-    "Fabricante", "Modelo", "Categoria", "Tipo de Combustível", 
-    "Tipo de Câmbio", "Tração"
-]
-encoded_features = encoder.fit_transform(data[categorical_columns])
-encoded_df = pd.DataFrame(encoded_features, columns=encoder.get_feature_names_out(categorical_columns))
-
-# Combinar dados numéricos e codificados
-data = pd.concat([data.drop(columns=categorical_columns), encoded_df], axis=1)
-
-# Definir X (variáveis independentes) e y (variável dependente)
-X = data.drop(columns=["Preço"])  
-y = data["Preço"]
+# O One-Hot (esparso), a divisão treino/teste, o treino e a comparação dos modelos rodam offline
+# (python -m carros.treino). O app só carrega o artefato: codificador, melhor modelo e métricas.
+@st.cache_resource
+def carregar_modelo(arquivo, criado_em):
+    return carregar_artefato()
 
-###################################### 4. DIVISÃO EM TREINO E TESTE ######################################
-
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-###################################### 5. TREINAMENTO DOS MODELOS ######################################
-
-# Configuração dos modelos
-models = {
-    "Random Forest": RandomForestRegressor(n_estimators=50, random_state=42, n_jobs=-1),
-    "Linear Regression": LinearRegression(),
-    "Decision Tree": DecisionTreeRegressor(random_state=42, max_depth=10)
-}
-
-# Resultados dos modelos
-results = {}
-for model_name, model in models.items():
-    # Treinar o modelo
-    model.fit(X_train, y_train)
-    
-    # Fazer previsões
-    y_pred = model.predict(X_test)
-    
-    # Avaliação
-    mse = mean_squared_error(y_test, y_pred)
-    r2 = r2_score(y_test, y_pred)
-    
-    # Validação cruzada
-    cv_scores = cross_val_score(model, X, y, cv=5, n_jobs=-1)
-    mean_cv_score = np.mean(cv_scores)
-    
-    # Adicionar resultados ao dicionário
-    results[model_name] = {
-         "MSE": mse,
-         "R²": r2,
-         "CV Mean Score": mean_cv_score,
-    }
-
-# Selecionar o melhor modelo baseado no R²
-if results:  # Verificar se existem resultados
-    best_model = max(results, key=lambda x: results[x]["R²"])
-else:
-    raise ValueError("Nenhum modelo foi avaliado corretamente. Verifique os dados de entrada e a configuração dos modelos.")
+manifesto = ler_manifesto()
+if manifesto is None:
+    st.error("Nenhum modelo treinado encontrado. Execute `python -m carros.treino` na pasta do projeto e recarregue a página.")
+    st.stop()
 
-###################################### Treimanento do Melhor Modelo #########################
-x_model_1 = df_tratado.drop(columns=['Preço'])
-y_model_1 = df_tratado['Preço']
+artefato = carregar_modelo(manifesto["arquivo"], manifesto["criado_em"])
+if artefato["impressao_dados"] != impressao_base:
+    st.warning("A base de dados mudou desde o último treino. Execute `python -m carros.treino` para atualizar o modelo.")
 
-categorical_features = x_model_1.select_dtypes(include=['object']).columns
-
-preprocessor = ColumnTransformer(
-    transformers=[
-        ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_features),
-        ('num', 'passthrough', X.select_dtypes(exclude=['object']).columns)
-    ])
-
-# Dividindo os dados em treino e teste
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-model_1 = RandomForestRegressor(n_estimators=50, random_state=42, n_jobs=-1)
-model_1.fit(X_train,y_train)
-
-y_pred_m1 = model_1.predict(X_test)
+preprocessador = artefato["preprocessador"]  # One-Hot esparso (CSR) ajustado no treino
+model_1 = artefato["modelo"]  # Melhor modelo, treinado nos 80% de treino
+best_model = artefato["melhor_modelo"]
 
 
 ##################################### 6. DATA VISUALIZATION - STREAMLIT ######################################
@@ -272,15 +158,24 @@ st.write("""<div style='color:gray; font-size:14px; font-family:Arial, sans-seri
 É útil para criar regras de decisão claras, como "se a idade do carro for maior que 5 anos e a quilometragem acima de 100.000 km, o preço será reduzido em média X%". Essas regras tornam o modelo interpretável para analisar como os preços dos carros são determinados com base nas características.
 </span></div>""", unsafe_allow_html=True)
 
-# Convertendo os resultados para um DataFrame para exibição
-results_df = pd.DataFrame(results).T  
-results_df['Cross Validation Mean'] = mean_cv_score
-results_df = results_df.round({'MSE': 2, 'R²': 2, 'Cross Validation Mean': 2})
+# Tabela de resultados gravada no treino
+results_df = artefato["metricas"].round({'MSE': 2, 'R²': 2, 'Cross Validation Mean': 2, 'Tempo (s)': 2, 'Memória Pico (MB)': 1})
 
 # Exibir a tabela de resultados
 st.write("""<h4 style='color:white; font-size:15px;'> Resultados de <span style="color:#4894CA;">MSE</span>, <span style="color:#4894CA;">R²</span> e <span style="color:#4894CA;">Cross Validation</span>:</h4>""", unsafe_allow_html=True)
 st.dataframe(results_df)
 
+# Anúncios incorporados depois do último treino completo (python -m carros.incremental)
+incremental = artefato["incremental"]
+if incremental["atualizacoes"]:
+    st.caption(f"Modelo atualizado com {incremental['linhas_novas']:,} anúncios novos em {incremental['atualizacoes']} "
+               "atualizações incrementais; as métricas acima são do último treino completo.")
+
+# Tempo de parede e pico de memória de cada tarefa (modelo x partição) do pool de comparação
+with st.expander("Tempo e memória por tarefa (modelo x partição)"):
+    st.dataframe(artefato["tarefas"][["modelo", "tarefa", "segundos", "memoria_mb", "r2"]].round(
+        {"segundos": 3, "memoria_mb": 1, "r2": 3}), hide_index=True)
+
 # Exibir o nome do melhor modelo
 st.write(f"""<h4 style='color:white; font-size:15px;'> Melhor modelo: </span><span style='color:#4894CA;'>{best_model}</span></h4>""", unsafe_allow_html=True)
 
@@ -311,23 +206,15 @@ st.write(""" <div style='color:white; font-size:14px; font-family:Arial, sans-se
 
 st.write("---")
 
-# Modelos disponíveis
-models = {
-    "Random Forest": RandomForestRegressor(n_estimators=100, random_state=42),
-    "Linear Regression": LinearRegression(),
-    "Decision Tree": DecisionTreeRegressor(random_state=42)  # Adicionando o Decision Tree
-}
-
 ############################### VERIFICAR O DESEMPENHO ##################################################################################################################################
 
 # Streamlit - SelectBox para escolher o modelo
 st.write("Desempenho:")
-model_choice = st.selectbox("Escolha o modelo", options=list(models.keys()))
+model_choice = st.selectbox("Escolha o modelo", options=list(artefato["teste"]["previsoes"]))
 
-# Treinamento do modelo selecionado
-model = models[model_choice]
-model.fit(X_train, y_train)
-y_pred = model.predict(X_test)
+# Previsões de teste do modelo selecionado (calculadas no treino)
+y_test = artefato["teste"]["y"]
+y_pred = artefato["teste"]["previsoes"][model_choice]
 
 # Gráfico desempenho do modelo
 plt.figure(figsize=(8, 6), facecolor='#0F1117')
@@ -448,47 +335,49 @@ st.write("Logo marca Fabricante:")
 url_logo = filtered_data["logo"].values[0]
 st.image(url_logo, width=100)
 
-filtered_data = df_tratado[df_tratado["Fabricante"] == fabricante]
+# Filtros em cascata: cada lista de opções vem do índice pré-calculado (carros/filtros.py),
+# uma consulta por prefixo de escolhas, sem nova máscara sobre a base
+selecoes = [fabricante]
 
 # Filtro modelo
-modelo = st.selectbox("Selecione o Modelo:", sorted(filtered_data["Modelo"].unique()))
-filtered_data = filtered_data[filtered_data["Modelo"] == modelo]
+modelo = st.selectbox("Selecione o Modelo:", opcoes(indice_filtros, selecoes))
+selecoes.append(modelo)
 
 # Filtro categoria
-categoria = st.selectbox("Selecione a Categoria:", sorted(filtered_data["Categoria"].unique()))
-filtered_data = filtered_data[filtered_data["Categoria"] == categoria]
+categoria = st.selectbox("Selecione a Categoria:", opcoes(indice_filtros, selecoes))
+selecoes.append(categoria)
 
 # Filtro tipo de combustível
-tipo_combustivel = st.selectbox("Selecione o Tipo de Combustível:", sorted(filtered_data["Tipo de Combustível"].unique()))
-filtered_data = filtered_data[filtered_data["Tipo de Combustível"] == tipo_combustivel]
+tipo_combustivel = st.selectbox("Selecione o Tipo de Combustível:", opcoes(indice_filtros, selecoes))
+selecoes.append(tipo_combustivel)
 
 # Filtro câmbio
-tipo_cambio = st.selectbox("Selecione o Tipo de Câmbio:", sorted(filtered_data["Tipo de Câmbio"].unique()))
-filtered_data = filtered_data[filtered_data["Tipo de Câmbio"] == tipo_cambio]
+tipo_cambio = st.selectbox("Selecione o Tipo de Câmbio:", opcoes(indice_filtros, selecoes))
+selecoes.append(tipo_cambio)
 
 # Filtro ano
-ano = st.selectbox("Selecione o Ano:", sorted(filtered_data["Ano"].unique()))
-filtered_data = filtered_data[filtered_data["Ano"] == ano]
+ano = st.selectbox("Selecione o Ano:", opcoes(indice_filtros, selecoes))
+selecoes.append(ano)
 
 # Filtro tração
-tracao = st.selectbox("Selecione a Tração:", sorted(filtered_data["Tração"].unique()))
-filtered_data = filtered_data[filtered_data["Tração"] == tracao]
+tracao = st.selectbox("Selecione a Tração:", opcoes(indice_filtros, selecoes))
+selecoes.append(tracao)
 
 # Filtro Airbags
-Airbags = st.selectbox("Selecione a quantidade de Airbags:", sorted(filtered_data["Airbags"].unique()))
-filtered_data = filtered_data[filtered_data["Airbags"] == Airbags]
+Airbags = st.selectbox("Selecione a quantidade de Airbags:", opcoes(indice_filtros, selecoes))
+selecoes.append(Airbags)
 
 # Filtro Portas
-Portas = st.selectbox("Selecione a quantidade de Portas:", sorted(filtered_data["Portas"].unique()))
-filtered_data = filtered_data[filtered_data["Portas"] == Portas]
+Portas = st.selectbox("Selecione a quantidade de Portas:", opcoes(indice_filtros, selecoes))
+selecoes.append(Portas)
 
 # Filtro Tamanho do Motor
-t_motor = st.selectbox("Selecione Tamanho do Motor", sorted(filtered_data["Tamanho do Motor"].unique()))
-filtered_data = filtered_data[filtered_data["Tamanho do Motor"] == t_motor]
+t_motor = st.selectbox("Selecione Tamanho do Motor", opcoes(indice_filtros, selecoes))
+selecoes.append(t_motor)
 
 # Filtro Cilindros
-Cilindros = st.selectbox("Selecione a quantidade de Cilindros:", sorted(filtered_data["Cilindros"].unique()))
-filtered_data = filtered_data[filtered_data["Cilindros"] == Cilindros]
+Cilindros = st.selectbox("Selecione a quantidade de Cilindros:", opcoes(indice_filtros, selecoes))
+selecoes.append(Cilindros)
 
 # Slider do Imposto ajustado ao intervalo do DataFrame filtrado
 Imposto_min = df_tratado["Imposto"].min()
@@ -500,22 +389,11 @@ km_min = df_tratado["Quilometragem"].min()
 km_max = df_tratado["Quilometragem"].max()
 quilometragem = st.number_input("Defina a quilometragem do veículo", min_value=km_min, max_value=km_max, value=km_min)
 
-# Filtrando os dados
-filtered_data = df_tratado[
-    (df_tratado["Fabricante"] == fabricante) &
-    (df_tratado["Modelo"] == modelo) &
-    (df_tratado["Categoria"] == categoria) &
-    (df_tratado["Tipo de Combustível"] == tipo_combustivel) &
-    (df_tratado["Tipo de Câmbio"] == tipo_cambio) &
-    (df_tratado["Ano"] == ano) &
-    (df_tratado["Tração"] == tracao) &
-    (df_tratado["Portas"] == Portas) &
-    (df_tratado["Airbags"] == Airbags) &
-    (df_tratado["Tamanho do Motor"] == t_motor) &
-    (df_tratado["Cilindros"] == Cilindros) &
-    (df_tratado["Imposto"] <= Imposto) &
-    (df_tratado["Quilometragem"] <= quilometragem) 
-
+# Filtrando os dados: anúncios da combinação escolhida (índice) limitados por imposto e quilometragem
+filtered_data = df_tratado.iloc[linhas(indice_filtros, selecoes)]
+filtered_data = filtered_data[
+    (filtered_data["Imposto"] <= Imposto) &
+    (filtered_data["Quilometragem"] <= quilometragem)
 ]
 
 # Verificação para evitar erros se não houver dados filtrados
@@ -567,18 +445,11 @@ def predict_price(fabricante, modelo, categoria, ano, tipo_combustivel, tipo_cam
             st.error(f"Falta a coluna categórica {col} nos dados de entrada.")
             return None
 
-    # Codificar as variáveis categóricas com o OneHotEncoder
-    input_encoded = encoder.transform(input_df[categorical_columns])
-
-    # Converter os dados de entrada para o formato correto
-    input_final = pd.concat(
-        [input_df.drop(columns=categorical_columns), 
-         pd.DataFrame(input_encoded, columns=encoder.get_feature_names_out(categorical_columns))],
-        axis=1
-    )
+    # Codificar as variáveis categóricas com o pré-processador do treino (matriz CSR)
+    input_final = codificar(preprocessador, input_df)
 
-    # Fazer a previsão usando o melhor modelo
-    predicted_price = model_1.predict(input_final)
+    # Fazer a previsão usando o melhor modelo (árvores compiladas do artefato, sem o overhead do predict)
+    predicted_price = prever_modelo(artefato, input_final)
 
     return predicted_price[0]
 
@@ -591,6 +462,20 @@ if preco_estimado is not None:
         unsafe_allow_html=True
     )
 ps = preco_estimado
+
+# Anúncios comparáveis: os anúncios da base mais parecidos com o veículo configurado (KD-trees do treino)
+veiculo = {
+    'Imposto': Imposto, 'Fabricante': fabricante, 'Modelo': modelo, 'Ano': ano, 'Categoria': categoria,
+    'Tipo de Combustível': tipo_combustivel, 'Tamanho do Motor': t_motor, 'Quilometragem': quilometragem,
+    'Cilindros': Cilindros, 'Tipo de Câmbio': tipo_cambio, 'Tração': tracao, 'Portas': Portas, 'Airbags': Airbags,
+}
+inicio_comparaveis = time.perf_counter()
+comparaveis = buscar_comparaveis(artefato["comparaveis"], veiculo)
+segundos_comparaveis = time.perf_counter() - inicio_comparaveis
+st.write(f"Anúncios comparáveis — mediana <span style='color:#4894CA'>$ {comparaveis['Preço'].median():.2f}</span> "
+         f"<span style='color:gray; font-size:12px;'>(busca em {segundos_comparaveis * 1000:.1f} ms)</span>",
+         unsafe_allow_html=True)
+st.dataframe(comparaveis.round({'Distância': 2}), hide_index=True)
 st.write("---")
 
 # Preço Anúncio
@@ -604,7 +489,40 @@ st.markdown(
 # Calcular margem do preço anúncio
 if preco_medio > 0:  # Evitar divisão por zero
     margem_preco_anuncio = (preco_anuncio - preco_medio) / preco_medio * 100
-    st.write("Margem Preço Anúncio: {margem_preco_anuncio:.2f}%")
+    st.write(f"Margem Preço Anúncio: {margem_preco_anuncio:.2f}%")
+
+st.write("---")
+
+# Precificação em lote: estoque inteiro (CSV ou Parquet) em um único transform + predict
+st.write("### Precificação em Lote")
+st.write("""<div style='color:gray; font-size:14px; font-family:Arial, sans-serif; margin-left:20px; margin-bottom:10px;'> Envie o estoque com as colunas do app (Fabricante, Modelo, Ano...) ou no formato original do Kaggle. Também disponível por linha de comando: <span style="color:#4894CA;">python -m carros.lote estoque.csv --saida precos.csv</span></div>""", unsafe_allow_html=True)
+
+@st.cache_data(max_entries=4)
+def precificar_estoque(conteudo, nome, arquivo_modelo, criado_em):
+    # O artefato não entra no hash do cache; nome do arquivo e data de criação identificam a versão
+    # (a atualização incremental regrava o mesmo arquivo, só criado_em muda)
+    entrada = ler_tabela(io.BytesIO(conteudo), nome)
+    inicio = time.perf_counter()
+    resultado = prever_lote(artefato, entrada)
+    return resultado, time.perf_counter() - inicio
+
+estoque = st.file_uploader("Arquivo do estoque (CSV ou Parquet)", type=["csv", "parquet"])
+if estoque is not None:
+    try:
+        precos_lote, segundos_lote = precificar_estoque(estoque.getvalue(), estoque.name, manifesto["arquivo"],
+                                                         manifesto["criado_em"])
+    except (ValueError, KeyError) as erro_lote:
+        st.error(f"Não foi possível precificar o arquivo: {erro_lote}")
+    else:
+        st.write(f"{len(precos_lote):,} veículos precificados em {segundos_lote:.2f}s "
+                 f"({len(precos_lote) / max(segundos_lote, 1e-9):,.0f} veículos/s)")
+        st.dataframe(precos_lote.head(100))
+        st.download_button(
+            "Baixar preços sugeridos (CSV)",
+            data=precos_lote.to_csv(index=False).encode("utf-8"),
+            file_name=os.path.splitext(estoque.name)[0] + "_precos.csv",
+            mime="text/csv",
+        )
 
 ####################################### 7. INTEGRAÇÃO MODELO DE CLASSIFICAÇÃO E MATRIZ DE CONFUSÃO ###########
 
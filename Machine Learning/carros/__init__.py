@@ -0,0 +1,8 @@
+"""
+Pacote de apoio ao app de previsão de preços de veículos (car1.py).
+
+O tratamento dos dados e o treino dos modelos ficam aqui, fora do Streamlit:
+`python -m carros.treino` grava o artefato versionado e o app apenas o carrega.
+"""
+
+from .dados import carregar_dados
@@ -0,0 +1,249 @@
+"""
+Busca de hiperparâmetros com orçamento (Hyperband / successive halving).
+
+Uma grade completa sobre Random Forest e Árvore de Decisão é cara demais
+neste pipeline. O Hyperband sorteia configurações e as avalia com pouco
+recurso (uma fração das linhas de treino e, no Random Forest, também uma
+fração das árvores); só o melhor terço (eta = 3) de cada rodada segue para
+a seguinte com o triplo de recurso, até o recurso completo. Vários
+colchetes (brackets) equilibram "muitas configurações baratas" e "poucas
+configurações completas".
+
+- A avaliação usa só a parte de treino da divisão 80/20: 80% para ajustar
+  e 20% para validar (R²). O conjunto de teste das métricas do app não é
+  usado na busca.
+- As tentativas de cada rodada rodam em paralelo (joblib), com os dados
+  abertos por mmap como na comparação (carros/comparacao.py).
+- Cada resultado é gravado em disco com a chave (modelo, parâmetros,
+  recurso, impressão digital dos dados): uma busca interrompida retoma de
+  onde parou e repetir a busca com os mesmos dados não treina nada.
+
+    python -m carros.busca [--modelos "Random Forest,Decision Tree"] [--n-jobs -1]
+    python -m carros.treino --busca    # busca (ou cache) + treino com os vencedores
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+
+from .comparacao import densificar, particoes, precisa_denso
+
+VERSAO_BUSCA = 1
+NOME_PASTA_BUSCA = "busca"
+ETA = 3
+# Menor fração de recurso de uma tentativa (1/9 com eta = 3: três rodadas)
+RECURSO_MINIMO = 1 / 9
+# Número de árvores do Random Forest com recurso completo
+ARVORES_MAXIMO = 50
+
+ESPACOS = {
+    "Random Forest": {
+        "max_depth": [None, 10, 20, 30],
+        "min_samples_leaf": [1, 2, 4, 8],
+        "max_features": [1.0, 0.5, 0.3, "sqrt"],
+    },
+    "Decision Tree": {
+        "max_depth": [5, 10, 15, 20, None],
+        "min_samples_leaf": [1, 2, 5, 10, 20],
+        "min_samples_split": [2, 5, 10, 20],
+    },
+}
+
+
+def sortear_configuracoes(espaco, n, gerador):
+    """Até `n` combinações distintas sorteadas do espaço (dicionário de listas)."""
+    nomes = sorted(espaco)
+    total = math.prod(len(espaco[nome]) for nome in nomes)
+    escolhidas, vistas = [], set()
+    while len(escolhidas) < min(n, total):
+        configuracao = {nome: espaco[nome][gerador.integers(len(espaco[nome]))] for nome in nomes}
+        chave = json.dumps(configuracao, sort_keys=True)
+        if chave not in vistas:
+            vistas.add(chave)
+            escolhidas.append(configuracao)
+    return escolhidas
+
+
+def colchetes(eta=ETA, recurso_minimo=RECURSO_MINIMO):
+    """
+    Colchetes do Hyperband: lista de (configurações iniciais, recurso inicial)
+    do mais exploratório (muitas configurações, pouco recurso) ao mais
+    conservador (poucas configurações, recurso completo).
+    """
+    s_max = int(round(math.log(1 / recurso_minimo, eta)))
+    return [
+        (int(math.ceil((s_max + 1) / (s + 1) * eta ** s)), float(eta) ** -s)
+        for s in range(s_max, -1, -1)
+    ]
+
+
+def parametros_com_recurso(nome, parametros, recurso):
+    """Parâmetros efetivos de uma tentativa: no Random Forest o recurso também limita as árvores."""
+    if nome == "Random Forest":
+        return {**parametros, "n_estimators": max(5, int(round(ARVORES_MAXIMO * recurso)))}
+    return dict(parametros)
+
+
+def chave_tentativa(nome, parametros, recurso, impressao, semente):
+    conteudo = json.dumps(
+        {"versao": VERSAO_BUSCA, "modelo": nome, "parametros": parametros,
+         "recurso": round(recurso, 6), "dados": impressao, "semente": semente},
+        sort_keys=True,
+    )
+    return hashlib.sha1(conteudo.encode()).hexdigest()[:20]
+
+
+def ler_tentativa(pasta, chave):
+    try:
+        with open(os.path.join(pasta, chave + ".json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def gravar_tentativa(pasta, chave, resultado):
+    caminho = os.path.join(pasta, chave + ".json")
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def avaliar_tentativa(caminho, nome, modelo, parametros, recurso, denso, pasta, chave):
+    """Ajusta com a fração `recurso` das linhas de ajuste e mede o R² na validação; grava no cache."""
+    inicio = time.perf_counter()
+    dados = joblib.load(caminho, mmap_mode="r")
+    X, y, ajuste, validacao = dados["X"], dados["y"], dados["ajuste"], dados["validacao"]
+    linhas = ajuste[:max(2, int(round(len(ajuste) * recurso)))]
+    modelo = clone(modelo).set_params(**parametros_com_recurso(nome, parametros, recurso))
+    if "n_jobs" in modelo.get_params():
+        modelo.set_params(n_jobs=1)
+    modelo.fit(densificar(X[linhas]) if denso else X[linhas], y[linhas])
+    resultado = {
+        "modelo": nome,
+        "parametros": parametros,
+        "recurso": recurso,
+        "r2": float(r2_score(y[validacao], modelo.predict(X[validacao]))),
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+    gravar_tentativa(pasta, chave, resultado)
+    return resultado
+
+
+def buscar(X, y, impressao, modelos, pasta_cache, espacos=ESPACOS, eta=ETA,
+           recurso_minimo=RECURSO_MINIMO, n_jobs=-1, semente=42):
+    """
+    Hyperband para cada modelo de `modelos` com espaço em `espacos`.
+
+    Retorna {nome: {"parametros", "r2", "tentativas": DataFrame}}; o vencedor
+    é a configuração de maior R² de validação entre as avaliadas com o
+    recurso completo (incluindo a configuração atual do modelo).
+    """
+    os.makedirs(pasta_cache, exist_ok=True)
+    y = np.asarray(y)
+    treino = particoes(X.shape[0], cv=0, random_state=semente)["teste"][0]
+    ajuste, validacao = train_test_split(treino, test_size=0.2, random_state=semente)
+    # Ordem aleatória fixa: as subamostras de recurso r são prefixos, aninhadas entre as rodadas
+    ajuste = np.random.default_rng(semente).permutation(ajuste)
+
+    pasta_dados = tempfile.mkdtemp(prefix="carros_busca_")
+    resultados = {}
+    try:
+        caminho = os.path.join(pasta_dados, "dados.joblib")
+        joblib.dump({"X": X, "y": y, "ajuste": ajuste, "validacao": validacao}, caminho)
+        with Parallel(n_jobs=n_jobs) as paralelo:
+            for nome, modelo in modelos.items():
+                if nome not in espacos:
+                    continue
+                denso = precisa_denso(nome, modelo)
+                gerador = np.random.default_rng(semente)
+                tentativas = []
+                # A configuração atual do candidato sempre concorre com recurso completo:
+                # a busca só a troca por outra melhor na validação
+                atual = {parametro: modelo.get_params()[parametro] for parametro in espacos[nome]}
+                for n, recurso in colchetes(eta, recurso_minimo):
+                    vivas = sortear_configuracoes(espacos[nome], n, gerador)
+                    if recurso >= 1 - 1e-9:
+                        vivas = [atual] + [c for c in vivas if c != atual][:n - 1]
+                    while vivas:
+                        rodada = []
+                        pendentes = []
+                        for parametros in vivas:
+                            chave = chave_tentativa(nome, parametros, recurso, impressao, semente)
+                            anterior = ler_tentativa(pasta_cache, chave)
+                            if anterior is not None:
+                                rodada.append({**anterior, "cache": True})
+                            else:
+                                pendentes.append((parametros, chave))
+                        rodada += [
+                            {**r, "cache": False}
+                            for r in paralelo(
+                                delayed(avaliar_tentativa)(caminho, nome, modelo, parametros, recurso, denso, pasta_cache, chave)
+                                for parametros, chave in pendentes
+                            )
+                        ]
+                        tentativas += rodada
+                        if recurso >= 1 - 1e-9:
+                            break
+                        # Successive halving: o melhor 1/eta segue com eta vezes mais recurso
+                        rodada.sort(key=lambda r: r["r2"], reverse=True)
+                        vivas = [r["parametros"] for r in rodada[:max(1, len(rodada) // eta)]]
+                        recurso = min(1.0, recurso * eta)
+                tabela = pd.DataFrame(tentativas)
+                completas = tabela[tabela["recurso"] >= 1 - 1e-9]
+                melhor = completas.loc[completas["r2"].idxmax()]
+                resultados[nome] = {"parametros": melhor["parametros"], "r2": float(melhor["r2"]), "tentativas": tabela}
+    finally:
+        shutil.rmtree(pasta_dados, ignore_errors=True)
+    return resultados
+
+
+def aplicar_parametros(modelos, resultados):
+    """Aplica aos modelos candidatos os parâmetros vencedores da busca (in-place)."""
+    for nome, resultado in resultados.items():
+        if nome in modelos:
+            modelos[nome].set_params(**resultado["parametros"])
+    return modelos
+
+
+def main(argv=None):
+    from .dados import ALVO, ARQUIVO_PADRAO, carregar_dados, colunas_entrada, impressao_dados
+    from .treino import PASTA_ARTEFATOS, ajustar_preprocessador, codificar, modelos_candidatos
+
+    parser = argparse.ArgumentParser(description="Busca de hiperparâmetros (Hyperband) dos modelos de preço.")
+    parser.add_argument("--dados", default=ARQUIVO_PADRAO, help="CSV da base (car_price_prediction.csv)")
+    parser.add_argument("--modelos", default=",".join(ESPACOS), help='ex.: "Random Forest,Decision Tree"')
+    parser.add_argument("--cache", default=os.path.join(PASTA_ARTEFATOS, NOME_PASTA_BUSCA), help="pasta do cache das tentativas")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="tentativas em paralelo (-1 = todos os núcleos)")
+    args = parser.parse_args(argv)
+
+    df = carregar_dados(args.dados)
+    colunas = colunas_entrada(df)
+    X = codificar(ajustar_preprocessador(df, colunas), df[colunas])
+    nomes = [nome.strip() for nome in args.modelos.split(",")]
+    modelos = {nome: modelo for nome, modelo in modelos_candidatos().items() if nome in nomes}
+
+    inicio = time.perf_counter()
+    resultados = buscar(X, df[ALVO], impressao_dados(df), modelos, args.cache, n_jobs=args.n_jobs)
+    for nome, resultado in resultados.items():
+        tentativas = resultado["tentativas"]
+        print(f"{nome}: R² validação {resultado['r2']:.3f} com {resultado['parametros']} "
+              f"({len(tentativas)} tentativas, {int(tentativas['cache'].sum())} do cache)")
+    print(f"{time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
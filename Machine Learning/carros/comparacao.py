@@ -0,0 +1,188 @@
+"""
+Comparação paralela dos modelos (seção 5 do car1.py) em um único pool.
+
+Cada par (modelo x partição) vira uma tarefa: a divisão treino/teste 80/20
+(MSE, R² e previsões de teste) e cada dobra da validação cruzada (R²). Todas
+as tarefas vão para o mesmo pool de processos (joblib/loky), sem um novo
+pool por cross_val_score. A matriz CSR, o alvo e os índices das partições
+são gravados uma única vez em disco e abertos com mmap pelos processos: cada
+tarefa recebe só o caminho, o nome do modelo e a partição, sem serializar X
+de novo.
+
+Para cada tarefa são medidos o tempo de parede e o pico de memória (RSS do
+processo durante a tarefa, acima do RSS do início), exibidos ao lado da
+tabela de MSE/R²/CV.
+"""
+
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import KFold, train_test_split
+from sklearn.utils import get_tags
+
+# Intervalo entre as leituras de RSS durante uma tarefa (segundos)
+INTERVALO_MEMORIA = 0.005
+# Modelos treinados na matriz densa: o splitter esparso das árvores profundas
+# com bootstrap do Random Forest é ~30% mais lento que o denso nesta base
+# (a Árvore de Decisão com max_depth=10 é ~4x mais rápida no esparso)
+MODELOS_DENSOS = {"Random Forest"}
+
+
+def precisa_denso(nome, modelo):
+    return nome in MODELOS_DENSOS or not get_tags(modelo).input_tags.sparse
+
+
+def densificar(X):
+    """Cópia densa float32 em ordem Fortran (formato usado internamente pelas árvores)."""
+    return X.astype(np.float32).toarray(order="F")
+
+
+def rss_atual_mb():
+    """RSS atual do processo (Linux; None em outros sistemas)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def rss_pico_mb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return pico / 2**20 if sys.platform == "darwin" else pico / 2**10
+
+
+class MedidorMemoria:
+    """Pico de RSS enquanto ativo, por amostragem em uma thread (ru_maxrss fora do Linux)."""
+
+    def __init__(self, intervalo=INTERVALO_MEMORIA):
+        self.intervalo = intervalo
+        self.inicial = rss_atual_mb()
+        self.pico = self.inicial
+        self.parar = threading.Event()
+        self.thread = None
+
+    def amostrar(self):
+        while not self.parar.wait(self.intervalo):
+            self.pico = max(self.pico, rss_atual_mb())
+
+    def __enter__(self):
+        if self.inicial is not None:
+            self.thread = threading.Thread(target=self.amostrar, daemon=True)
+            self.thread.start()
+        return self
+
+    def __exit__(self, *erro):
+        self.parar.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.pico = max(self.pico, rss_atual_mb())
+
+    def acrescimo_mb(self):
+        if self.inicial is None:
+            return rss_pico_mb()
+        return self.pico - self.inicial
+
+
+def particoes(n, cv=5, random_state=42):
+    """{"teste": (treino, teste), ("cv", i): (treino, teste)}: 80/20 e as dobras de KFold sem embaralhar."""
+    treino, teste = train_test_split(np.arange(n), test_size=0.2, random_state=random_state)
+    resultado = {"teste": (treino, teste)}
+    if cv:
+        for i, (treino_cv, teste_cv) in enumerate(KFold(n_splits=cv).split(np.empty((n, 1)))):
+            resultado[("cv", i)] = (treino_cv, teste_cv)
+    return resultado
+
+
+def executar_tarefa(caminho, nome, modelo, particao, denso):
+    """Treina `modelo` na partição e avalia; roda dentro de um processo do pool."""
+    inicio = time.perf_counter()
+    with MedidorMemoria() as memoria:
+        dados = joblib.load(caminho, mmap_mode="r")
+        X, y = dados["X"], dados["y"]
+        treino, teste = dados["particoes"][particao]
+        modelo = clone(modelo)
+        if "n_jobs" in modelo.get_params():
+            # O paralelismo é entre tarefas; dentro de cada uma, um núcleo
+            modelo.set_params(n_jobs=1)
+        X_treino = X[treino]
+        modelo.fit(densificar(X_treino) if denso else X_treino, y[treino])
+        previsoes = modelo.predict(X[teste])
+    resultado = {
+        "modelo": nome,
+        "tarefa": "teste" if particao == "teste" else f"dobra {particao[1] + 1}",
+        "segundos": time.perf_counter() - inicio,
+        "memoria_mb": memoria.acrescimo_mb(),
+        "processo": os.getpid(),
+        "r2": r2_score(y[teste], previsoes),
+    }
+    if particao == "teste":
+        resultado["mse"] = mean_squared_error(y[teste], previsoes)
+        resultado["previsoes"] = previsoes
+        resultado["estimador"] = modelo
+    return resultado
+
+
+def comparar_modelos(X, y, modelos, cv=5, random_state=42, n_jobs=-1):
+    """
+    Avalia todos os modelos em paralelo. Retorna (métricas, modelos treinados
+    na divisão 80/20, y_test, previsões de teste por modelo, tarefas), com
+    tempo e memória de cada tarefa em `tarefas` e os totais por modelo nas
+    métricas.
+    """
+    y = np.asarray(y)
+    divisoes = particoes(X.shape[0], cv, random_state)
+    pasta = tempfile.mkdtemp(prefix="carros_comparacao_")
+    try:
+        caminho = os.path.join(pasta, "dados.joblib")
+        joblib.dump({"X": X, "y": y, "particoes": divisoes}, caminho)
+        tarefas = [
+            (nome, modelo, particao, precisa_denso(nome, modelo))
+            for nome, modelo in modelos.items()
+            for particao in divisoes
+        ]
+        # As tarefas mais longas (modelos densos) entram primeiro no pool
+        tarefas.sort(key=lambda tarefa: not tarefa[3])
+        resultados = Parallel(n_jobs=n_jobs)(
+            delayed(executar_tarefa)(caminho, nome, modelo, particao, denso)
+            for nome, modelo, particao, denso in tarefas
+        )
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    tabela = pd.DataFrame([
+        {chave: valor for chave, valor in r.items() if chave not in ("previsoes", "estimador")}
+        for r in resultados
+    ])
+    treinados, previsoes, metricas = {}, {}, {}
+    for r in resultados:
+        if r["tarefa"] == "teste":
+            estimador = r["estimador"]
+            if "n_jobs" in estimador.get_params():
+                estimador.set_params(n_jobs=modelos[r["modelo"]].get_params()["n_jobs"])
+            treinados[r["modelo"]] = estimador
+            previsoes[r["modelo"]] = r["previsoes"]
+    for nome in modelos:
+        do_modelo = tabela[tabela["modelo"] == nome]
+        teste = do_modelo[do_modelo["tarefa"] == "teste"].iloc[0]
+        dobras = do_modelo[do_modelo["tarefa"] != "teste"]
+        metricas[nome] = {
+            "MSE": teste["mse"],
+            "R²": teste["r2"],
+            "Cross Validation Mean": dobras["r2"].mean() if len(dobras) else np.nan,
+            "Tempo (s)": do_modelo["segundos"].sum(),
+            "Memória Pico (MB)": do_modelo["memoria_mb"].max(),
+        }
+    tarefas = tabela.drop(columns="mse")
+    return pd.DataFrame(metricas).T, treinados, y[divisoes["teste"][1]], previsoes, tarefas
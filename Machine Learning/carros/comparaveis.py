@@ -0,0 +1,129 @@
+"""
+Índice de anúncios comparáveis: os k anúncios da base mais parecidos com um
+veículo configurado no app, com os seus preços.
+
+A distância entre dois veículos soma, ao quadrado:
+
+- a diferença das colunas numéricas, centradas na mediana e divididas pelo
+  intervalo interquartil (robusto aos valores extremos de quilometragem e
+  imposto);
+- PESOS[coluna]² para cada coluna categórica diferente (distância de
+  Hamming ponderada). O modelo é sempre o par (fabricante, modelo): o
+  "300" da Chrysler e o da Mercedes-Benz são modelos diferentes.
+
+As categóricas de poucos valores (categoria, combustível, câmbio, tração)
+entram nas árvores como One-Hot escalado por peso/√2, o que reproduz
+exatamente esse termo. Fabricante e modelo (mais de 1.500 valores) não:
+elas viram níveis do índice, como nos filtros do app, com uma KD-tree por
+modelo, uma por fabricante e uma global. A busca começa no mesmo modelo e só
+desce de nível (somando a penalidade do modelo e, depois, a do fabricante)
+enquanto um anúncio de outro grupo ainda puder ficar mais perto que o
+k-ésimo encontrado. O resultado é o k-NN exato da distância acima.
+
+Montado no treino completo (também nas reconstruções do treino incremental)
+e gravado no artefato; cada consulta são até três buscas em KD-trees, cerca
+de 2 ms.
+"""
+
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from .dados import ALVO, COLUNAS_CATEGORICAS
+
+# Níveis do índice, do mais geral ao mais específico
+NIVEIS = ["Fabricante", "Modelo"]
+# Custo (em intervalos interquartis) de cada coluna categórica diferente
+PESOS = {
+    "Fabricante": 2.0,
+    "Modelo": 2.0,
+    "Categoria": 1.0,
+    "Tipo de Combustível": 1.0,
+    "Tipo de Câmbio": 1.0,
+    "Tração": 1.0,
+}
+K_PADRAO = 5
+
+
+def escalas_robustas(df, colunas):
+    """Mediana e intervalo interquartil (desvio padrão, ou 1, quando o intervalo é zero)."""
+    centro = df[colunas].median().to_numpy(dtype=np.float64)
+    escala = (df[colunas].quantile(0.75) - df[colunas].quantile(0.25)).to_numpy(dtype=np.float64)
+    desvio = df[colunas].std().fillna(0).to_numpy(dtype=np.float64)
+    escala = np.where(escala > 0, escala, np.where(desvio > 0, desvio, 1.0))
+    return centro, escala
+
+
+def vetores(indice, df):
+    """Coordenadas dos veículos de `df` no espaço das KD-trees."""
+    partes = [(df[indice["numericas"]].to_numpy(dtype=np.float64) - indice["centro"]) / indice["escala"]]
+    for coluna, categorias in indice["categorias"].items():
+        partes.append(
+            (df[coluna].to_numpy(dtype=object)[:, None] == categorias[None, :]) * (PESOS[coluna] / np.sqrt(2))
+        )
+    return np.hstack(partes)
+
+
+def vetor(indice, veiculo):
+    """Coordenadas de um único veículo (dicionário), as mesmas de vetores() sem montar um DataFrame."""
+    numericas = np.array([veiculo[coluna] for coluna in indice["numericas"]], dtype=np.float64)
+    partes = [(numericas - indice["centro"]) / indice["escala"]]
+    for coluna, categorias in indice["categorias"].items():
+        partes.append((categorias == veiculo[coluna]) * (PESOS[coluna] / np.sqrt(2)))
+    return np.concatenate(partes)[None, :]
+
+
+def construir_comparaveis(df, colunas):
+    """
+    Índice {"numericas", "centro", "escala", "categorias", "penalidades",
+    "arvores": {prefixo: KDTree}, "linhas": {prefixo: posições}, "anuncios"}.
+    """
+    numericas = [coluna for coluna in colunas if coluna not in COLUNAS_CATEGORICAS]
+    centro, escala = escalas_robustas(df, numericas)
+    indice = {
+        "numericas": numericas,
+        "centro": centro,
+        "escala": escala,
+        "categorias": {
+            coluna: np.array(sorted(df[coluna].unique()), dtype=object)
+            for coluna in COLUNAS_CATEGORICAS if coluna not in NIVEIS
+        },
+        # Penalidade (ao quadrado) dos anúncios encontrados no nível j: níveis a partir de j diferentes
+        "penalidades": [sum(PESOS[nivel] ** 2 for nivel in NIVEIS[j:]) for j in range(len(NIVEIS) + 1)],
+        "anuncios": df[colunas + [ALVO]].reset_index(drop=True),
+    }
+    pontos = vetores(indice, df)
+
+    linhas = {(): np.arange(len(df))}
+    for j in range(1, len(NIVEIS) + 1):
+        grupos = df.groupby(NIVEIS[:j], sort=False).indices
+        linhas.update({chave if isinstance(chave, tuple) else (chave,): posicoes for chave, posicoes in grupos.items()})
+    indice["linhas"] = linhas
+    indice["arvores"] = {prefixo: KDTree(pontos[posicoes]) for prefixo, posicoes in linhas.items()}
+    return indice
+
+
+def buscar_comparaveis(indice, veiculo, k=K_PADRAO):
+    """
+    Os k anúncios mais parecidos com `veiculo` (dicionário coluna -> valor),
+    em ordem de distância, com a coluna "Distância".
+    """
+    x = vetor(indice, veiculo)
+    chave = tuple(veiculo[nivel] for nivel in NIVEIS)
+    penalidades = indice["penalidades"]
+    melhores = {}
+    for j in range(len(NIVEIS), -1, -1):
+        prefixo = chave[:j]
+        if prefixo in indice["arvores"]:
+            posicoes = indice["linhas"][prefixo]
+            distancias, vizinhos = indice["arvores"][prefixo].query(x, k=min(k, len(posicoes)))
+            for distancia, vizinho in zip(distancias[0], vizinhos[0]):
+                linha = int(posicoes[vizinho])
+                # Um anúncio do grupo mais específico já apareceu antes com a distância correta (menor)
+                melhores.setdefault(linha, float(np.sqrt(distancia ** 2 + penalidades[j])))
+        # Anúncios fora deste grupo estão a pelo menos sqrt(penalidade do nível anterior)
+        if j and len(melhores) >= k and sorted(melhores.values())[k - 1] <= np.sqrt(penalidades[j - 1]):
+            break
+    escolhidos = sorted(melhores.items(), key=lambda item: (item[1], item[0]))[:k]
+    return indice["anuncios"].take([linha for linha, _ in escolhidos]).assign(
+        **{"Distância": [distancia for _, distancia in escolhidos]}
+    )
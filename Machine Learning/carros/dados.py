@@ -0,0 +1,90 @@
+"""
+Extração e tratamento da base car_price_prediction.csv.
+
+Mesmas etapas das seções 1 e 2 do car1.py (exclusão de colunas, nomes em
+português, conversão dos tipos e tratamento de nulos), para que o treino
+offline e o app usem exatamente os mesmos dados tratados.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+
+PASTA_PADRAO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARQUIVO_PADRAO = os.path.join(PASTA_PADRAO, "car_price_prediction.csv")
+
+# Colunas consideradas irrelevantes para a análise e predição de preço
+COLUNAS_DESCARTADAS = ["Leather interior", "Wheel", "Color", "ID"]
+
+NOMES_COLUNAS = {
+    "Engine volume": "Tamanho do Motor",
+    "Price": "Preço",
+    "Manufacturer": "Fabricante",
+    "Model": "Modelo",
+    "Prod. year": "Ano",
+    "Category": "Categoria",
+    "Fuel type": "Tipo de Combustível",
+    "Mileage": "Quilometragem",
+    "Gear box type": "Tipo de Câmbio",
+    "Drive wheels": "Tração",
+    "Levy": "Imposto",
+    "Cylinders": "Cilindros",
+    "Doors": "Portas",
+}
+
+ALVO = "Preço"
+COLUNAS_CATEGORICAS = ["Fabricante", "Modelo", "Categoria", "Tipo de Combustível", "Tipo de Câmbio", "Tração"]
+COLUNAS_IMPUTADAS = ["Preço", "Imposto", "Quilometragem", "Tamanho do Motor", "Cilindros"]
+PORTAS = {"04-May": 4, "02-Mar": 2, ">5": 5}
+
+
+def tratar_valores_nulos(df):
+    """Mediana nas colunas numéricas e "DESCONHECIDO" nas categóricas (texto em maiúsculas)."""
+    df[COLUNAS_IMPUTADAS] = SimpleImputer(strategy="median").fit_transform(df[COLUNAS_IMPUTADAS])
+    for coluna in COLUNAS_CATEGORICAS:
+        df[coluna] = df[coluna].fillna("DESCONHECIDO").str.strip().str.upper()
+    return df
+
+
+def converter_tipos(data):
+    """
+    Converte para número as colunas que a base traz como texto (motor, km,
+    imposto e portas). Colunas já numéricas ficam como estão.
+    """
+    # Remove 'Turbo' e 'km' e converte para número; '-' no imposto vira NaN
+    for coluna, sufixo in [("Tamanho do Motor", "Turbo"), ("Quilometragem", "km")]:
+        if not pd.api.types.is_numeric_dtype(data[coluna]):
+            data[coluna] = pd.to_numeric(data[coluna].astype(str).str.replace(sufixo, ""), errors="coerce")
+    data["Imposto"] = pd.to_numeric(data["Imposto"].astype(str).replace("-", np.nan), errors="coerce")
+
+    # Corrige os valores inconsistentes de portas ('04-May' -> 4)
+    if not pd.api.types.is_numeric_dtype(data["Portas"]):
+        data["Portas"] = pd.to_numeric(data["Portas"].astype(object).replace(PORTAS), errors="coerce")
+    return data
+
+
+def tratar(data):
+    """Base bruta (colunas do Kaggle) -> DataFrame tratado (df_tratado do app)."""
+    data = converter_tipos(data.drop(columns=COLUNAS_DESCARTADAS).rename(columns=NOMES_COLUNAS))
+    data["Portas"] = data["Portas"].astype(np.int64)
+    return tratar_valores_nulos(data)
+
+
+def carregar_dados(caminho=ARQUIVO_PADRAO):
+    """Lê e trata o CSV da base de veículos."""
+    return tratar(pd.read_csv(caminho))
+
+
+def colunas_entrada(df):
+    """Colunas de entrada dos modelos (todas menos o preço), na ordem da base."""
+    return [coluna for coluna in df.columns if coluna != ALVO]
+
+
+def impressao_dados(df):
+    """Impressão digital (sha1) do DataFrame tratado."""
+    h = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update("|".join(df.columns).encode())
+    return h.hexdigest()[:16]
@@ -0,0 +1,60 @@
+"""
+Índice dos filtros em cascata do app (Fabricante -> Modelo -> ... -> Cilindros).
+
+Cada selectbox depende das escolhas anteriores. Em vez de uma nova máscara
+booleana sobre a base a cada filtro, o índice guarda, para cada prefixo de
+escolhas (tupla), a lista já ordenada de opções do nível seguinte, e para
+cada combinação completa os números de linha dos anúncios. Montado uma
+única vez a partir das combinações distintas; cada consulta é um acesso a
+dicionário, cujo custo não cresce com o número de anúncios.
+"""
+
+import numpy as np
+
+# Ordem dos filtros no app
+NIVEIS = [
+    "Fabricante", "Modelo", "Categoria", "Tipo de Combustível", "Tipo de Câmbio",
+    "Ano", "Tração", "Airbags", "Portas", "Tamanho do Motor", "Cilindros",
+]
+
+
+def valor_python(valor):
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+def construir_indice(df, niveis=NIVEIS):
+    """
+    {"niveis", "opcoes": {prefixo: [opções ordenadas]}, "linhas": {combinação: posições}}.
+
+    As opções ficam na mesma ordem de sorted() dos valores, como nos selectbox do app.
+    """
+    # Com as combinações ordenadas por todos os níveis, as opções de cada
+    # prefixo aparecem em sequência e já em ordem: uma única passada basta
+    combinacoes = df[niveis].drop_duplicates().sort_values(niveis)
+    opcoes = {}
+    for combinacao in combinacoes.itertuples(index=False, name=None):
+        for i, valor in enumerate(combinacao):
+            lista = opcoes.setdefault(combinacao[:i], [])
+            if not lista or lista[-1] != valor:
+                lista.append(valor)
+
+    # Linhas de cada combinação completa: ordenação estável pelo número do grupo
+    grupos = df.groupby(niveis, sort=False).ngroup().to_numpy()
+    ordem = np.argsort(grupos, kind="stable")
+    limites = np.searchsorted(grupos[ordem], np.arange(grupos.max() + 2))
+    primeiras = df[niveis].iloc[ordem[limites[:-1]]]
+    linhas = {
+        chave: ordem[limites[g]:limites[g + 1]]
+        for g, chave in enumerate(primeiras.itertuples(index=False, name=None))
+    }
+    return {"niveis": list(niveis), "opcoes": opcoes, "linhas": linhas}
+
+
+def opcoes(indice, selecoes):
+    """Opções do próximo nível dadas as escolhas anteriores (lista vazia se a combinação não existe)."""
+    return indice["opcoes"].get(tuple(valor_python(v) for v in selecoes), [])
+
+
+def linhas(indice, selecoes):
+    """Posições (iloc) dos anúncios com exatamente as escolhas de todos os níveis."""
+    return indice["linhas"].get(tuple(valor_python(v) for v in selecoes), np.empty(0, dtype=np.intp))
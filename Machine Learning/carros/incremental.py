@@ -0,0 +1,204 @@
+"""
+Treino incremental à medida que chegam novos anúncios.
+
+    python -m carros.incremental novos.csv [--reconstruir] [--busca] [--n-jobs -1]
+
+Cada lote de anúncios novos (CSV ou Parquet, colunas do app ou do Kaggle,
+com o preço) é tratado como na precificação em lote e gravado como uma nova
+partição Parquet em modelos_carros/anuncios/<impressão da base>/. O modelo
+do artefato é então atualizado só com as partições ainda não incorporadas:
+
+- Random Forest: warm_start com árvores novas ajustadas apenas nas linhas
+  novas, em número proporcional ao lote, para que o peso do lote na média
+  das árvores acompanhe a sua fração dos dados.
+- Regressão Linear: as estatísticas suficientes do artefato (n, somas, XᵀX
+  e Xᵀy) recebem as do lote e os coeficientes saem de um sistema p x p, com
+  custo que não depende do número de anúncios.
+- Árvore de Decisão: não tem forma incremental; o lote dispara um treino
+  completo.
+
+O custo de uma atualização cresce com o tamanho do lote, não com o
+histórico. As árvores novas só veem o lote e o One-Hot mantém as categorias
+do último treino completo (categorias novas são ignoradas até lá). Por isso
+um treino completo (base + todas as partições, a mesma rotina de
+carros.treino) é refeito quando as linhas novas passam de
+FRACAO_RECONSTRUCAO das linhas do último treino completo, ou com
+--reconstruir.
+"""
+
+import argparse
+import math
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from scipy import linalg
+
+from .busca import NOME_PASTA_BUSCA
+from .comparacao import densificar, precisa_denso
+from .dados import ALVO, ARQUIVO_PADRAO, NOMES_COLUNAS
+from .inferencia import compilar
+from .lote import ler_tabela, preparar_lote
+from .treino import (
+    NOME_PASTA_ARTEFATOS, PASTA_ARTEFATOS, carregar_artefato, codificar, estatisticas_lineares,
+    salvar_artefato, treinar,
+)
+
+NOME_PASTA_ANUNCIOS = "anuncios"
+# Treino completo quando as linhas novas passam desta fração das linhas do último treino completo
+FRACAO_RECONSTRUCAO = 0.25
+# Valores singulares relativos abaixo deste limite são descartados na solução da regressão linear
+CORTE_SINGULAR = 1e-10
+
+
+def preparar_anuncios(df, artefato):
+    """Anúncios novos tratados (entradas do modelo + preço); linhas sem preço são descartadas."""
+    precos = df.rename(columns=NOMES_COLUNAS)
+    if ALVO not in precos.columns:
+        raise ValueError(f"Coluna {ALVO} ausente no arquivo de anúncios")
+    anuncios = preparar_lote(df, artefato)
+    anuncios[ALVO] = pd.to_numeric(precos[ALVO], errors="coerce").to_numpy(dtype=np.float64)
+    return anuncios[anuncios[ALVO].notna()].reset_index(drop=True)
+
+
+def listar_partes(pasta):
+    if not os.path.isdir(pasta):
+        return []
+    return sorted(nome for nome in os.listdir(pasta) if nome.startswith("parte_") and nome.endswith(".parquet"))
+
+
+def gravar_parte(pasta, anuncios):
+    """Grava os anúncios como a próxima partição da pasta; devolve o nome do arquivo."""
+    os.makedirs(pasta, exist_ok=True)
+    nome = f"parte_{len(listar_partes(pasta)) + 1:05d}.parquet"
+    temporario = os.path.join(pasta, nome + ".tmp")
+    anuncios.to_parquet(temporario, index=False)
+    os.replace(temporario, os.path.join(pasta, nome))
+    return nome
+
+
+def ler_partes(pasta, nomes):
+    if not nomes:
+        return None
+    return pd.concat([pd.read_parquet(os.path.join(pasta, nome)) for nome in nomes], ignore_index=True)
+
+
+def crescer_floresta(artefato, X, y):
+    """warm_start: árvores novas ajustadas só nas linhas novas, em número proporcional a elas."""
+    modelo = artefato["modelo"]
+    estado = artefato["incremental"]
+    vistas = estado["linhas_treino"] + estado["linhas_novas"]
+    novas = max(1, math.ceil(len(modelo.estimators_) * X.shape[0] / vistas))
+    modelo.set_params(warm_start=True, n_estimators=len(modelo.estimators_) + novas)
+    modelo.fit(densificar(X) if precisa_denso(artefato["melhor_modelo"], modelo) else X, y)
+    modelo.set_params(warm_start=False)
+    return f"+{novas} árvores ({len(modelo.estimators_)} no total)"
+
+
+def resolver_estatisticas(estatisticas):
+    """
+    Coeficientes e intercepto de mínimos quadrados a partir de XᵀX e Xᵀy
+    (dados centrados, colunas escaladas pelo desvio para o sistema não perder
+    precisão com atributos de escalas muito diferentes).
+    """
+    n = estatisticas["n"]
+    media_x = estatisticas["soma_x"] / n
+    media_y = estatisticas["soma_y"] / n
+    a = estatisticas["xtx"] - n * np.outer(media_x, media_x)
+    b = estatisticas["xty"] - n * media_x * media_y
+    escala = np.sqrt(np.clip(np.diag(a), 0, None))
+    escala[escala == 0] = 1
+    z = linalg.lstsq(a / escala[:, None] / escala[None, :], b / escala, cond=CORTE_SINGULAR, lapack_driver="gelsy")[0]
+    coeficientes = z / escala
+    return coeficientes, media_y - media_x @ coeficientes
+
+
+def atualizar_regressao(artefato, X, y):
+    """Soma as estatísticas suficientes do lote às do artefato e resolve o sistema p x p."""
+    estado = artefato["incremental"]
+    lote = estatisticas_lineares(X, y)
+    estado["estatisticas"] = {chave: estado["estatisticas"][chave] + lote[chave] for chave in lote}
+    modelo = artefato["modelo"]
+    modelo.coef_, modelo.intercept_ = resolver_estatisticas(estado["estatisticas"])
+    return f"XᵀX/Xᵀy com {estado['estatisticas']['n']:,} linhas"
+
+
+# Modelos com atualização incremental (os demais são retreinados por completo)
+ATUALIZACOES = {
+    "Random Forest": crescer_floresta,
+    "Linear Regression": atualizar_regressao,
+}
+
+
+def atualizar_artefato(artefato, pasta_anuncios, caminho=ARQUIVO_PADRAO, reconstruir=False, cv=5,
+                       n_jobs=-1, pasta_busca=None):
+    """
+    Incorpora ao artefato as partições de `pasta_anuncios` ainda pendentes.
+    Devolve (artefato, resumo); o artefato é um novo dicionário quando há
+    treino completo.
+    """
+    inicio = time.perf_counter()
+    estado = artefato["incremental"]
+    partes = listar_partes(pasta_anuncios)
+    pendentes = [nome for nome in partes if nome not in estado["partes"]]
+    novos = ler_partes(pasta_anuncios, pendentes)
+    linhas = 0 if novos is None else len(novos)
+
+    reconstruir = reconstruir or linhas > 0 and (
+        artefato["melhor_modelo"] not in ATUALIZACOES
+        or estado["linhas_novas"] + linhas > FRACAO_RECONSTRUCAO * estado["linhas_treino"]
+    )
+    if reconstruir:
+        artefato = treinar(caminho, cv, n_jobs, pasta_busca, novos=ler_partes(pasta_anuncios, partes))
+        artefato["incremental"]["partes"] = partes
+        detalhe = f"treino completo com {len(partes)} partições ({artefato['melhor_modelo']})"
+    elif linhas:
+        X = codificar(artefato["preprocessador"], novos[artefato["colunas"]])
+        detalhe = ATUALIZACOES[artefato["melhor_modelo"]](artefato, X, novos[ALVO].to_numpy())
+        artefato["compilado"] = compilar(artefato["modelo"])
+        artefato["criado_em"] = datetime.now().isoformat(timespec="seconds")
+        estado["linhas_novas"] += linhas
+        estado["atualizacoes"] += 1
+        estado["partes"] = estado["partes"] + pendentes
+    else:
+        detalhe = "nenhum anúncio pendente"
+    return artefato, {
+        "linhas": linhas,
+        "reconstruido": reconstruir,
+        "detalhe": detalhe,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incorpora anúncios novos ao modelo de preço sem retreinar tudo.")
+    parser.add_argument("entrada", nargs="?", help="arquivo .csv ou .parquet com os anúncios novos (com o preço)")
+    parser.add_argument("--dados", default=ARQUIVO_PADRAO, help="CSV da base (car_price_prediction.csv)")
+    parser.add_argument("--saida", default=PASTA_ARTEFATOS, help=f"pasta dos artefatos (padrão: {NOME_PASTA_ARTEFATOS}/)")
+    parser.add_argument("--reconstruir", action="store_true", help="treino completo com a base e todas as partições")
+    parser.add_argument("--busca", action="store_true", help="no treino completo, busca os hiperparâmetros antes")
+    parser.add_argument("--cv", type=int, default=5, help="dobras da validação cruzada do treino completo")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="processos do treino (-1 = todos os núcleos)")
+    args = parser.parse_args(argv)
+
+    artefato = carregar_artefato(args.saida)
+    if artefato is None:
+        parser.error("nenhum modelo treinado; execute python -m carros.treino")
+    pasta_anuncios = os.path.join(args.saida, NOME_PASTA_ANUNCIOS, artefato["impressao_dados"])
+    if args.entrada:
+        anuncios = preparar_anuncios(ler_tabela(args.entrada), artefato)
+        print(f"{len(anuncios)} anúncios -> {gravar_parte(pasta_anuncios, anuncios)}")
+
+    pasta_busca = os.path.join(args.saida, NOME_PASTA_BUSCA) if args.busca else None
+    artefato, resumo = atualizar_artefato(
+        artefato, pasta_anuncios, args.dados, args.reconstruir, args.cv, args.n_jobs, pasta_busca,
+    )
+    if resumo["linhas"] or resumo["reconstruido"]:
+        salvar_artefato(artefato, args.saida)
+    print(f"{resumo['linhas']} linhas novas: {resumo['detalhe']} ({resumo['segundos']:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
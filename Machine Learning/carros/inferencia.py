@@ -0,0 +1,124 @@
+"""
+Inferência de baixa latência das árvores do modelo de preço (Random Forest
+ou Árvore de Decisão).
+
+O predict do scikit-learn para um único veículo valida a entrada e despacha
+as 50 árvores pelo joblib: cerca de 7 ms por linha, quase tudo sobrecarga.
+No treino, os nós de todas as árvores são achatados em arrays numpy
+contíguos (atributo, limiar, filhos, valor), gravados no artefato. A
+previsão desce todas as árvores ao mesmo tempo, um nível por passo, com
+meia dúzia de operações numpy por nível e sem validação nem pool.
+
+- Cada nó k ocupa a posição 2k dos arrays. Os filhos ficam em filhos[2k]
+  (esquerda) e filhos[2k + 1] (direita), então o próximo nó é
+  filhos[no + (x > limiar)].
+- As folhas apontam para si mesmas; a descida para quando todas as árvores
+  chegaram a uma folha.
+- O resultado é idêntico bit a bit ao do scikit-learn: mesma conversão para
+  float32, mesma comparação x <= limiar, mesmo desvio dos valores ausentes
+  (missing_go_to_left) e soma das árvores na ordem do predict com n_jobs=1
+  antes da divisão pelo número de árvores.
+
+As árvores do Random Forest não são podadas (até ~70 níveis); como cada
+nível custa algumas chamadas numpy, uma linha leva da ordem de 0,3 a 0,5 ms
+nesta base, contra ~7 ms do predict.
+
+Lotes grandes continuam no predict do scikit-learn (Cython, várias threads).
+"""
+
+import numpy as np
+from scipy import sparse
+
+# Valor de children_left das folhas no scikit-learn
+FOLHA = -1
+# A cada quantos níveis a descida confere se todas as árvores chegaram a uma folha
+INTERVALO_FOLHAS = 4
+# Acima deste número de linhas o predict do scikit-learn é mais rápido
+LINHAS_COMPILADAS = 64
+
+
+def compilar(modelo):
+    """Nós de todas as árvores de `modelo` em arrays contíguos, ou None se não for um modelo de árvores."""
+    arvores = getattr(modelo, "estimators_", [modelo])
+    if not all(hasattr(arvore, "tree_") for arvore in arvores) or arvores[0].tree_.n_outputs != 1:
+        return None
+    tamanhos = [arvore.tree_.node_count for arvore in arvores]
+    inicios = np.concatenate([[0], np.cumsum(tamanhos)[:-1]]).astype(np.intp)
+    total = 2 * sum(tamanhos)
+    compilado = {
+        "atributo": np.zeros(total, dtype=np.intp),
+        "limiar": np.full(total, np.inf),
+        "filhos": np.zeros(total, dtype=np.intp),
+        "valor": np.zeros(total),
+        "folha": np.zeros(total, dtype=bool),
+        "ausente_esquerda": np.zeros(total, dtype=bool),
+    }
+    for inicio, arvore in zip(inicios, arvores):
+        t = arvore.tree_
+        nos = 2 * (inicio + np.arange(t.node_count))
+        folha = t.children_left == FOLHA
+        compilado["atributo"][nos] = np.where(folha, 0, t.feature)
+        compilado["limiar"][nos] = np.where(folha, np.inf, t.threshold)
+        compilado["filhos"][nos] = np.where(folha, nos, 2 * (inicio + t.children_left))
+        compilado["filhos"][nos + 1] = np.where(folha, nos, 2 * (inicio + t.children_right))
+        compilado["valor"][nos] = t.value[:, 0, 0]
+        compilado["folha"][nos] = folha
+        compilado["ausente_esquerda"][nos] = t.missing_go_to_left.astype(bool)
+    compilado["raizes"] = 2 * inicios
+    compilado["n_atributos"] = arvores[0].n_features_in_
+    # Random Forest: média das árvores; Árvore de Decisão: valor da folha
+    compilado["media"] = hasattr(modelo, "estimators_")
+    return compilado
+
+
+def linhas_float32(X, n_atributos):
+    """Matriz densa float32 contígua por linha (a conversão que o scikit-learn aplica antes das árvores)."""
+    if sparse.issparse(X):
+        X = X.tocsr()
+        densa = np.zeros((X.shape[0], n_atributos), dtype=np.float32)
+        if X.shape[0] == 1:
+            densa[0, X.indices] = X.data
+        else:
+            densa[np.repeat(np.arange(X.shape[0]), np.diff(X.indptr)), X.indices] = X.data
+        return densa
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def prever(compilado, X):
+    """Previsões para as linhas de X (CSR ou densa), idênticas às do predict do scikit-learn."""
+    n_atributos = compilado["n_atributos"]
+    X = linhas_float32(X, n_atributos)
+    if X.shape[0] == 0:
+        return np.empty(0)
+    # Arrays do artefato chegam como memmap; a view ndarray evita o custo da subclasse a cada operação
+    atributo, limiar, filhos, folha = (
+        np.asarray(compilado[chave]) for chave in ("atributo", "limiar", "filhos", "folha")
+    )
+    # float32 -> float64 é exato; comparar float64 com float64 evita a promoção de tipos a cada nível
+    x = X.ravel().astype(np.float64)
+    ausentes = np.isnan(x).any()
+    deslocamento = (np.arange(X.shape[0]) * n_atributos)[:, None]
+    nos = np.tile(np.asarray(compilado["raizes"]), (X.shape[0], 1))
+    while True:
+        for _ in range(INTERVALO_FOLHAS):
+            indices = atributo.take(nos)
+            if X.shape[0] > 1:
+                indices += deslocamento
+            valores = x.take(indices)
+            direita = valores > limiar.take(nos)
+            if ausentes:
+                direita = np.where(np.isnan(valores), ~np.asarray(compilado["ausente_esquerda"]).take(nos), direita)
+            nos = filhos.take(nos + direita)
+        if folha.take(nos).all():
+            break
+    # cumsum soma as árvores em sequência, na mesma ordem do acumulador do predict
+    soma = np.cumsum(np.asarray(compilado["valor"]).take(nos), axis=1)[:, -1]
+    return soma / nos.shape[1] if compilado["media"] else soma
+
+
+def prever_modelo(artefato, X):
+    """Previsões do modelo do artefato: pelo caminho compilado em linhas avulsas e lotes pequenos."""
+    compilado = artefato.get("compilado")
+    if compilado is None or X.shape[0] > LINHAS_COMPILADAS:
+        return artefato["modelo"].predict(X)
+    return prever(compilado, X)
@@ -0,0 +1,132 @@
+"""
+Precificação em lote de estoques inteiros (CSV ou Parquet).
+
+Em vez de um DataFrame de uma linha por veículo (predict_price do car1.py),
+o lote inteiro passa por um único transform do pré-processador (CSR) e um
+único predict do modelo do artefato. Aceita as colunas em português (as do
+app) ou no formato original do Kaggle; textos como "2.0 Turbo", "1000 km",
+"-" e "04-May" são convertidos como na base de treino e valores ausentes
+recebem a mediana do treino (numéricas) ou "DESCONHECIDO" (categóricas).
+
+    python -m carros.lote estoque.csv --saida precos.csv [--tamanho-bloco 50000]
+
+Arquivos grandes são lidos e gravados em blocos, sem carregar tudo na
+memória; ao final são exibidas as linhas por segundo.
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from .dados import COLUNAS_CATEGORICAS, NOMES_COLUNAS, converter_tipos
+from .inferencia import prever_modelo
+from .treino import carregar_artefato, codificar
+
+COLUNA_PRECO = "Preço Sugerido"
+TAMANHO_BLOCO = 50_000
+
+
+def preparar_lote(df, artefato):
+    """Colunas de entrada do modelo, com tipos convertidos e nulos preenchidos."""
+    df = df.rename(columns=NOMES_COLUNAS)
+    faltando = [coluna for coluna in artefato["colunas"] if coluna not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes no arquivo: {', '.join(faltando)}")
+    entrada = converter_tipos(df[artefato["colunas"]].copy())
+    for coluna in COLUNAS_CATEGORICAS:
+        entrada[coluna] = entrada[coluna].fillna("DESCONHECIDO").astype(str).str.strip().str.upper()
+    numericas = [coluna for coluna in artefato["colunas"] if coluna not in COLUNAS_CATEGORICAS]
+    entrada[numericas] = entrada[numericas].apply(pd.to_numeric, errors="coerce").fillna(artefato["medianas"])
+    return entrada
+
+
+def prever_lote(artefato, df):
+    """Cópia de `df` com a coluna "Preço Sugerido" (um transform e um predict para o lote todo)."""
+    X = codificar(artefato["preprocessador"], preparar_lote(df, artefato))
+    resultado = df.copy()
+    resultado[COLUNA_PRECO] = prever_modelo(artefato, X) if X.shape[0] else []
+    return resultado
+
+
+def ler_tabela(caminho_ou_arquivo, nome=None):
+    """CSV ou Parquet (pela extensão) de um caminho ou de um arquivo aberto (upload)."""
+    nome = nome or str(caminho_ou_arquivo)
+    if nome.lower().endswith(".parquet"):
+        return pd.read_parquet(caminho_ou_arquivo)
+    return pd.read_csv(caminho_ou_arquivo)
+
+
+def ler_em_blocos(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    if caminho.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for bloco in pq.ParquetFile(caminho).iter_batches(batch_size=tamanho_bloco):
+            yield bloco.to_pandas()
+    else:
+        yield from pd.read_csv(caminho, chunksize=tamanho_bloco)
+
+
+def precificar_arquivo(artefato, entrada, saida, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Precifica `entrada` bloco a bloco gravando em `saida` (CSV ou Parquet).
+    Retorna {"linhas", "segundos", "linhas_por_segundo"}; o tempo conta só o
+    preparo e a previsão, sem a leitura e a gravação.
+    """
+    linhas, segundos = 0, 0.0
+    escritor = None
+    parquet = saida.lower().endswith(".parquet")
+    temporario = saida + ".tmp"
+    try:
+        for bloco in ler_em_blocos(entrada, tamanho_bloco):
+            inicio = time.perf_counter()
+            resultado = prever_lote(artefato, bloco)
+            segundos += time.perf_counter() - inicio
+            linhas += len(resultado)
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                tabela = pa.Table.from_pandas(resultado, preserve_index=False)
+                if escritor is None:
+                    escritor = pq.ParquetWriter(temporario, tabela.schema)
+                escritor.write_table(tabela)
+            else:
+                primeiro = linhas == len(resultado)
+                resultado.to_csv(temporario, mode="w" if primeiro else "a", header=primeiro, index=False)
+        if escritor is not None:
+            escritor.close()
+            escritor = None
+        os.replace(temporario, saida)
+    except BaseException:
+        # Falha no meio (leitura, previsão, gravação ou interrupção): não deixa o .tmp para trás
+        if escritor is not None:
+            escritor.close()
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return {
+        "linhas": linhas,
+        "segundos": round(segundos, 4),
+        "linhas_por_segundo": round(linhas / segundos) if segundos > 0 else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precifica um estoque de veículos (CSV ou Parquet) com o modelo treinado.")
+    parser.add_argument("entrada", help="arquivo .csv ou .parquet com os veículos")
+    parser.add_argument("--saida", required=True, help="arquivo .csv ou .parquet de saída (entrada + Preço Sugerido)")
+    parser.add_argument("--tamanho-bloco", type=int, default=TAMANHO_BLOCO, help="linhas por bloco")
+    args = parser.parse_args(argv)
+
+    artefato = carregar_artefato()
+    if artefato is None:
+        parser.error("nenhum modelo treinado; execute python -m carros.treino")
+    estatisticas = precificar_arquivo(artefato, args.entrada, args.saida, args.tamanho_bloco)
+    print(f"{estatisticas['linhas']} veículos em {estatisticas['segundos']:.2f}s "
+          f"({estatisticas['linhas_por_segundo'] or 0:,} veículos/s) -> {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Treino offline dos modelos de preço e artefato versionado para o app.
+
+Reproduz as seções 3 a 5 do car1.py (One-Hot, divisão treino/teste,
+comparação de Random Forest, Regressão Linear e Árvore de Decisão com MSE,
+R² e validação cruzada) fora do Streamlit e grava um único artefato joblib
+com o pré-processador, o melhor modelo (pelo R²) também na forma compilada
+para previsões de baixa latência, a tabela de métricas, as previsões de
+teste de cada modelo (gráfico de desempenho) e o índice de anúncios
+comparáveis. O app apenas carrega esse arquivo: nenhuma interação com
+widgets dispara um fit.
+
+As features ficam em CSR do começo ao fim (ColumnTransformer com One-Hot
+esparso -> divisões -> validação cruzada -> estimador): cerca de 3 MB em vez
+de ~250 MB da matriz densa de ~19 mil x 1.600 colunas. Só os modelos de
+MODELOS_DENSOS (e estimadores que não aceitam esparso) recebem uma cópia
+densa float32, feita a partir do CSR. A comparação roda em paralelo, uma
+tarefa por modelo e partição (carros/comparacao.py).
+
+Com --busca, uma busca Hyperband (carros/busca.py, com cache em disco)
+escolhe antes os hiperparâmetros do Random Forest e da Árvore de Decisão, e
+os vencedores entram na comparação que define o melhor modelo.
+
+    python -m carros.treino [--dados car_price_prediction.csv] [--saida modelos_carros/] [--busca]
+
+O nome do arquivo traz a impressão digital dos dados tratados e o manifesto
+(artefato_atual.json) aponta para o artefato mais recente.
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import OneHotEncoder
+from sklearn.tree import DecisionTreeRegressor
+
+from .busca import NOME_PASTA_BUSCA, aplicar_parametros, buscar
+from .comparacao import comparar_modelos, particoes
+from .comparaveis import construir_comparaveis
+from .dados import ALVO, ARQUIVO_PADRAO, COLUNAS_CATEGORICAS, PASTA_PADRAO, carregar_dados, colunas_entrada, impressao_dados
+from .inferencia import compilar
+
+# Versão do formato do artefato: artefatos de outra versão são ignorados pelo app
+VERSAO_ARTEFATO = 7
+NOME_PASTA_ARTEFATOS = "modelos_carros"
+PASTA_ARTEFATOS = os.path.join(PASTA_PADRAO, NOME_PASTA_ARTEFATOS)
+NOME_MANIFESTO = "artefato_atual.json"
+
+
+def modelos_candidatos():
+    """Modelos comparados (mesma configuração da seção 5 do car1.py)."""
+    return {
+        "Random Forest": RandomForestRegressor(n_estimators=50, random_state=42, n_jobs=-1),
+        "Linear Regression": LinearRegression(),
+        "Decision Tree": DecisionTreeRegressor(random_state=42, max_depth=10),
+    }
+
+
+def ajustar_preprocessador(df, colunas):
+    """
+    Numéricas (na ordem de `colunas`) seguidas do One-Hot das categóricas,
+    sempre em CSR (sparse_threshold=1).
+    """
+    numericas = [coluna for coluna in colunas if coluna not in COLUNAS_CATEGORICAS]
+    preprocessador = ColumnTransformer(
+        transformers=[
+            ("num", "passthrough", numericas),
+            ("cat", OneHotEncoder(drop="first", handle_unknown="ignore"), COLUNAS_CATEGORICAS),
+        ],
+        sparse_threshold=1.0,
+    )
+    preprocessador.fit(df[colunas])
+    return preprocessador
+
+
+def codificar(preprocessador, df):
+    """Matriz CSR de entrada dos modelos."""
+    return preprocessador.transform(df).tocsr()
+
+
+def estatisticas_lineares(X, y):
+    """Estatísticas suficientes da regressão linear: n, somas de X e y, XᵀX e Xᵀy."""
+    return {
+        "n": X.shape[0],
+        "soma_x": np.asarray(X.sum(axis=0)).ravel(),
+        "soma_y": float(y.sum()),
+        "xtx": (X.T @ X).toarray(),
+        "xty": np.asarray(X.T @ y).ravel(),
+    }
+
+
+def treinar(caminho=ARQUIVO_PADRAO, cv=5, n_jobs=-1, pasta_busca=None, novos=None):
+    """
+    Pipeline completo de treino; devolve o artefato (dicionário). Com
+    `pasta_busca`, roda antes a busca de hiperparâmetros (cache nessa pasta);
+    `novos` (anúncios tratados do treino incremental) entra junto com a base.
+    """
+    df = carregar_dados(caminho)
+    # A impressão digital é a da base (CSV), também com anúncios novos: é ela que o app confere
+    impressao = impressao_dados(df)
+    impressao_busca = impressao
+    if novos is not None and len(novos):
+        df = pd.concat([df, novos[df.columns]], ignore_index=True)
+        # O cache da busca, ao contrário, depende das linhas realmente usadas (base + anúncios novos)
+        impressao_busca = impressao_dados(df)
+    colunas = colunas_entrada(df)
+    preprocessador = ajustar_preprocessador(df, colunas)
+    X = codificar(preprocessador, df[colunas])
+    y = df[ALVO].to_numpy()
+
+    inicio = time.perf_counter()
+    candidatos = modelos_candidatos()
+    busca = None
+    if pasta_busca is not None:
+        resultados = buscar(X, y, impressao_busca, candidatos, pasta_busca, n_jobs=n_jobs)
+        aplicar_parametros(candidatos, resultados)
+        busca = {nome: {"parametros": r["parametros"], "r2_validacao": r["r2"]} for nome, r in resultados.items()}
+    metricas, modelos, y_test, previsoes, tarefas = comparar_modelos(X, y, candidatos, cv, n_jobs=n_jobs)
+    if metricas.empty:
+        raise ValueError("Nenhum modelo foi avaliado corretamente. Verifique os dados de entrada e a configuração dos modelos.")
+    melhor_modelo = metricas["R²"].idxmax()
+    treino = particoes(X.shape[0], cv=0)["teste"][0]
+
+    return {
+        "versao": VERSAO_ARTEFATO,
+        "criado_em": datetime.now().isoformat(timespec="seconds"),
+        "impressao_dados": impressao,
+        "colunas": colunas,
+        # Medianas das entradas numéricas, para preencher ausentes na precificação em lote
+        "medianas": df[colunas].median(numeric_only=True),
+        "preprocessador": preprocessador,
+        "melhor_modelo": melhor_modelo,
+        # O melhor modelo já foi treinado nos 80% de treino durante a comparação
+        "modelo": modelos[melhor_modelo],
+        # Nós das árvores do melhor modelo em arrays contíguos (carros/inferencia.py); None para a regressão linear
+        "compilado": compilar(modelos[melhor_modelo]),
+        "metricas": metricas,
+        # Tempo e memória de cada tarefa (modelo x partição) da comparação
+        "tarefas": tarefas,
+        "teste": {"y": y_test, "previsoes": previsoes},
+        # KD-trees dos anúncios da base para os comparáveis do preço sugerido (carros/comparaveis.py)
+        "comparaveis": construir_comparaveis(df, colunas),
+        # Hiperparâmetros vencedores da busca (None sem --busca)
+        "busca": busca,
+        # Estado do treino incremental (carros/incremental.py): linhas vistas pelo modelo,
+        # partições de anúncios já incorporadas e, para a regressão linear, XᵀX e Xᵀy
+        "incremental": {
+            "linhas_treino": len(treino),
+            "linhas_novas": 0,
+            "atualizacoes": 0,
+            "partes": [],
+            "estatisticas": estatisticas_lineares(X[treino], y[treino]) if melhor_modelo == "Linear Regression" else None,
+        },
+        "segundos_treino": round(time.perf_counter() - inicio, 3),
+    }
+
+
+def salvar_artefato(artefato, pasta=PASTA_ARTEFATOS):
+    """Grava o artefato e atualiza o manifesto; devolve o caminho do arquivo."""
+    os.makedirs(pasta, exist_ok=True)
+    nome = f"carros_v{artefato['versao']}_{artefato['impressao_dados']}.joblib"
+    caminho = os.path.join(pasta, nome)
+    temporario = caminho + ".tmp"
+    joblib.dump(artefato, temporario)
+    os.replace(temporario, caminho)
+
+    manifesto = {
+        "arquivo": nome,
+        "versao": artefato["versao"],
+        "criado_em": artefato["criado_em"],
+        "impressao_dados": artefato["impressao_dados"],
+        "melhor_modelo": artefato["melhor_modelo"],
+        "metricas": artefato["metricas"].to_dict(orient="index"),
+    }
+    temporario = os.path.join(pasta, NOME_MANIFESTO + ".tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, os.path.join(pasta, NOME_MANIFESTO))
+    return caminho
+
+
+def ler_manifesto(pasta=PASTA_ARTEFATOS):
+    """Manifesto do artefato atual, ou None se não houver artefato compatível."""
+    try:
+        with open(os.path.join(pasta, NOME_MANIFESTO), encoding="utf-8") as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifesto.get("versao") != VERSAO_ARTEFATO or not os.path.exists(os.path.join(pasta, manifesto["arquivo"])):
+        return None
+    return manifesto
+
+
+def carregar_artefato(pasta=PASTA_ARTEFATOS):
+    """Artefato atual (arrays lidos com mmap), ou None se ainda não houver treino."""
+    manifesto = ler_manifesto(pasta)
+    if manifesto is None:
+        return None
+    return joblib.load(os.path.join(pasta, manifesto["arquivo"]), mmap_mode="r")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Treina os modelos de preço de veículos e grava o artefato do app.")
+    parser.add_argument("--dados", default=ARQUIVO_PADRAO, help="CSV da base (car_price_prediction.csv)")
+    parser.add_argument("--saida", default=PASTA_ARTEFATOS, help=f"pasta dos artefatos (padrão: {NOME_PASTA_ARTEFATOS}/)")
+    parser.add_argument("--cv", type=int, default=5, help="dobras da validação cruzada (0 desliga)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="processos do pool da comparação (-1 = todos os núcleos)")
+    parser.add_argument("--busca", action="store_true", help="busca os hiperparâmetros (Hyperband) antes da comparação")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    pasta_busca = os.path.join(args.saida, NOME_PASTA_BUSCA) if args.busca else None
+    artefato = treinar(args.dados, args.cv, args.n_jobs, pasta_busca)
+    caminho = salvar_artefato(artefato, args.saida)
+    print(artefato["metricas"].round(2).to_string())
+    for nome, resultado in (artefato["busca"] or {}).items():
+        print(f"{nome}: {resultado['parametros']} (R² validação {resultado['r2_validacao']:.3f})")
+    print(f"Melhor modelo: {artefato['melhor_modelo']}")
+    print(f"{os.path.basename(caminho)} gravado ({time.perf_counter() - inicio:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()